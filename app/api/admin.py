@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from app.config.database import get_db
@@ -6,6 +6,10 @@ from app.api.deps import get_current_admin_user
 from app.repositories.query_repository import get_global_stats, get_all_history, get_user_history
 from app.models.user import User
 from app.schemas.query import Query as QuerySchema
+from app.schemas.ingestion import IngestionJobCreate, IngestionJobStatus
+from app.services.collection_versions import describe_collection_versions, rollback_collection_version
+from app.services.embeddings import get_embedding_function
+from app.services.ingestion_jobs import ACTIVE_STATUSES, IngestionJobConflict, get_ingestion_job_manager
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -30,3 +34,74 @@ def get_specific_user_history(
     current_user: User = Depends(get_current_admin_user)
 ):
     return get_user_history(db, user_id)
+
+@router.get("/embedding-cache", response_model=Dict[str, Any])
+def get_embedding_cache_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    cache = get_embedding_function().cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@router.post("/ingestion-jobs", response_model=IngestionJobStatus, status_code=status.HTTP_202_ACCEPTED)
+def submit_ingestion_job(
+    job_request: IngestionJobCreate = IngestionJobCreate(),
+    current_user: User = Depends(get_current_admin_user)
+):
+    try:
+        job = get_ingestion_job_manager().submit(force=job_request.force)
+    except IngestionJobConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "job_id": e.job.id}
+        )
+    return job.to_dict()
+
+@router.get("/ingestion-jobs", response_model=List[IngestionJobStatus])
+def list_ingestion_jobs(
+    current_user: User = Depends(get_current_admin_user)
+):
+    return [job.to_dict() for job in get_ingestion_job_manager().list()]
+
+@router.get("/ingestion-jobs/{job_id}", response_model=IngestionJobStatus)
+def get_ingestion_job(
+    job_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    job = get_ingestion_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingestion job not found")
+    return job.to_dict()
+
+@router.post("/ingestion-jobs/{job_id}/cancel", response_model=IngestionJobStatus)
+def cancel_ingestion_job(
+    job_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    job = get_ingestion_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingestion job not found")
+    return job.to_dict()
+
+@router.get("/collections", response_model=Dict[str, Any])
+def get_collection_versions(
+    current_user: User = Depends(get_current_admin_user)
+):
+    return describe_collection_versions()
+
+@router.post("/collections/rollback", response_model=Dict[str, Any])
+def rollback_collection(
+    current_user: User = Depends(get_current_admin_user)
+):
+    active_jobs = [job for job in get_ingestion_job_manager().list() if job.status in ACTIVE_STATUSES]
+    if active_jobs:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "An ingestion job is in progress", "job_id": active_jobs[0].id}
+        )
+    try:
+        rollback_collection_version()
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return describe_collection_versions()
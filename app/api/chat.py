@@ -1,18 +1,24 @@
+import json
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
-from app.config.database import get_db
+from app.config.database import SessionLocal, get_db
 from app.api.deps import get_current_active_user
 from app.repositories.query_repository import create_query_log, get_user_history, get_user_stats
 from app.models.user import User
-from app.services.chat import ask_question as service_ask_question
+from app.services.chat import ask_question as service_ask_question, stream_question
 from pydantic import BaseModel
-from app.schemas.query import Query as QuerySchema
+from typing import Literal, Optional
+from app.schemas.query import Query as QuerySchema, RetrievalFilters
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 class ChatRequest(BaseModel):
     question: str
+    filters: Optional[RetrievalFilters] = None
+    diversity: Optional[Literal["none", "shingle", "mmr"]] = None
 
 class ChatResponse(BaseModel):
     answer: str
@@ -25,10 +31,12 @@ async def ask_question(
     current_user: User = Depends(get_current_active_user)
 ):
     # Call service
-    response_data = await service_ask_question(request.question)
+    filters = request.filters.model_dump(exclude_none=True) if request.filters else None
+    response_data = await service_ask_question(request.question, filters=filters or None, diversity=request.diversity)
     
-    # Log to DB
-    create_query_log(
+    # Log to DB (SQLAlchemy synchrone : hors de la boucle d'événements)
+    await run_in_threadpool(
+        create_query_log,
         db=db,
         query=request.question,
         response=response_data["answer"],
@@ -37,6 +45,41 @@ async def ask_question(
     
     return response_data
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _save_query_log(question: str, answer: str, user_id: int):
+    # La session de la requête (get_db) est déjà fermée quand le flux se termine
+    db = SessionLocal()
+    try:
+        create_query_log(db=db, query=question, response=answer, user_id=user_id)
+    finally:
+        db.close()
+
+@router.post("/stream")
+async def ask_question_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Réponse en Server-Sent Events : "sources" dès la fin de la recherche, un événement "token"
+    par fragment généré, puis "done" (réponse complète et mesures) ou "error".
+    """
+    filters = request.filters.model_dump(exclude_none=True) if request.filters else None
+    user_id = current_user.id
+
+    async def events():
+        async for event in stream_question(request.question, filters=filters or None, diversity=request.diversity):
+            yield _sse(event["event"], event["data"])
+            if event["event"] == "done":
+                await run_in_threadpool(_save_query_log, request.question, event["data"]["answer"], user_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/history", response_model=List[QuerySchema])
 def get_my_history(
     db: Session = Depends(get_db),
@@ -1,58 +1,136 @@
-from fastapi import APIRouter
-from app.services.chunking import split_documents
-from app.services.pdf_loader import load_pdf
+import json
+from typing import Iterable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.api.deps import get_current_admin_user
+from app.config import settings
+from app.models.user import User
+from app.schemas.ingestion import IngestionJobStatus
+from app.services.corpus import (
+    CorpusSnapshot, InvalidCursor, StaleCursor, decode_cursor, encode_cursor, get_corpus
+)
+from app.services.ingestion_jobs import get_ingestion_job_manager
 from app.services.llm import create_llm
+from app.services.uploads import UploadRejected, save_pdf_upload
 
 router = APIRouter(tags=["Documents"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MAX_PAGE_SIZE = 1000
+
+
+def _serialize(doc) -> dict:
+    return {
+        "content": doc.page_content,
+        "metadata": doc.metadata
+    }
+
+
+def _wants_ndjson(request: Request, format: str) -> bool:
+    return format == "ndjson" or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _ndjson_lines(documents: Iterable) -> Iterable[str]:
+    for doc in documents:
+        yield json.dumps(_serialize(doc), ensure_ascii=False) + "\n"
+
+
+def _paginate(request: Request, kind: str, key: str, cursor: Optional[str], limit: Optional[int],
+              default_limit: int, format: str):
+    """
+    Page du corpus en cache à partir du curseur. En JSON, `limit` vaut au plus MAX_PAGE_SIZE ;
+    en NDJSON sans `limit`, tout le reste du corpus est envoyé en flux, document par document.
+    Le curseur suivant est renvoyé dans `next_cursor` (JSON) ou l'en-tête X-Next-Cursor (NDJSON).
+    """
+    corpus: CorpusSnapshot = get_corpus()
+    try:
+        offset = decode_cursor(cursor, corpus.version) if cursor else 0
+    except InvalidCursor as e:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
+    except StaleCursor as e:
+        return JSONResponse(status_code=409, content={"status": "error", "message": str(e)})
+
+    total = corpus.total(kind)
+    if _wants_ndjson(request, format):
+        stop = total if limit is None else min(total, offset + limit)
+        headers = {"X-Total-Count": str(total)}
+        if stop < total:
+            headers["X-Next-Cursor"] = encode_cursor(corpus.version, stop)
+        documents = (doc for _, doc in zip(range(max(0, stop - offset)), corpus.iter_from(kind, offset)))
+        return StreamingResponse(_ndjson_lines(documents), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    documents, next_offset = corpus.page(kind, offset, limit or default_limit)
+    return {
+        "status": "success",
+        "total_count": total,
+        "returned_count": len(documents),
+        "next_cursor": encode_cursor(corpus.version, next_offset) if next_offset is not None else None,
+        key: [_serialize(doc) for doc in documents]
+    }
+
+
 @router.get("/chunks")
-async def get_chunks():
+def get_chunks(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
     try:
-        documents = load_pdf()
-        chunks = split_documents(documents=documents)
-        
-        return {
-            "status": "success",
-            "count": len(chunks),
-            "chunks": [
-                {
-                    "content": chunk.page_content,
-                    "metadata": chunk.metadata
-                } for chunk in chunks
-            ]
-        }
+        response = _paginate(request, "chunks", "chunks", cursor, limit, 100, format)
+        if isinstance(response, dict):
+            response["count"] = response["returned_count"]
+        return response
     except Exception as e:
-        return {"status": "error", "message": str(e)} 
+        return {"status": "error", "message": str(e)}
 
 @router.get("/documents")
-async def get_documents(limit: int = 10):
+def get_documents(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    format: str = Query("json", pattern="^(json|ndjson)$")
+):
     try:
-        documents = load_pdf()
-        
-        limited_docs = documents[:limit]
-        
-        return {
-            "status": "success",
-            "total_count": len(documents),
-            "returned_count": len(limited_docs),
-            "documents": [
-                {
-                    "content": doc.page_content,
-                    "metadata": doc.metadata
-                } for doc in limited_docs
-            ]
-        }
+        return _paginate(request, "pages", "documents", cursor, limit, 10, format)
     except Exception as e:
-        return {"status": "error", "message": str(e)} 
+        return {"status": "error", "message": str(e)}
+
+@router.post("/documents", response_model=IngestionJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def upload_document(
+    request: Request,
+    filename: str = Query(..., description="Nom du fichier PDF dans le dossier des manuels"),
+    overwrite: bool = False,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Ajoute un manuel : le corps de la requête (application/pdf) est écrit sur disque au fil de sa
+    réception, puis seul ce fichier est indexé par un job de fond dont l'état est renvoyé
+    (GET /admin/ingestion-jobs/{id}). Ses chunks sont interrogeables dès leur écriture dans l'index.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds {settings.UPLOAD_MAX_BYTES} bytes"
+        )
+    try:
+        path = await save_pdf_upload(request.stream(), filename, overwrite=overwrite)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    job = get_ingestion_job_manager().submit(file_paths=[path])
+    return job.to_dict()
 
 @router.get("/llmmodel")
 async def get_llm_model():
     try:
         model = create_llm()
-        
+
         return {
             "status": "success",
             "model": model,
         }
     except Exception as e:
-        return {"status": "error", "message": str(e)} 
+        return {"status": "error", "message": str(e)}
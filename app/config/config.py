@@ -23,7 +23,17 @@ class Settings(BaseSettings):
     QDRANT_PORT: int = 6333
     QDRANT_API_KEY: str | None = None
     QDRANT_COLLECTION_NAME: str = "mediassist_collection"
+    # Rebuilds go to versioned collections "<name>_v<ns>" served through the alias QDRANT_COLLECTION_NAME;
+    # versions kept (active + previous ones, for rollback)
+    QDRANT_KEPT_VERSIONS: int = 2
+    # The alias is the source of truth (it may be swapped by another replica): re-read at most this often
+    QDRANT_ALIAS_CACHE_SECONDS: float = 5.0
     QDRANT_URL: str = "http://localhost:6333"
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT: int = 10
+    QDRANT_POOL_SIZE: int | None = None
+    QDRANT_KEEPALIVE_MS: int = 30000
     EMBEDDING_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"
     
     # Ollama Configuration
@@ -37,8 +47,97 @@ class Settings(BaseSettings):
     LLM_TEMPERATURE: float = 0.2
     LLM_TOP_P: float = 0.9
     EMBEDDING_DIMENSION: int = 384
+
+    # Embedding client: texts per request, concurrent requests to Ollama, retries with jittered backoff
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_MAX_IN_FLIGHT: int = 4
+    EMBEDDING_MAX_RETRIES: int = 3
+    EMBEDDING_RETRY_BASE_DELAY: float = 0.5
+    EMBEDDING_RETRY_MAX_DELAY: float = 8.0
+    EMBEDDING_TIMEOUT: float = 120.0
+
+    # Persistent embedding cache (SQLite, default INDEX_STORAGE_PATH/embeddings.sqlite3), LRU-evicted above MAX_BYTES
+    EMBEDDING_STORE_ENABLED: bool = True
+    EMBEDDING_STORE_PATH: str | None = None
+    EMBEDDING_STORE_MAX_BYTES: int = 1024 * 1024 * 1024
     
     ENVIRONMENT: str = "dev"
+
+    # Dense vectors: quantization ("none", "scalar" int8 or "binary"), on-disk storage and HNSW graph
+    QDRANT_QUANTIZATION: str = "none"
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = True
+    QDRANT_ON_DISK_VECTORS: bool = False
+    QDRANT_HNSW_M: int = 16
+    QDRANT_HNSW_EF_CONSTRUCT: int = 100
+    QDRANT_HNSW_ON_DISK: bool = False
+    # Search side: HNSW beam width (None = Qdrant default) and rescoring of quantized candidates
+    QDRANT_SEARCH_HNSW_EF: int | None = None
+    QDRANT_SEARCH_OVERSAMPLING: float = 2.0
+    QDRANT_SEARCH_RESCORE: bool = True
+
+    # PDF parsing: worker processes (0 = one per CPU) and pages per task for large files
+    PDF_PARSE_WORKERS: int = 0
+    PDF_PAGES_PER_TASK: int = 32
+    # Extracted page text, cached per file content hash and parser version (gzip, INDEX_STORAGE_PATH/pages by default)
+    PAGE_CACHE_ENABLED: bool = True
+    PAGE_CACHE_PATH: str | None = None
+
+    # PDF upload (POST /documents): maximum file size, streamed to DATA_PATH then indexed in the background
+    UPLOAD_MAX_BYTES: int = 200 * 1024 * 1024
+
+    # Thread pools for libraries that stay synchronous (chat requests run on the event loop):
+    # request path (reranker, BM25, embedding cache) and post-answer evaluation/MLflow logging,
+    # whose queued tasks are dropped above MLOPS_MAX_PENDING
+    BLOCKING_POOL_WORKERS: int = 8
+    MLOPS_POOL_WORKERS: int = 2
+    MLOPS_MAX_PENDING: int = 64
+
+    # Chunking: "compat" reproduces the historical splitter exactly (stable chunk ids), "budget" counts
+    # tokens with CHUNK_TOKENIZER (Hugging Face tokenizer name or tokenizer.json path, words if unset)
+    CHUNKING_MODE: str = "compat"
+    CHUNK_TOKENIZER: str | None = None
+
+    # Streaming ingestion: chunks per embedding/upsert batch (EMBEDDING_MAX_IN_FLIGHT x EMBEDDING_BATCH_SIZE
+    # keeps every embedding slot busy) and batches buffered between stages
+    INGESTION_BATCH_SIZE: int = 128
+    INGESTION_QUEUE_SIZE: int = 4
+
+    # Keyword index (BM25)
+    INDEX_STORAGE_PATH: str = "storage"
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+
+    # Vector backend: "qdrant" (server) or "local" (in-process mmap index under INDEX_STORAGE_PATH)
+    VECTOR_BACKEND: str = "qdrant"
+    LOCAL_INDEX_IVF_LISTS: int = 0
+    LOCAL_INDEX_IVF_NPROBE: int = 8
+
+    # Hybrid retrieval: "server" (Qdrant prefetch + weighted RRF) or "client" (fusion in Python)
+    HYBRID_FUSION: str = "server"
+    SPARSE_AVG_DOC_LENGTH: float = 200.0
+    RETRIEVAL_LEG_TIMEOUT: float = 5.0
+
+    # Cross-encoder reranking (RETRIEVAL_RERANKING)
+    RERANKER_MODEL: str = "Xenova/mmarco-mMiniLMv2-L12-H384-v1"
+    RERANKER_ONNX_FILE: str = "onnx/model_quantized.onnx"
+    RERANKER_MAX_LENGTH: int = 256
+    RERANKER_BATCH_SIZE: int = 16
+    RERANKER_NUM_THREADS: int = 0
+    # A failed model load (e.g. Hugging Face Hub unreachable at startup) is retried after this delay
+    RERANKER_RETRY_SECONDS: float = 60.0
+    RERANK_CANDIDATES: int = 20
+    RERANK_BUDGET_MS: float = 300.0
+
+    # Context diversity: "none", "shingle" (drop near-duplicates) or "mmr" (rerank a larger pool)
+    DIVERSITY_MODE: str = "shingle"
+    DIVERSITY_THRESHOLD: float = 0.5
+    DIVERSITY_MMR_LAMBDA: float = 0.7
+    DIVERSITY_CANDIDATE_FACTOR: int = 2
+
+    # Query embedding cache
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 2048
+    EMBEDDING_CACHE_TTL_SECONDS: float = 3600.0
+    EMBEDDING_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
     
     model_config = SettingsConfigDict(
         env_file=".env",
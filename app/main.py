@@ -3,7 +3,11 @@ from app.config.config import settings
 from app.services.chat import ask_question
 from app.api import user, admin, chat, documents
 from app.config.database import init_db
-from app.services.vector_store import create_qdrant_collection
+from app.services.vector_store import init_qdrant_collection
+from app.services.qdrant_manager import qdrant_health_check, aclose_qdrant_clients
+from app.services.ingestion_jobs import get_ingestion_job_manager
+from app.services.blocking import run_blocking, shutdown_blocking_pools
+from app.services.reranker import get_reranker
 from prometheus_fastapi_instrumentator import Instrumentator
 
 from contextlib import asynccontextmanager
@@ -11,13 +15,20 @@ from contextlib import asynccontextmanager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
-    try:
-        create_qdrant_collection()
-    except Exception as e:
-        print(f"Error initializing Qdrant: {e}")
+    if settings.VECTOR_BACKEND == "qdrant":
+        try:
+            init_qdrant_collection()
+        except Exception as e:
+            print(f"Error initializing Qdrant: {e}")
+    # Cross-encoder chargé au démarrage plutôt qu'à la première question
+    await run_blocking(get_reranker)
         
     yield
 
+    get_ingestion_job_manager().shutdown()
+    await aclose_qdrant_clients()
+    shutdown_blocking_pools()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
@@ -33,8 +44,13 @@ async def root():
     return {"message": "MediAssist API is running", "environment": settings.ENVIRONMENT}
 
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
+def health_check():
+    if settings.VECTOR_BACKEND != "qdrant":
+        return {"status": "healthy", "qdrant": "disabled", "vector_backend": settings.VECTOR_BACKEND}
+    return {
+        "status": "healthy",
+        "qdrant": "up" if qdrant_health_check() else "down"
+    }
 
 
 
@@ -30,3 +30,110 @@ RAG_DOCS_RETRIEVED = Histogram(
     "Number of documents retrieved per query",
     buckets=[1, 3, 5, 10, 20]
 )
+
+# Streaming answers (POST /chat/stream)
+RAG_TIME_TO_FIRST_TOKEN = Histogram(
+    "rag_time_to_first_token_seconds",
+    "Time from the request to the first answer token (retrieval + prompt processing)",
+    buckets=[0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0]
+)
+
+RAG_TOKENS_PER_SECOND = Histogram(
+    "rag_generation_tokens_per_second",
+    "Answer tokens streamed per second after the first one",
+    buckets=[1, 2, 5, 10, 15, 20, 30, 50, 100]
+)
+
+RAG_RERANK_TIME = Histogram(
+    "rag_rerank_seconds",
+    "Time spent reranking retrieved candidates with the cross-encoder",
+    buckets=[0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+)
+
+# Query embedding cache
+EMBEDDING_CACHE_HITS = Counter(
+    "rag_embedding_cache_hits_total",
+    "Query embeddings served from the cache"
+)
+
+EMBEDDING_CACHE_MISSES = Counter(
+    "rag_embedding_cache_misses_total",
+    "Query embeddings computed by the embedding model"
+)
+
+EMBEDDING_CACHE_BYTES = Gauge(
+    "rag_embedding_cache_bytes",
+    "Approximate memory used by the query embedding cache"
+)
+
+RAG_FUSION_DUPLICATES = Counter(
+    "rag_fusion_duplicates_removed_total",
+    "Chunks returned by both retrieval legs and merged during hybrid fusion"
+)
+
+# Context diversity (near-duplicate suppression)
+RAG_DIVERSITY_TOKENS_SAVED = Histogram(
+    "rag_context_tokens_saved",
+    "Estimated LLM context tokens removed per query by near-duplicate suppression",
+    buckets=[0, 25, 50, 100, 200, 400, 800, 1600]
+)
+
+RAG_DIVERSITY_DROPPED = Counter(
+    "rag_diversity_dropped_total",
+    "Near-duplicate chunks removed from the LLM context"
+)
+
+# Embedding client (batched Ollama requests)
+EMBEDDING_BATCH_TIME = Histogram(
+    "rag_embedding_batch_seconds",
+    "Latency of one embedding request (batch of texts) to the embedding server",
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+)
+
+EMBEDDING_TEXTS = Counter(
+    "rag_embedding_texts_total",
+    "Texts embedded by the embedding server"
+)
+
+EMBEDDING_RETRIES = Counter(
+    "rag_embedding_retries_total",
+    "Embedding requests retried after a transient error"
+)
+
+EMBEDDING_IN_FLIGHT = Gauge(
+    "rag_embedding_requests_in_flight",
+    "Embedding requests currently sent to the embedding server"
+)
+
+EMBEDDING_THROUGHPUT = Gauge(
+    "rag_embedding_texts_per_second",
+    "Throughput of the last multi-batch embedding call"
+)
+
+EMBEDDING_STORE_HITS = Counter(
+    "rag_embedding_store_hits_total",
+    "Texts whose vector was found in the persistent embedding cache"
+)
+
+EMBEDDING_STORE_MISSES = Counter(
+    "rag_embedding_store_misses_total",
+    "Texts missing from the persistent embedding cache"
+)
+
+# Parsed PDF pages cache (per file)
+PAGE_CACHE_HITS = Counter(
+    "rag_page_cache_hits_total",
+    "PDF files whose pages were read from the page cache instead of being parsed"
+)
+
+PAGE_CACHE_MISSES = Counter(
+    "rag_page_cache_misses_total",
+    "PDF files parsed because they were missing from the page cache"
+)
+
+# Background ingestion jobs
+INGESTION_JOBS_TOTAL = Counter(
+    "rag_ingestion_jobs_total",
+    "Ingestion jobs finished, by final status",
+    ["status"]  # succeeded, failed, cancelled
+)
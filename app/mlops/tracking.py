@@ -30,10 +30,13 @@ def create_query_run(run_name_prefix: str = "query") -> Tuple[MLflowLogger, mlfl
         "embedding_dimension": settings.EMBEDDING_DIMENSION,
         
         # Retrieval
-        "retrieval_vector_db": "qdrant",
+        "retrieval_vector_db": settings.VECTOR_BACKEND,
         "retrieval_distance": "cosine",
         "retrieval_top_k": settings.RETRIEVAL_TOP_K,
         "retrieval_reranking": settings.RETRIEVAL_RERANKING,
+        "reranker_model": settings.RERANKER_MODEL,
+        "rerank_candidates": settings.RERANK_CANDIDATES,
+        "context_diversity": settings.DIVERSITY_MODE,
         
         # LLM
         "llm_model": settings.OLLAMA_MODEL,
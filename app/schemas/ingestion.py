@@ -0,0 +1,32 @@
+# Schémas des jobs d'ingestion (API d'administration)
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class IngestionJobCreate(BaseModel):
+    force: bool = Field(False, description="Ignorer le manifeste et revectoriser tous les chunks")
+
+
+class IngestionJobProgress(BaseModel):
+    files_total: int = Field(..., description="Fichiers nouveaux ou modifiés à traiter")
+    pages_total: int
+    pages_parsed: int
+    chunks_embedded: int
+    elapsed_seconds: float
+    pages_per_second: float
+    chunks_per_second: float
+    eta_seconds: Optional[float] = Field(None, description="Temps restant estimé (inconnu avant la première page)")
+
+
+class IngestionJobStatus(BaseModel):
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    force: bool
+    file_paths: Optional[List[str]] = Field(None, description="Fichiers ciblés (None = tout le dossier)")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    stats: Optional[Dict[str, int]] = None
+    error: Optional[str] = None
+    progress: IngestionJobProgress
@@ -1,5 +1,5 @@
 # Schémas pour requête utilisateur et réponse RAG
-from typing import Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
 
@@ -29,4 +29,12 @@ class QueryInDBBase(QueryBase):
 
 
 class Query(QueryInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+
+class RetrievalFilters(BaseModel):
+    source: Optional[Union[str, List[str]]] = Field(None, description="Manuel(s) d'équipement (metadata.source)")
+    chapter: Optional[str] = Field(None, description="Chapitre du manuel")
+    section: Optional[str] = Field(None, description="Section du manuel")
+    page_min: Optional[int] = Field(None, ge=0, description="Première page incluse")
+    page_max: Optional[int] = Field(None, ge=0, description="Dernière page incluse")
@@ -0,0 +1,88 @@
+# blocking.py
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Set
+
+from app.config import settings
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+
+class BlockingPool:
+    """
+    Pool de threads borné pour les bibliothèques restées synchrones : la boucle d'événements
+    attend le résultat sans être bloquée, et au plus `workers` appels s'exécutent à la fois.
+    Le contexte (contextvars : callbacks LangChain, run MLflow) suit l'appel dans le thread.
+    """
+
+    def __init__(self, name: str, workers: Callable[[], int], max_pending: Optional[Callable[[], int]] = None):
+        self.name = name
+        self._workers = workers
+        self._max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[Future] = set()
+        self._lock = threading.Lock()
+
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=max(1, self._workers()), thread_name_prefix=self.name)
+            return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Équivalent de asyncio.to_thread sur ce pool."""
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.executor(), call)
+
+    def submit(self, func: Callable, *args, **kwargs) -> Optional[Future]:
+        """
+        Tâche de fond dont personne n'attend le résultat. Au-delà de `max_pending` tâches en
+        attente ou en cours, elle est abandonnée (None) plutôt que d'allonger la file sans limite.
+        """
+        with self._lock:
+            if self._max_pending is not None and len(self._pending) >= self._max_pending():
+                logger.warning(f"{self.name} pool saturated ({len(self._pending)} pending), task dropped")
+                return None
+        future = self.executor().submit(contextvars.copy_context().run, func, *args, **kwargs)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def join(self, timeout: Optional[float] = None):
+        """Attend la fin des tâches soumises par submit()."""
+        with self._lock:
+            pending = list(self._pending)
+        concurrent.futures.wait(pending, timeout=timeout)
+
+    def shutdown(self):
+        # Les appels en cours se terminent, ceux encore en file sont annulés
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+# Chemin d'une requête : reranker, index BM25 et local, cache d'embeddings SQLite, initialisation de la chaîne
+blocking_pool = BlockingPool("blocking", lambda: settings.BLOCKING_POOL_WORKERS)
+# Évaluation DeepEval et journalisation MLflow, après la réponse : un pool à part pour ne pas retarder les requêtes
+mlops_pool = BlockingPool("mlops", lambda: settings.MLOPS_POOL_WORKERS, lambda: settings.MLOPS_MAX_PENDING)
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    return await blocking_pool.run(func, *args, **kwargs)
+
+
+def shutdown_blocking_pools():
+    blocking_pool.shutdown()
+    mlops_pool.shutdown()
@@ -0,0 +1,185 @@
+# bm25_index.py
+
+import json
+import os
+import time
+from collections import Counter
+from typing import ContextManager, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+from app.services.index_storage import (
+    DocumentStore,
+    DocumentStoreWriter,
+    IndexCache,
+    create_version_dir,
+    switch_current,
+)
+from app.services.text_analyzer import analyze
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+
+class BM25Index:
+    """
+    Index inversé BM25 persistant.
+
+    Les postings sont stockés au format CSR (offsets / doc_ids / weights) dans des fichiers .npy
+    ouverts en mmap : tous les workers partagent les mêmes pages du cache système, et une
+    recherche ne touche que les postings des termes de la requête.
+    Les poids BM25 étant indépendants de la requête, ils sont précalculés à la construction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "vocab.json"), encoding="utf-8") as f:
+            self.vocab: Dict[str, int] = json.load(f)
+
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.doc_ids = np.load(os.path.join(path, "doc_ids.npy"), mmap_mode="r")
+        self.weights = np.load(os.path.join(path, "weights.npy"), mmap_mode="r")
+        self.documents = DocumentStore(path, self.meta["num_docs"], self.meta["filter_values"])
+
+    @property
+    def num_docs(self) -> int:
+        return self.meta["num_docs"]
+
+    @classmethod
+    def build(
+        cls,
+        documents: Iterable[Tuple[str, str, Dict]],
+        path: str,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> "BM25Index":
+        """
+        Construit l'index à partir de tuples (point_id, page_content, metadata) et l'écrit
+        dans un nouveau répertoire versionné, puis bascule le pointeur CURRENT de façon atomique.
+        """
+        start = time.perf_counter()
+        version, version_path = create_version_dir(path)
+
+        vocab: Dict[str, int] = {}
+        postings: List[List[Tuple[int, int]]] = []
+        doc_lengths: List[int] = []
+
+        writer = DocumentStoreWriter(version_path)
+        for point_id, content, metadata in documents:
+            doc_idx = writer.add(point_id, content, metadata)
+            terms = analyze(content)
+            doc_lengths.append(len(terms))
+
+            for term, tf in Counter(terms).items():
+                term_id = vocab.setdefault(term, len(vocab))
+                if term_id == len(postings):
+                    postings.append([])
+                postings[term_id].append((doc_idx, tf))
+        filter_values = writer.close()
+
+        num_docs = len(doc_lengths)
+        lengths = np.asarray(doc_lengths, dtype=np.float32)
+        avgdl = float(lengths.mean()) if num_docs else 0.0
+
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in postings])
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        weights = np.empty(offsets[-1], dtype=np.float32)
+
+        for term_id, plist in enumerate(postings):
+            lo, hi = offsets[term_id], offsets[term_id + 1]
+            ids = np.fromiter((d for d, _ in plist), dtype=np.int32, count=len(plist))
+            tf = np.fromiter((t for _, t in plist), dtype=np.float32, count=len(plist))
+            df = len(plist)
+            idf = np.log(1.0 + (num_docs - df + 0.5) / (df + 0.5))
+            norm = k1 * (1.0 - b + b * lengths[ids] / avgdl)
+            doc_ids[lo:hi] = ids
+            weights[lo:hi] = idf * tf * (k1 + 1.0) / (tf + norm)
+
+        np.save(os.path.join(version_path, "offsets.npy"), offsets)
+        np.save(os.path.join(version_path, "doc_ids.npy"), doc_ids)
+        np.save(os.path.join(version_path, "weights.npy"), weights)
+
+        with open(os.path.join(version_path, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+        with open(os.path.join(version_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "num_docs": num_docs,
+                "num_terms": len(vocab),
+                "avgdl": avgdl,
+                "k1": k1,
+                "b": b,
+                "filter_values": filter_values,
+            }, f, ensure_ascii=False)
+
+        switch_current(path, version)
+        logger.info(
+            f"BM25 index built: {num_docs} docs, {len(vocab)} terms "
+            f"in {time.perf_counter() - start:.2f}s ({version_path})"
+        )
+        return cls(version_path)
+
+    def search(self, query: str, top_k: int = 10, filters: Optional[Dict] = None) -> List[Tuple[int, float]]:
+        """
+        Retourne les (doc_idx, score BM25) des top_k documents pour la requête.
+        Les filtres ne sont évalués que sur les postings des termes de la requête.
+        """
+        term_ids = {self.vocab[t] for t in analyze(query) if t in self.vocab}
+        if not term_ids or top_k <= 0:
+            return []
+
+        slices = [(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        candidates = np.concatenate([self.doc_ids[lo:hi] for lo, hi in slices])
+        contributions = np.concatenate([self.weights[lo:hi] for lo, hi in slices])
+
+        if filters:
+            keep = self.documents.match_filters(candidates, filters)
+            candidates, contributions = candidates[keep], contributions[keep]
+            if not len(candidates):
+                return []
+
+        unique_docs, inverse = np.unique(candidates, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions)
+
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        return [(int(unique_docs[i]), float(scores[i])) for i in best]
+
+    def get_document(self, doc_idx: int) -> Tuple[str, Document]:
+        """Relit un document (point_id, Document) depuis le stockage mmap."""
+        return self.documents.get_document(doc_idx)
+
+    def close(self):
+        self.documents.close()
+
+
+_cache: IndexCache[BM25Index] = IndexCache(BM25Index)
+
+
+def load_bm25_index(path: str) -> Optional[BM25Index]:
+    """
+    Retourne l'index courant pour `path` (None s'il n'a jamais été construit).
+    L'instance est mise en cache par processus et rechargée dès que CURRENT change,
+    ce qui propage une reconstruction à tous les workers.
+    """
+    return _cache.load(path)
+
+
+def open_bm25_index(path: str) -> ContextManager[Optional[BM25Index]]:
+    """
+    Comme load_bm25_index, mais l'instance reste ouverte jusqu'à la sortie du bloc `with`,
+    même si une reconstruction la remplace entre-temps.
+    """
+    return _cache.acquire(path)
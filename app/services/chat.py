@@ -1,60 +1,255 @@
 # app/services/chat.py
 
-from app.services.rag_pipeline import initialize_rag_system
+from app.services.rag_pipeline import (
+    initialize_rag_system,
+    RETRIEVER_DIVERSITY_CONFIG_ID,
+    RETRIEVER_FILTERS_CONFIG_ID
+)
+from app.services.blocking import mlops_pool, run_blocking
 from app.utils.logger import AppLogger
+from app.config import settings
 from app.mlops.evaluation import evaluate_rag
 from app.mlops import tracking
 import mlflow
 from datetime import datetime
 import json
+import threading
 import time
+from typing import AsyncIterator, Dict, List, Optional
 
 from app.metrics import (
     RAG_REQUEST_TOTAL, 
     RAG_PROCESSING_TIME, 
     RAG_METRIC_FAITHFULNESS, 
     RAG_METRIC_ANSWER_RELEVANCE,
-    RAG_DOCS_RETRIEVED
+    RAG_DOCS_RETRIEVED,
+    RAG_TIME_TO_FIRST_TOKEN,
+    RAG_TOKENS_PER_SECOND
 )
 
 logger = AppLogger.get_logger(__name__)
 
 _qa_chain = None
+_qa_chain_lock = threading.Lock()
 
 def get_qa_chain(force_recreate_db=False, use_hybrid=True, top_k=5, alpha=0.7):
     """
     Initialise ou récupère la chaîne RAG.
     """
     global _qa_chain
-    if _qa_chain is None or force_recreate_db:
-        logger.info("Initializing RAG chain...")
-        if use_hybrid:
-            _qa_chain = initialize_rag_system(
-                force_recreate_db=force_recreate_db,
-                retriever_top_k=top_k,
-                retriever_alpha=alpha
-            )
-        else:
-            _qa_chain = initialize_rag_system(force_recreate_db=force_recreate_db)
-    return _qa_chain
-
-async def ask_question(question: str, top_k: int = 5, alpha: float = 0.7):
+    with _qa_chain_lock:
+        if _qa_chain is None or force_recreate_db:
+            logger.info("Initializing RAG chain...")
+            if use_hybrid:
+                _qa_chain = initialize_rag_system(
+                    force_recreate_db=force_recreate_db,
+                    retriever_top_k=top_k,
+                    retriever_alpha=alpha
+                )
+            else:
+                _qa_chain = initialize_rag_system(force_recreate_db=force_recreate_db)
+        return _qa_chain
+
+async def aget_qa_chain(top_k=5, alpha=0.7):
+    """get_qa_chain pour les requêtes : la première initialisation (synchrone) a lieu dans le pool borné."""
+    if _qa_chain is not None:
+        return _qa_chain
+    return await run_blocking(get_qa_chain, force_recreate_db=False, use_hybrid=True, top_k=top_k, alpha=alpha)
+
+def _chain_config(filters: Optional[Dict] = None, diversity: Optional[str] = None) -> Optional[Dict]:
+    """Réglages du retriever pour cette requête (configurable_fields de la chaîne)."""
+    configurable = {}
+    if filters:
+        configurable[RETRIEVER_FILTERS_CONFIG_ID] = filters
+    if diversity:
+        configurable[RETRIEVER_DIVERSITY_CONFIG_ID] = diversity
+    return {"configurable": configurable} if configurable else None
+
+def _unique_sources(source_docs: List) -> List[str]:
+    return list(set([
+        doc.metadata.get("source", "unknown")
+        for doc in source_docs
+    ]))
+
+def log_query_run(question: str, answer: str, source_docs: List, sources: List[str], top_k: int, alpha: float,
+                  filters: Optional[Dict] = None, diversity: Optional[str] = None):
+    """
+    Évaluation (DeepEval) et journalisation MLflow d'une réponse : métriques, configuration
+    du retriever et artefacts (conversation, contexte, statistiques). Une erreur est seulement journalisée.
+    """
+    # MLOps: Évaluation et Logging
+    mlflow_logger = None
+    query_run = None
+
+    try:
+        # Création d'un run MLflow dédié à cette requête
+        mlflow_logger, query_run = tracking.create_query_run(
+            run_name_prefix=f"query_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+        )
+        run_id = query_run.info.run_id
+
+        logger.info(f"MLOps Run started. Run ID: {run_id}")
+
+        # Extraction des textes des chunks pour l'évaluation
+        chunk_texts = [doc.page_content for doc in source_docs]
+
+        # Évaluation avec DeepEval
+        metrics = evaluate_rag(
+            query=question,
+            response=answer,
+            context=chunk_texts
+        )
+
+        # Log des métriques
+        mlflow_logger.log_metrics(metrics)
+
+        # Prometheus Metrics Update
+        if "Faithfulness" in metrics:
+            val = metrics["Faithfulness"]
+            RAG_METRIC_FAITHFULNESS.labels(model="rag_v1").set(val)
+            logger.info(f"⚖️ Prometheus Metric: rag_metric_faithfulness set to {val}")
+        if "Answer Relevance" in metrics:
+            val = metrics["Answer Relevance"]
+            RAG_METRIC_ANSWER_RELEVANCE.labels(model="rag_v1").set(val)
+            logger.info(f"🎯 Prometheus Metric: rag_metric_answer_relevance set to {val}")
+
+        # Log des paramètres du retriever
+        mlflow_logger.log_rag_config({
+            "retriever_type": "hybrid",
+            "retriever_top_k": top_k,
+            "retriever_alpha": alpha,
+            "retriever_filters": json.dumps(filters, ensure_ascii=False) if filters else "none",
+            "retriever_diversity": diversity or settings.DIVERSITY_MODE,
+            "timestamp": datetime.now().isoformat()
+        })
+
+        # === ARTEFACT 1: Conversation complète ===
+        conversation_data = {
+            "query": question,
+            "response": answer,
+            "timestamp": datetime.now().isoformat(),
+            "retriever_config": {
+                "top_k": top_k,
+                "alpha": alpha
+            },
+            "metrics": metrics
+        }
+
+        mlflow_logger.log_text(
+            json.dumps(conversation_data, indent=2, ensure_ascii=False),
+            "conversation.json"
+        )
+
+        # Format texte lisible
+        conversation_text = f"""================================================================
+            QUESTION: {question}
+            ================================================================
+            RÉPONSE: {answer}
+            ================================================================
+            TIMESTAMP: {datetime.now().isoformat()}
+            CONFIG: top_k={top_k}, alpha={alpha}
+            MÉTRIQUES: {json.dumps(metrics, indent=2)}
+            ================================================================
+            """
+        mlflow_logger.log_text(conversation_text, "conversation.txt")
+
+        # === ARTEFACT 2: Contexte complet (tous les chunks) ===
+        context_data = {
+            "query": question,
+            "retrieved_documents": []
+        }
+
+        for i, doc in enumerate(source_docs, 1):
+            doc_info = {
+                "rank": i,
+                "source": doc.metadata.get("source", "Unknown"),
+                "page": doc.metadata.get("page", "N/A"),
+                "chapter": doc.metadata.get("chapter", "N/A"),
+                "section": doc.metadata.get("section", "N/A"),
+                "content": doc.page_content,
+                "content_length": len(doc.page_content)
+            }
+            context_data["retrieved_documents"].append(doc_info)
+
+
+        # Sauvegarde en JSON pour exploitation future
+        mlflow_logger.log_text(
+            json.dumps(context_data, indent=2),
+            "retrieved_context.json"
+        )
+        logger.info(f"📋📋 retrieved_context.json : {context_data}")
+
+        # Version texte résumée pour consultation rapide
+        context_summary = f"CONTEXT POUR LA QUESTION: {question}\n"
+        context_summary += f"Nombre de documents récupérés: {len(source_docs)}\n"
+        context_summary += "=" * 50 + "\n\n"
+
+        for i, doc in enumerate(source_docs, 1):
+            source = doc.metadata.get("source", "Unknown")
+            page = doc.metadata.get("page", "N/A")
+            chapter = doc.metadata.get("chapter", "N/A")
+            section = doc.metadata.get("section", "N/A")
+            content_preview = doc.page_content[:500] + "..." if len(doc.page_content) > 500 else doc.page_content
+
+            context_summary += f"[Document {i}]\n"
+            context_summary += f"Source: {source} (Page {page})\n"
+            if chapter != "N/A":
+                context_summary += f"Chapitre: {chapter}\n"
+            if section != "N/A":
+                context_summary += f"Section: {section}\n"
+            context_summary += f"Contenu:\n{content_preview}\n"
+            context_summary += "-" * 30 + "\n\n"
+
+        mlflow_logger.log_text(context_summary, "context_summary.txt")
+        logger.info(f"📋📋 context_summary.txt : {context_summary}")
+
+        # === ARTEFACT 3: Statistiques de la requête ===
+        stats = {
+            "query_length": len(question),
+            "response_length": len(answer),
+            "num_docs_retrieved": len(source_docs),
+            "unique_sources": len(sources),
+            "avg_doc_length": sum(len(doc.page_content) for doc in source_docs) / len(source_docs) if source_docs else 0,
+            "retriever_top_k": top_k,
+            "retriever_alpha": alpha
+        }
+
+        mlflow_logger.log_text(
+            json.dumps(stats, indent=2),
+            "query_stats.json"
+        )
+        logger.info(f"📋📋 query_stats.json : {stats}")
+
+
+
+        logger.info(f"MLOps artifacts logged successfully for run {run_id}")
+
+    except Exception as e:
+        logger.warning(f"MLOps Evaluation failed: {e}")
+        import traceback
+        logger.warning(traceback.format_exc())
+    finally:
+        if mlflow_logger:
+            mlflow_logger.end_run()
+            logger.info("MLOps Run ended.")
+
+
+async def ask_question(question: str, top_k: int = 5, alpha: float = 0.7, filters: Optional[Dict] = None,
+                       diversity: Optional[str] = None):
     """
     Pose une question au système RAG et retourne la réponse avec les sources.
+    filters restreint la recherche (source, chapter, section, page_min, page_max).
+    diversity remplace DIVERSITY_MODE pour cette requête (none, shingle, mmr).
+    Rien ne bloque la boucle d'événements : plusieurs questions avancent en parallèle sur un même worker.
     """
     start_time = time.time()
     try:
         RAG_REQUEST_TOTAL.labels(status="success").inc()
         logger.info("📈 Prometheus Metric: rag_request_total(status='success') incremented")
-        chain = get_qa_chain(
-            force_recreate_db=False,
-            use_hybrid=True,
-            top_k=top_k,
-            alpha=alpha
-        )
+        chain = await aget_qa_chain(top_k=top_k, alpha=alpha)
         
-        # Exécution de la chaîne RAG
-        res = chain.invoke(question)
+        # Exécution de la chaîne RAG (recherche et génération en HTTP asynchrone)
+        res = await chain.ainvoke(question, config=_chain_config(filters, diversity))
         
         answer = res["answer"]
         source_docs = res["context"]
@@ -63,164 +258,12 @@ async def ask_question(question: str, top_k: int = 5, alpha: float = 0.7):
         logger.info(f"🔍 Prometheus Metric: rag_docs_retrieved_count observed value: {num_docs}")
         
         # Extraction des sources uniques
-        sources = list(set([
-            doc.metadata.get("source", "unknown") 
-            for doc in source_docs
-        ]))
-        
-        # MLOps: Évaluation et Logging
-        mlflow_logger = None
-        query_run = None
+        sources = _unique_sources(source_docs)
         
-        try:
-            # Création d'un run MLflow dédié à cette requête
-            mlflow_logger, query_run = tracking.create_query_run(
-                run_name_prefix=f"query_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
-            )
-            run_id = query_run.info.run_id
-            
-            logger.info(f"MLOps Run started. Run ID: {run_id}")
-            
-            # Extraction des textes des chunks pour l'évaluation
-            chunk_texts = [doc.page_content for doc in source_docs]
-            
-            # Évaluation avec DeepEval
-            metrics = evaluate_rag(
-                query=question,
-                response=answer,
-                context=chunk_texts
-            )
-            
-            # Log des métriques
-            mlflow_logger.log_metrics(metrics)
-            
-            # Prometheus Metrics Update
-            if "Faithfulness" in metrics:
-                val = metrics["Faithfulness"]
-                RAG_METRIC_FAITHFULNESS.labels(model="rag_v1").set(val)
-                logger.info(f"⚖️ Prometheus Metric: rag_metric_faithfulness set to {val}")
-            if "Answer Relevance" in metrics:
-                val = metrics["Answer Relevance"]
-                RAG_METRIC_ANSWER_RELEVANCE.labels(model="rag_v1").set(val)
-                logger.info(f"🎯 Prometheus Metric: rag_metric_answer_relevance set to {val}")
-            
-            # Log des paramètres du retriever
-            mlflow_logger.log_rag_config({
-                "retriever_type": "hybrid",
-                "retriever_top_k": top_k,
-                "retriever_alpha": alpha,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # === ARTEFACT 1: Conversation complète ===
-            conversation_data = {
-                "query": question,
-                "response": answer,
-                "timestamp": datetime.now().isoformat(),
-                "retriever_config": {
-                    "top_k": top_k,
-                    "alpha": alpha
-                },
-                "metrics": metrics
-            }
-            
-            mlflow_logger.log_text(
-                json.dumps(conversation_data, indent=2, ensure_ascii=False),
-                "conversation.json"
-            )
-            
-            # Format texte lisible
-            conversation_text = f"""================================================================
-                QUESTION: {question}
-                ================================================================
-                RÉPONSE: {answer}
-                ================================================================
-                TIMESTAMP: {datetime.now().isoformat()}
-                CONFIG: top_k={top_k}, alpha={alpha}
-                MÉTRIQUES: {json.dumps(metrics, indent=2)}
-                ================================================================
-                """
-            mlflow_logger.log_text(conversation_text, "conversation.txt")
-            
-            # === ARTEFACT 2: Contexte complet (tous les chunks) ===
-            context_data = {
-                "query": question,
-                "retrieved_documents": []
-            }
-            
-            for i, doc in enumerate(source_docs, 1):
-                doc_info = {
-                    "rank": i,
-                    "source": doc.metadata.get("source", "Unknown"),
-                    "page": doc.metadata.get("page", "N/A"),
-                    "chapter": doc.metadata.get("chapter", "N/A"),
-                    "section": doc.metadata.get("section", "N/A"),
-                    "content": doc.page_content,
-                    "content_length": len(doc.page_content)
-                }
-                context_data["retrieved_documents"].append(doc_info)
-                
-            
-            # Sauvegarde en JSON pour exploitation future
-            mlflow_logger.log_text(
-                json.dumps(context_data, indent=2),
-                "retrieved_context.json"
-            )
-            logger.info(f"📋📋 retrieved_context.json : {context_data}")
-            
-            # Version texte résumée pour consultation rapide
-            context_summary = f"CONTEXT POUR LA QUESTION: {question}\n"
-            context_summary += f"Nombre de documents récupérés: {len(source_docs)}\n"
-            context_summary += "=" * 50 + "\n\n"
-            
-            for i, doc in enumerate(source_docs, 1):
-                source = doc.metadata.get("source", "Unknown")
-                page = doc.metadata.get("page", "N/A")
-                chapter = doc.metadata.get("chapter", "N/A")
-                section = doc.metadata.get("section", "N/A")
-                content_preview = doc.page_content[:500] + "..." if len(doc.page_content) > 500 else doc.page_content
-                
-                context_summary += f"[Document {i}]\n"
-                context_summary += f"Source: {source} (Page {page})\n"
-                if chapter != "N/A":
-                    context_summary += f"Chapitre: {chapter}\n"
-                if section != "N/A":
-                    context_summary += f"Section: {section}\n"
-                context_summary += f"Contenu:\n{content_preview}\n"
-                context_summary += "-" * 30 + "\n\n"
-            
-            mlflow_logger.log_text(context_summary, "context_summary.txt")
-            logger.info(f"📋📋 context_summary.txt : {context_summary}")
-            
-            # === ARTEFACT 3: Statistiques de la requête ===
-            stats = {
-                "query_length": len(question),
-                "response_length": len(answer),
-                "num_docs_retrieved": len(source_docs),
-                "unique_sources": len(sources),
-                "avg_doc_length": sum(len(doc.page_content) for doc in source_docs) / len(source_docs) if source_docs else 0,
-                "retriever_top_k": top_k,
-                "retriever_alpha": alpha
-            }
-            
-            mlflow_logger.log_text(
-                json.dumps(stats, indent=2),
-                "query_stats.json"
-            )
-            logger.info(f"📋📋 query_stats.json : {stats}")
-            
-            
-            
-            logger.info(f"MLOps artifacts logged successfully for run {run_id}")
-                
-        except Exception as e:
-            logger.warning(f"MLOps Evaluation failed: {e}")
-            import traceback
-            logger.warning(traceback.format_exc())
-        finally:
-            if mlflow_logger:
-                mlflow_logger.end_run()
-                logger.info("MLOps Run ended.")
+        # Évaluation et MLflow en tâche de fond : la réponse n'attend pas le juge LLM
+        mlops_pool.submit(
+            log_query_run, question, answer, source_docs, sources, top_k, alpha, filters=filters, diversity=diversity
+        )
 
         return {
             "answer": answer,
@@ -239,4 +282,69 @@ async def ask_question(question: str, top_k: int = 5, alpha: float = 0.7):
         }
     finally:
         total_time = time.time() - start_time
-        RAG_PROCESSING_TIME.observe(total_time)
\ No newline at end of file
+        RAG_PROCESSING_TIME.observe(total_time)
+
+async def stream_question(question: str, top_k: int = 5, alpha: float = 0.7, filters: Optional[Dict] = None,
+                          diversity: Optional[str] = None) -> AsyncIterator[Dict]:
+    """
+    Version en flux de ask_question, sur chain.astream : événements {"event", "data"} dans l'ordre
+    "sources" (dès la fin de la recherche), "token" (un par fragment généré), puis "done" (réponse
+    complète, sources, temps jusqu'au premier token, débit) ou "error".
+    L'évaluation et la journalisation MLflow ont lieu après "done", hors de la boucle d'événements.
+    """
+    start_time = time.perf_counter()
+    first_token_at = None
+    answer_parts: List[str] = []
+    source_docs: List = []
+    sources: List[str] = []
+    try:
+        chain = await aget_qa_chain(top_k=top_k, alpha=alpha)
+        async for chunk in chain.astream(question, config=_chain_config(filters, diversity)):
+            if "context" in chunk:
+                source_docs = chunk["context"]
+                sources = _unique_sources(source_docs)
+                RAG_DOCS_RETRIEVED.observe(len(source_docs))
+                yield {"event": "sources", "data": {
+                    "sources": sources,
+                    "num_chunks": len(source_docs),
+                    "retrieval_seconds": time.perf_counter() - start_time
+                }}
+            token = chunk.get("answer")
+            if token:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    RAG_TIME_TO_FIRST_TOKEN.observe(first_token_at - start_time)
+                answer_parts.append(token)
+                yield {"event": "token", "data": {"text": token}}
+    except Exception as e:
+        RAG_REQUEST_TOTAL.labels(status="error").inc()
+        RAG_PROCESSING_TIME.observe(time.perf_counter() - start_time)
+        logger.error(f"Error in stream_question: {e}")
+        yield {"event": "error", "data": {
+            "message": f"Une erreur est survenue lors du traitement de votre demande : {e}"
+        }}
+        return
+
+    end_time = time.perf_counter()
+    RAG_REQUEST_TOTAL.labels(status="success").inc()
+    RAG_PROCESSING_TIME.observe(end_time - start_time)
+    # Débit de décodage : tokens suivant le premier, rapportés au temps écoulé depuis celui-ci
+    tokens_per_second = None
+    if first_token_at is not None and len(answer_parts) > 1 and end_time > first_token_at:
+        tokens_per_second = (len(answer_parts) - 1) / (end_time - first_token_at)
+        RAG_TOKENS_PER_SECOND.observe(tokens_per_second)
+
+    answer = "".join(answer_parts)
+    yield {"event": "done", "data": {
+        "answer": answer,
+        "sources": sources,
+        "num_chunks": len(source_docs),
+        "tokens": len(answer_parts),
+        "time_to_first_token": first_token_at - start_time if first_token_at is not None else None,
+        "tokens_per_second": tokens_per_second,
+        "total_seconds": end_time - start_time
+    }}
+
+    mlops_pool.submit(
+        log_query_run, question, answer, source_docs, sources, top_k, alpha, filters=filters, diversity=diversity
+    )
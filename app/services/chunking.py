@@ -1,11 +1,20 @@
 
 # chunking.py
+import hashlib
+import os
 import re
-from typing import List, Dict, Optional
+import uuid
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 try:
     from langchain_core.documents import Document
 except ImportError:
     from langchain.schema import Document
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+from app.config import settings
 from app.utils.logger import AppLogger
 
 
@@ -15,62 +24,192 @@ from app.utils.logger import AppLogger
 DEFAULT_CHUNK_SIZE = 500
 DEFAULT_CHUNK_OVERLAP = 80
 
+# Motifs compilés une fois : titres de niveau 2/3 (découpage), chapitre (#) et section (##, ###)
+_SECTION_SPLIT = re.compile(r"(?=^## |\n## |\n### )", re.MULTILINE)
+_CHAPTER = re.compile(r"^#\s+(.+)", re.MULTILINE)
+_SECTION = re.compile(r"^(##+)\s+(.+)", re.MULTILINE)
+
 logger = AppLogger.get_logger(__name__)
 
+def compute_chunk_id(source: str, page, content: str) -> str:
+    """
+    Identifiant déterministe d'un chunk (hash du contenu + source + page), au format UUID
+    pour servir directement d'ID de point Qdrant : ré-ingérer le même chunk écrase le point existant.
+    """
+    digest = hashlib.sha256(f"{source}|{page}|{content}".encode("utf-8")).hexdigest()
+    return str(uuid.UUID(digest[:32]))
+
 def estimate_tokens(text: str) -> int:
     return len(text.split())
 
-def split_by_paragraph(text: str, max_tokens: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_CHUNK_OVERLAP) -> List[str]:
-    paragraphs = text.split("\n\n")
+# Nombre de tokens de chaque texte d'un lot
+TokenCounter = Callable[[List[str]], List[int]]
+
+def count_words(texts: List[str]) -> List[int]:
+    return [len(text.split()) for text in texts]
+
+@lru_cache()
+def get_token_counter(tokenizer_name: Optional[str] = None) -> TokenCounter:
+    """
+    Compteur de tokens du mode "budget" : tokenizer Hugging Face (nom du hub ou chemin d'un
+    tokenizer.json) pour des budgets exacts, ou mots séparés par des blancs à défaut.
+    """
+    if not tokenizer_name:
+        return count_words
+    if Tokenizer is None:
+        logger.warning(f"tokenizers is not installed, counting words instead of {tokenizer_name} tokens")
+        return count_words
+    try:
+        if os.path.isfile(tokenizer_name):
+            tokenizer = Tokenizer.from_file(tokenizer_name)
+        else:
+            tokenizer = Tokenizer.from_pretrained(tokenizer_name)
+    except Exception as e:
+        logger.error(f"Failed to load tokenizer {tokenizer_name}, counting words instead: {e}")
+        return count_words
+
+    def count_tokens(texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        return [len(encoding.ids) for encoding in tokenizer.encode_batch(texts, add_special_tokens=False)]
+
+    return count_tokens
+
+def _split_by_paragraph_compat(text: str, max_tokens: int, overlap: int) -> List[str]:
+    """
+    Même résultat que l'algorithme historique, en temps linéaire. Celui-ci recomptait
+    `estimate_tokens(current + p)` à chaque paragraphe ; on tient ici le compte à jour, y compris
+    ses particularités : la concaténation sans séparateur fusionne le dernier mot du tampon et le
+    premier du paragraphe, overlap=0 reprend tout le chunk précédent (words[-0:]) et un paragraphe
+    trop long sur tampon vide garde le préfixe "\n\n".
+    """
     chunks = []
-    current = ""
+    parts: List[str] = []   # current = "".join(parts)
+    nonempty = False        # bool(current)
+    count = 0               # estimate_tokens(current)
+    open_end = False        # current se termine par un caractère non blanc
 
-    for p in paragraphs:
-        if estimate_tokens(current + p) <= max_tokens:
-            current += "\n\n" + p if current else p
+    for p in text.split("\n\n"):
+        p_count = len(p.split())
+        merged = open_end and bool(p) and not p[0].isspace()
+        if count + p_count - merged <= max_tokens:
+            if nonempty:
+                parts += ["\n\n", p]
+                count += p_count
+            else:
+                parts = [p]
+                count = p_count
+                nonempty = bool(p)
         else:
+            current = "".join(parts)
             if current:
                 chunks.append(current.strip())
-            
+
             words = current.split()
-            tail = " ".join(words[-overlap:]) if overlap < len(words) else current
-            current = tail + "\n\n" + p
+            if overlap < len(words):
+                tail_words = words[-overlap:]
+                tail = " ".join(tail_words)
+                count = len(tail_words) + p_count
+            else:
+                tail = current
+                count = len(words) + p_count
+            parts = [tail, "\n\n", p]
+            nonempty = True
+        open_end = bool(p) and not p[-1].isspace()
 
+    current = "".join(parts)
     if current.strip():
         chunks.append(current.strip())
 
     return chunks
 
+def _overlap_tail(chunk: str, overlap: int, count_tokens: TokenCounter) -> str:
+    """Derniers mots du chunk tenant dans `overlap` tokens."""
+    if overlap <= 0:
+        return ""
+    # Un mot compte au moins un token : inutile d'examiner plus de `overlap` mots
+    words = chunk.split()[-overlap:]
+    total = 0
+    start = len(words)
+    for n in reversed(count_tokens(words)):
+        if total + n > overlap:
+            break
+        total += n
+        start -= 1
+    return " ".join(words[start:])
+
+def _split_by_paragraph_budget(text: str, max_tokens: int, overlap: int, count_tokens: TokenCounter) -> List[str]:
+    """Découpage par paragraphes avec un budget de tokens exact (un seul comptage par paragraphe)."""
+    paragraphs = [p for p in text.split("\n\n") if p.strip()]
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for p, p_tokens in zip(paragraphs, count_tokens(paragraphs)):
+        if current and current_tokens + p_tokens > max_tokens:
+            chunk = "\n\n".join(current).strip()
+            chunks.append(chunk)
+            tail = _overlap_tail(chunk, overlap, count_tokens)
+            current = [tail] if tail else []
+            current_tokens = count_tokens([tail])[0] if tail else 0
+        current.append(p)
+        current_tokens += p_tokens
+
+    if current:
+        chunks.append("\n\n".join(current).strip())
+    return chunks
+
+def split_by_paragraph(text: str, max_tokens: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_CHUNK_OVERLAP,
+                       mode: Optional[str] = None) -> List[str]:
+    """
+    Regroupe les paragraphes en chunks d'au plus `max_tokens` avec `overlap` tokens de recouvrement.
+    mode (CHUNKING_MODE par défaut) : "compat" reproduit exactement l'ancien découpage (chunk_id stables),
+    "budget" compte les tokens sans ses particularités, avec CHUNK_TOKENIZER s'il est configuré.
+    """
+    mode = mode or settings.CHUNKING_MODE
+    if mode == "compat":
+        return _split_by_paragraph_compat(text, max_tokens, overlap)
+    if mode == "budget":
+        return _split_by_paragraph_budget(text, max_tokens, overlap, get_token_counter(settings.CHUNK_TOKENIZER))
+    raise ValueError(f"Unknown CHUNKING_MODE: {mode}")
+
 def chunk_markdown_document(
     text: str,
     source: str,
     page: int = 1,
-    max_tokens: int = DEFAULT_CHUNK_SIZE
+    max_tokens: int = DEFAULT_CHUNK_SIZE,
+    mode: Optional[str] = None
 ) -> List[Dict]:
     """
     Split a markdown text based on headers (## or ###) and then by paragraphs if needed.
     """
-    sections = re.split(r"(?=^## |\n## |\n### )", text, flags=re.MULTILINE)
+    mode = mode or settings.CHUNKING_MODE
+    sections = _SECTION_SPLIT.split(text)
+    if mode == "budget":
+        count_tokens = get_token_counter(settings.CHUNK_TOKENIZER)
+        section_tokens = count_tokens([sec.strip() for sec in sections])
+    else:
+        section_tokens = [None] * len(sections)
 
     chunks = []
     current_chapter = None
     current_section = None
 
-    for sec in sections:
+    for sec, tokens in zip(sections, section_tokens):
         sec = sec.strip()
         if not sec:
             continue
 
-        chap_match = re.search(r"^#\s+(.+)", sec, re.MULTILINE)
+        chap_match = _CHAPTER.search(sec)
         if chap_match:
             current_chapter = chap_match.group(1).strip()
         
-        sec_match = re.search(r"^(##+)\s+(.+)", sec, re.MULTILINE)
+        sec_match = _SECTION.search(sec)
         if sec_match:
             current_section = sec_match.group(2).strip()
 
-        if estimate_tokens(sec) > max_tokens:
-            sub_chunks = split_by_paragraph(sec, max_tokens=max_tokens)
+        if (estimate_tokens(sec) if tokens is None else tokens) > max_tokens:
+            sub_chunks = split_by_paragraph(sec, max_tokens=max_tokens, mode=mode)
         else:
             sub_chunks = [sec]
 
@@ -88,6 +227,39 @@ def chunk_markdown_document(
 
     return chunks
 
+def split_document(doc: Document) -> List[Document]:
+    """Découpe une page en chunks (métadonnées de la page + chapitre/section + chunk_id)."""
+    source = doc.metadata.get("source", "unknown")
+    page = doc.metadata.get("page", 1)
+
+    chunk_dicts = chunk_markdown_document(
+        text=doc.page_content,
+        source=source,
+        page=page,
+        max_tokens=DEFAULT_CHUNK_SIZE
+    )
+
+    chunks = []
+    for chunk_data in chunk_dicts:
+        combined_metadata = doc.metadata.copy()
+        combined_metadata.update(chunk_data["metadata"])
+        combined_metadata["chunk_id"] = compute_chunk_id(source, page, chunk_data["content"])
+
+        chunks.append(Document(
+            page_content=chunk_data["content"],
+            metadata=combined_metadata
+        ))
+    return chunks
+
+def iter_split_documents(documents: Iterable[Document]) -> Iterator[Document]:
+    """Version en flux de split_documents : une page est découpée dès qu'elle est lue."""
+    for doc in documents:
+        try:
+            yield from split_document(doc)
+        except Exception as e:
+            logger.exception("❌ Error during document chunking")
+            raise RuntimeError("Chunking failed") from e
+
 def split_documents(documents: List[Document]) -> List[Document]:
     if not documents:
         logger.warning("No documents provided for chunking.")
@@ -95,33 +267,7 @@ def split_documents(documents: List[Document]) -> List[Document]:
 
     logger.info(f"Splitting {len(documents)} documents into chunks (hierarchical)...")
 
-    all_chunks = []
-
-    try:
-        for doc in documents:
-            source = doc.metadata.get("source", "unknown")
-            page = doc.metadata.get("page", 1)
-
-            chunk_dicts = chunk_markdown_document(
-                text=doc.page_content,
-                source=source,
-                page=page,
-                max_tokens=DEFAULT_CHUNK_SIZE
-            )
-
-            for chunk_data in chunk_dicts:
-                combined_metadata = doc.metadata.copy()
-                combined_metadata.update(chunk_data["metadata"])
-
-                new_doc = Document(
-                    page_content=chunk_data["content"],
-                    metadata=combined_metadata
-                )
-                all_chunks.append(new_doc)
-
-        logger.info(f"Chunking completed: {len(all_chunks)} chunks created.")
-        return all_chunks
+    all_chunks = list(iter_split_documents(documents))
 
-    except Exception as e:
-        logger.exception("❌ Error during document chunking")
-        raise RuntimeError("Chunking failed") from e
+    logger.info(f"Chunking completed: {len(all_chunks)} chunks created.")
+    return all_chunks
@@ -0,0 +1,180 @@
+# collection_versions.py
+
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from qdrant_client.http import models
+
+from app.config import settings
+from app.services.index_storage import read_current_version, switch_current
+from app.services.qdrant_manager import get_qdrant_client, with_reconnect
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+VERSION_SEPARATOR = "_v"
+
+# Dernière résolution de l'alias : nom de l'alias -> (instant monotone, collection)
+_resolved: Dict[str, Tuple[float, str]] = {}
+_resolved_lock = threading.Lock()
+
+
+def get_alias() -> str:
+    """Nom servi aux recherches : un alias Qdrant vers la version active de la collection."""
+    return settings.QDRANT_COLLECTION_NAME
+
+
+def _pointer_path() -> str:
+    # Copie locale de l'alias (pointeur CURRENT), secours quand Qdrant ne répond pas
+    return os.path.join(settings.INDEX_STORAGE_PATH, "collections", get_alias())
+
+
+def new_collection_version() -> str:
+    return f"{get_alias()}{VERSION_SEPARATOR}{time.time_ns()}"
+
+
+def _version_number(name: str) -> Optional[int]:
+    prefix = f"{get_alias()}{VERSION_SEPARATOR}"
+    suffix = name[len(prefix):]
+    return int(suffix) if name.startswith(prefix) and suffix.isdigit() else None
+
+
+def get_keyword_index_path(version: Optional[str] = None) -> str:
+    """Répertoire de l'index BM25 d'une version de la collection (par défaut la version active)"""
+    return os.path.join(settings.INDEX_STORAGE_PATH, "bm25", version or get_active_collection())
+
+
+def get_manifest_path(version: Optional[str] = None) -> str:
+    """Manifeste d'ingestion d'une version de la collection (par défaut la version active)"""
+    return os.path.join(settings.INDEX_STORAGE_PATH, "manifests", f"{version or get_active_collection()}.json")
+
+
+@with_reconnect
+def list_collection_versions() -> List[str]:
+    """Versions existantes de la collection, de la plus ancienne à la plus récente."""
+    names = [c.name for c in get_qdrant_client().get_collections().collections]
+    return sorted((name for name in names if _version_number(name) is not None), key=_version_number)
+
+
+@with_reconnect
+def resolve_alias() -> Optional[str]:
+    """Collection vers laquelle pointe l'alias dans Qdrant (None s'il n'existe pas)."""
+    for alias in get_qdrant_client().get_aliases().aliases:
+        if alias.alias_name == get_alias():
+            return alias.collection_name
+    return None
+
+
+def get_active_collection(refresh: bool = False) -> str:
+    """
+    Collection physique servie par l'alias. L'alias Qdrant fait foi : une autre réplique (ou un
+    administrateur) peut le basculer. Il est relu au plus toutes les QDRANT_ALIAS_CACHE_SECONDS,
+    refresh=True force la relecture (ingestion, avant d'écrire). Le pointeur local CURRENT n'en est
+    qu'une copie, lue seulement si Qdrant est injoignable.
+    Sans alias (index local, installation antérieure aux versions), c'est la collection qui porte
+    directement le nom configuré.
+    """
+    alias = get_alias()
+    if settings.VECTOR_BACKEND == "local":
+        return alias
+
+    with _resolved_lock:
+        cached = _resolved.get(alias)
+    if not refresh and cached is not None and time.monotonic() - cached[0] < settings.QDRANT_ALIAS_CACHE_SECONDS:
+        return cached[1]
+
+    try:
+        version = resolve_alias()
+    except Exception as e:
+        fallback = read_current_version(_pointer_path()) or alias
+        logger.warning(f"Could not resolve Qdrant alias '{alias}', using '{fallback}': {e}")
+        return fallback
+    _remember_active(version or alias)
+    return version or alias
+
+
+def _remember_active(version: str):
+    with _resolved_lock:
+        _resolved[get_alias()] = (time.monotonic(), version)
+    if version != get_alias() and read_current_version(_pointer_path()) != version:
+        os.makedirs(_pointer_path(), exist_ok=True)
+        switch_current(_pointer_path(), version)
+
+
+def reset_active_collection_cache():
+    with _resolved_lock:
+        _resolved.clear()
+
+
+@with_reconnect
+def activate_collection_version(version: str):
+    """
+    Bascule l'alias sur `version` en une seule opération atomique côté Qdrant : les recherches
+    passent de l'ancienne collection complète à la nouvelle sans état intermédiaire.
+    Les versions au-delà de QDRANT_KEPT_VERSIONS sont ensuite supprimées.
+
+    Seule exception, la migration d'une installation antérieure aux versions : sa collection porte
+    le nom de l'alias et doit être supprimée avant que l'alias soit créé, en deux appels distincts.
+    Les recherches échouent entre les deux (une seule fois ; init_qdrant_collection crée directement
+    une version derrière l'alias sur une installation neuve).
+    """
+    client = get_qdrant_client()
+    alias = get_alias()
+    operations = []
+    if resolve_alias() is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+    elif client.collection_exists(alias):
+        # Collection antérieure aux versions : elle porte le nom de l'alias et doit disparaître avant sa création
+        logger.warning(f"Replacing unversioned collection '{alias}' by alias -> '{version}'")
+        client.delete_collection(alias)
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=version, alias_name=alias)
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+    _remember_active(version)
+    logger.info(f"Alias '{alias}' now points to '{version}'")
+    prune_collection_versions(version)
+
+
+def drop_collection_version(version: str):
+    """Supprime une version : collection Qdrant, index BM25 et manifeste associés."""
+    try:
+        get_qdrant_client().delete_collection(version)
+    except Exception as e:
+        logger.warning(f"Could not delete collection '{version}': {e}")
+    shutil.rmtree(get_keyword_index_path(version), ignore_errors=True)
+    if os.path.exists(get_manifest_path(version)):
+        os.remove(get_manifest_path(version))
+    logger.info(f"Collection version '{version}' dropped")
+
+
+def prune_collection_versions(active: str):
+    """Garde la version active et les plus récentes des autres (retour arrière), dans la limite de QDRANT_KEPT_VERSIONS."""
+    others = [version for version in list_collection_versions() if version != active]
+    for version in others[:max(0, len(others) - (settings.QDRANT_KEPT_VERSIONS - 1))]:
+        drop_collection_version(version)
+
+
+def rollback_collection_version() -> str:
+    """Repasse l'alias sur la version précédant la version active ; ValueError s'il n'y en a pas."""
+    active = resolve_alias()
+    versions = list_collection_versions()
+    if active is None or _version_number(active) is None:
+        raise ValueError(f"Alias '{get_alias()}' does not point to a versioned collection")
+    previous = [version for version in versions if _version_number(version) < _version_number(active)]
+    if not previous:
+        raise ValueError("No previous collection version to roll back to")
+    activate_collection_version(previous[-1])
+    return previous[-1]
+
+
+def describe_collection_versions() -> Dict:
+    return {
+        "alias": get_alias(),
+        "active": get_active_collection(),
+        "versions": list_collection_versions(),
+    }
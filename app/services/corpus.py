@@ -0,0 +1,171 @@
+# corpus.py
+
+import base64
+import bisect
+import hashlib
+import itertools
+import json
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+from app.services.chunking import iter_split_documents
+from app.services.pdf_loader import DATA_PATH, file_sha256, list_pdf_files, load_pdf_files
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+CORPUS_KINDS = ("pages", "chunks")
+
+
+class InvalidCursor(ValueError):
+    """Curseur illisible."""
+
+
+class StaleCursor(ValueError):
+    """Le corpus a changé depuis la délivrance du curseur : la pagination doit reprendre du début."""
+
+
+def encode_cursor(version: str, offset: int) -> str:
+    payload = json.dumps({"v": version, "o": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, version: str) -> int:
+    """Position encodée dans le curseur, valable uniquement pour la même version du corpus."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        cursor_version, offset = payload["v"], int(payload["o"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+    if cursor_version != version:
+        raise StaleCursor("Corpus changed since this cursor was issued")
+    if offset < 0:
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+    return offset
+
+
+class CorpusFile:
+    """Pages et chunks d'un PDF, avec l'état du fichier (taille, mtime, hash) qui les a produits."""
+
+    def __init__(self, path: str, size: int, mtime: float, sha256: str,
+                 pages: List[Document], chunks: List[Document]):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.sha256 = sha256
+        self.pages = pages
+        self.chunks = chunks
+
+
+class CorpusSnapshot:
+    """Vue figée du corpus : accès à une tranche de pages ou de chunks en O(log fichiers + taille de page)."""
+
+    def __init__(self, files: List[CorpusFile]):
+        self.files = files
+        digest = hashlib.sha256()
+        for corpus_file in files:
+            digest.update(f"{corpus_file.path}\0{corpus_file.sha256}\0".encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+        self._offsets = {
+            kind: [0, *itertools.accumulate(len(getattr(f, kind)) for f in files)]
+            for kind in CORPUS_KINDS
+        }
+
+    def total(self, kind: str) -> int:
+        return self._offsets[kind][-1]
+
+    def iter_from(self, kind: str, offset: int) -> Iterator[Document]:
+        """Documents (pages ou chunks) à partir de la position `offset`, dans l'ordre des fichiers."""
+        offsets = self._offsets[kind]
+        # Premier fichier contenant la position, puis les suivants depuis leur début
+        file_idx = min(bisect.bisect_right(offsets, offset) - 1, len(self.files))
+        for idx in range(file_idx, len(self.files)):
+            start = offset - offsets[idx] if idx == file_idx else 0
+            yield from itertools.islice(getattr(self.files[idx], kind), start, None)
+
+    def page(self, kind: str, offset: int, limit: Optional[int]) -> Tuple[List[Document], Optional[int]]:
+        """Tranche [offset, offset + limit) et position suivante (None en fin de corpus)."""
+        stop = self.total(kind) if limit is None else min(self.total(kind), offset + limit)
+        items = list(itertools.islice(self.iter_from(kind, offset), max(0, stop - offset)))
+        return items, (stop if stop < self.total(kind) else None)
+
+
+class CorpusCache:
+    """
+    Corpus PDF analysé et découpé, gardé en mémoire entre les requêtes.
+
+    À chaque accès, seuls les fichiers sont examinés (stat) : un fichier n'est relu que si sa
+    taille ou son mtime a changé et que son hash SHA-256 diffère. Un fichier ajouté, modifié ou
+    supprimé produit une nouvelle version du corpus (les curseurs émis avant deviennent périmés).
+    """
+
+    def __init__(self, data_path: str = DATA_PATH):
+        self.data_path = data_path
+        self._files: Dict[str, CorpusFile] = {}
+        self._snapshot: Optional[CorpusSnapshot] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> CorpusSnapshot:
+        with self._lock:
+            paths = list_pdf_files(self.data_path)
+            stats = {path: os.stat(path) for path in paths}
+
+            changed = []
+            for path, stat in stats.items():
+                entry = self._files.get(path)
+                if entry is not None and entry.size == stat.st_size:
+                    if entry.mtime == stat.st_mtime:
+                        continue
+                    if entry.sha256 == file_sha256(path):
+                        entry.mtime = stat.st_mtime
+                        continue
+                changed.append(path)
+
+            removed = set(self._files) - set(paths)
+            for path in removed:
+                del self._files[path]
+            if changed:
+                self._parse(changed, stats)
+
+            if changed or removed or self._snapshot is None:
+                self._snapshot = CorpusSnapshot([self._files[path] for path in paths if path in self._files])
+                logger.info(
+                    f"Corpus refreshed ({len(changed)} parsed, {len(removed)} removed): "
+                    f"{self._snapshot.total('pages')} pages, {self._snapshot.total('chunks')} chunks"
+                )
+            return self._snapshot
+
+    def _parse(self, paths: List[str], stats: Dict[str, os.stat_result]):
+        pages_by_file: Dict[str, List[Document]] = {path: [] for path in paths}
+        for page in load_pdf_files(paths):
+            pages_by_file.setdefault(page.metadata["source"], []).append(page)
+
+        for path in paths:
+            pages = pages_by_file[path]
+            self._files[path] = CorpusFile(
+                path,
+                stats[path].st_size,
+                stats[path].st_mtime,
+                file_sha256(path),
+                pages,
+                list(iter_split_documents(pages)),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self._snapshot = None
+
+
+_corpus = CorpusCache()
+
+
+def get_corpus() -> CorpusSnapshot:
+    """Version courante du corpus de DATA_PATH (analysée une fois, puis mise à jour fichier par fichier)."""
+    return _corpus.snapshot()
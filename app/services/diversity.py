@@ -0,0 +1,91 @@
+# diversity.py
+
+import re
+from typing import List, Optional, Set
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+from app.config import settings
+from app.metrics import RAG_DIVERSITY_DROPPED, RAG_DIVERSITY_TOKENS_SAVED
+from app.services.chunking import estimate_tokens
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+DIVERSITY_MODES = ("none", "shingle", "mmr")
+
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 4) -> Set[int]:
+    """Empreintes des n-grammes de mots du texte (casse ignorée)."""
+    words = _WORD.findall(text.casefold())
+    if len(words) < size:
+        return {hash(tuple(words))} if words else set()
+    return {hash(tuple(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def diversify(documents: List[Document], top_k: int, mode: Optional[str] = None,
+              threshold: Optional[float] = None, mmr_lambda: Optional[float] = None) -> List[Document]:
+    """
+    Supprime les quasi-doublons du contexte (recouvrement entre chunks, en-têtes et pieds de page répétés).
+
+    - "shingle" : parcours dans l'ordre du classement, un document est écarté si sa similarité de Jaccard
+      (shingles de mots) avec un document déjà retenu dépasse `threshold`. Pas de remplacement :
+      le contexte envoyé au LLM raccourcit.
+    - "mmr" : maximal marginal relevance sur les candidats, pertinence = rang d'origine,
+      redondance = Jaccard avec les documents déjà retenus ; les quasi-doublons restent écartés.
+
+    La similarité est calculée sur le texte déjà récupéré : aucun vecteur supplémentaire n'est lu.
+    """
+    mode = mode or settings.DIVERSITY_MODE
+    if mode not in DIVERSITY_MODES:
+        raise ValueError(f"Unknown diversity mode: {mode}")
+    if mode == "none" or len(documents) <= 1:
+        return documents[:top_k]
+
+    threshold = settings.DIVERSITY_THRESHOLD if threshold is None else threshold
+    mmr_lambda = settings.DIVERSITY_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+
+    fingerprints = [shingles(doc.page_content) for doc in documents]
+    selected: List[int] = []
+    # Redondance maximale de chaque candidat avec la sélection courante
+    redundancy = [0.0] * len(documents)
+    # La suppression simple ne considère que les top_k : les documents écartés ne sont pas remplacés
+    remaining = list(range(len(documents) if mode == "mmr" else min(top_k, len(documents))))
+
+    while remaining and len(selected) < top_k:
+        remaining = [i for i in remaining if redundancy[i] < threshold]
+        if not remaining:
+            break
+        if mode == "shingle":
+            best = remaining[0]
+        else:
+            best = max(
+                remaining,
+                key=lambda i: mmr_lambda * (1 - i / len(documents)) - (1 - mmr_lambda) * redundancy[i]
+            )
+        selected.append(best)
+        remaining.remove(best)
+        for i in remaining:
+            redundancy[i] = max(redundancy[i], jaccard(fingerprints[best], fingerprints[i]))
+
+    result = [documents[i] for i in selected]
+
+    baseline_tokens = sum(estimate_tokens(doc.page_content) for doc in documents[:top_k])
+    tokens_saved = max(0, baseline_tokens - sum(estimate_tokens(doc.page_content) for doc in result))
+    dropped = sum(1 for i in range(min(top_k, len(documents))) if i not in selected)
+    RAG_DIVERSITY_TOKENS_SAVED.observe(tokens_saved)
+    if dropped:
+        RAG_DIVERSITY_DROPPED.inc(dropped)
+        logger.info(f"Diversity ({mode}) dropped {dropped} near-duplicate chunks, ~{tokens_saved} tokens saved")
+    return result
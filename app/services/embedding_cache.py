@@ -0,0 +1,150 @@
+# embedding_cache.py
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.metrics import EMBEDDING_CACHE_BYTES, EMBEDDING_CACHE_HITS, EMBEDDING_CACHE_MISSES
+from app.services.embeddings import get_embedding_function
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+CacheKey = Tuple[str, str]
+
+
+def normalize_query(query: str) -> str:
+    """Normalise une question (casse, espaces) pour que les reformulations triviales partagent l'entrée."""
+    return _WHITESPACE.sub(" ", query).strip().casefold()
+
+
+class QueryEmbeddingCache:
+    """
+    Cache LRU borné des embeddings de requêtes.
+
+    Les vecteurs sont stockés en float32 (numpy) ; l'éviction se fait par ancienneté d'usage
+    dès que le nombre d'entrées ou l'empreinte mémoire dépasse sa limite, et chaque entrée
+    expire après `ttl_seconds`.
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 3600, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry_size(key: CacheKey, vector: np.ndarray) -> int:
+        return vector.nbytes + len(key[0]) + len(key[1])
+
+    def get(self, key: CacheKey) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            vector, expires_at = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return vector
+
+    def put(self, key: CacheKey, embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (vector, time.monotonic() + self.ttl_seconds)
+            self._bytes += self._entry_size(key, vector)
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+            EMBEDDING_CACHE_BYTES.set(self._bytes)
+        return vector
+
+    def _remove(self, key: CacheKey):
+        vector, _ = self._entries.pop(key)
+        self._bytes -= self._entry_size(key, vector)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            EMBEDDING_CACHE_BYTES.set(0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+query_embedding_cache = QueryEmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+    max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES
+)
+
+
+def _cache_key(query: str, embeddings) -> CacheKey:
+    return getattr(embeddings, "model", type(embeddings).__name__), normalize_query(query)
+
+
+def embed_query_cached(query: str) -> List[float]:
+    """Embedding de la requête, servi depuis le cache quand la même question a déjà été posée."""
+    embeddings = get_embedding_function()
+    key = _cache_key(query, embeddings)
+
+    vector = query_embedding_cache.get(key)
+    if vector is not None:
+        EMBEDDING_CACHE_HITS.inc()
+        return vector.tolist()
+
+    EMBEDDING_CACHE_MISSES.inc()
+    return query_embedding_cache.put(key, embeddings.embed_query(query)).tolist()
+
+
+async def aembed_query_cached(query: str) -> List[float]:
+    """Version asynchrone de embed_query_cached."""
+    embeddings = get_embedding_function()
+    key = _cache_key(query, embeddings)
+
+    vector = query_embedding_cache.get(key)
+    if vector is not None:
+        EMBEDDING_CACHE_HITS.inc()
+        return vector.tolist()
+
+    EMBEDDING_CACHE_MISSES.inc()
+    return query_embedding_cache.put(key, await embeddings.aembed_query(query)).tolist()
+
+
+def embed_queries_cached(queries: List[str]) -> np.ndarray:
+    """
+    Embeddings d'un lot de requêtes (matrice float32, une ligne par requête) : les requêtes absentes
+    du cache sont calculées en un seul appel embed_documents.
+    """
+    embeddings = get_embedding_function()
+    keys = [_cache_key(query, embeddings) for query in queries]
+    vectors = [query_embedding_cache.get(key) for key in keys]
+
+    missing = {}
+    for query, key, vector in zip(queries, keys, vectors):
+        if vector is None:
+            missing.setdefault(key, query)
+    EMBEDDING_CACHE_HITS.inc(sum(vector is not None for vector in vectors))
+    EMBEDDING_CACHE_MISSES.inc(len(queries) - sum(vector is not None for vector in vectors))
+
+    if missing:
+        computed = embeddings.embed_documents(list(missing.values()))
+        stored = {key: query_embedding_cache.put(key, vector) for key, vector in zip(missing, computed)}
+        vectors = [stored[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+
+    return np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
@@ -0,0 +1,213 @@
+# embedding_store.py
+"""
+Cache persistant des embeddings : (modèle, hash du texte) -> vecteur float32, dans SQLite.
+
+    python -m app.services.embedding_store stats     # entrées, taille, répartition par modèle
+    python -m app.services.embedding_store clear [--model nomic-embed-text]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
+from app.metrics import EMBEDDING_STORE_HITS, EMBEDDING_STORE_MISSES
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+# Taille cible après une éviction (fraction de max_bytes) : évite d'évincer à chaque écriture
+EVICTION_TARGET = 0.9
+# SQLite limite le nombre de paramètres d'une requête
+_SQL_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash BLOB NOT NULL,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+"""
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class PersistentEmbeddingCache:
+    """
+    Vecteurs déjà calculés, conservés entre les ingestions et les redémarrages.
+
+    Une reconstruction de collection ou un changement de découpage ne repasse par le modèle
+    que pour les textes réellement nouveaux. Le modèle fait partie de la clé : changer de modèle
+    n'emploie jamais d'anciens vecteurs. Au-delà de `max_bytes` de vecteurs, les entrées les moins
+    récemment utilisées sont supprimées.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1024 ** 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._bytes = self._stored_bytes()
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Vecteurs en cache pour chaque texte (None si absent)."""
+        hashes = [text_hash(text) for text in texts]
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for lo in range(0, len(hashes), _SQL_BATCH):
+                chunk = hashes[lo:lo + _SQL_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk]
+                ).fetchall()
+                found.update((h, np.frombuffer(v, dtype=np.float32)) for h, v in rows)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, h) for h in found]
+                )
+
+        results = [found.get(h) for h in hashes]
+        hits = sum(1 for vector in results if vector is not None)
+        EMBEDDING_STORE_HITS.inc(hits)
+        EMBEDDING_STORE_MISSES.inc(len(results) - hits)
+        return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        now = time.time()
+        rows = [
+            (model, text_hash(text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            if self._conn.total_changes > before:
+                self._bytes += sum(len(row[2]) for row in rows)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment utilisées jusqu'à EVICTION_TARGET * max_bytes."""
+        # Le compteur est approximatif (INSERT OR IGNORE, autres processus) : on repart de la base
+        self._bytes = self._stored_bytes()
+        excess = self._bytes - int(self.max_bytes * EVICTION_TARGET)
+        if excess <= 0:
+            return
+
+        removed_bytes = removed = 0
+        while removed_bytes < excess:
+            rows = self._conn.execute(
+                "SELECT model, text_hash, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT ?",
+                (_SQL_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            batch = []
+            for model, h, size in rows:
+                batch.append((model, h))
+                removed_bytes += size
+                if removed_bytes >= excess:
+                    break
+            self._conn.executemany("DELETE FROM embeddings WHERE model = ? AND text_hash = ?", batch)
+            removed += len(batch)
+
+        self._bytes -= removed_bytes
+        logger.info(f"Embedding cache evicted {removed} vectors ({removed_bytes} bytes)")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            models = {
+                model: {"entries": count, "bytes": size}
+                for model, count, size in self._conn.execute(
+                    "SELECT model, COUNT(*), SUM(LENGTH(vector)) FROM embeddings GROUP BY model"
+                )
+            }
+        return {
+            "path": self.path,
+            "entries": sum(m["entries"] for m in models.values()),
+            "bytes": sum(m["bytes"] for m in models.values()),
+            "max_bytes": self.max_bytes,
+            "file_bytes": sum(
+                os.path.getsize(f) for f in (self.path, f"{self.path}-wal") if os.path.exists(f)
+            ),
+            "models": models,
+        }
+
+    def clear(self, model: Optional[str] = None) -> int:
+        with self._lock:
+            if model is None:
+                removed = self._conn.execute("DELETE FROM embeddings").rowcount
+            else:
+                removed = self._conn.execute("DELETE FROM embeddings WHERE model = ?", (model,)).rowcount
+            self._bytes = self._stored_bytes()
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_embedding_store_path() -> str:
+    return settings.EMBEDDING_STORE_PATH or os.path.join(settings.INDEX_STORAGE_PATH, "embeddings.sqlite3")
+
+
+def open_embedding_store() -> Optional[PersistentEmbeddingCache]:
+    """Cache persistant configuré (None si EMBEDDING_STORE_ENABLED=False)."""
+    if not settings.EMBEDDING_STORE_ENABLED:
+        return None
+    return PersistentEmbeddingCache(get_embedding_store_path(), max_bytes=settings.EMBEDDING_STORE_MAX_BYTES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache persistant des embeddings")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="affiche le contenu du cache")
+    clear_parser = subparsers.add_parser("clear", help="vide le cache (ou les vecteurs d'un modèle)")
+    clear_parser.add_argument("--model")
+    args = parser.parse_args()
+
+    store = PersistentEmbeddingCache(get_embedding_store_path(), max_bytes=settings.EMBEDDING_STORE_MAX_BYTES)
+    try:
+        if args.command == "stats":
+            print(json.dumps(store.stats(), indent=2, ensure_ascii=False))
+        else:
+            print(f"{store.clear(args.model)} vectors removed")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
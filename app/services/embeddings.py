@@ -1,13 +1,203 @@
 # enbeddings.py
 
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
+from typing import List, Optional
 
-from langchain_community.embeddings import OllamaEmbeddings
+import httpx
+from langchain_core.embeddings import Embeddings
+from langchain_ollama import OllamaEmbeddings
+from ollama import ResponseError
 
+from app.metrics import (
+    EMBEDDING_BATCH_TIME,
+    EMBEDDING_IN_FLIGHT,
+    EMBEDDING_RETRIES,
+    EMBEDDING_TEXTS,
+    EMBEDDING_THROUGHPUT,
+)
+from app.services.blocking import run_blocking
+from app.services.embedding_store import PersistentEmbeddingCache, open_embedding_store
 from app.utils.logger import AppLogger
 
 logger = AppLogger.get_logger(__name__)
 
+# Statuts HTTP d'Ollama qui justifient une nouvelle tentative (surcharge, redémarrage)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, ResponseError):
+        return error.status_code in RETRYABLE_STATUS
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Client d'embedding par lots au-dessus d'un modèle LangChain (OllamaEmbeddings).
+
+    Les textes sont découpés en lots de `batch_size`, envoyés avec au plus `max_in_flight`
+    requêtes simultanées (une seule limite partagée par tous les appelants du processus,
+    synchrones comme asynchrones : c'est la contre-pression vers Ollama), et chaque lot est
+    retenté avec un backoff exponentiel à
+    gigue complète en cas d'erreur transitoire. L'ordre des vecteurs est celui des textes.
+    Avec un cache persistant, seuls les textes jamais vectorisés par ce modèle sont envoyés.
+    """
+
+    def __init__(self, client: Embeddings, batch_size: int = 32, max_in_flight: int = 4,
+                 max_retries: int = 3, retry_base_delay: float = 0.5, retry_max_delay: float = 8.0,
+                 cache: Optional[PersistentEmbeddingCache] = None):
+        self.client = client
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+
+    @property
+    def model(self) -> str:
+        return getattr(self.client, "model", type(self.client).__name__)
+
+    async def _acquire_slot(self):
+        """Prend un créneau de self._slots sans bloquer la boucle (attente dans le pool si tout est pris)."""
+        if self._slots.acquire(blocking=False):
+            return
+        acquiring = asyncio.ensure_future(run_blocking(self._slots.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # L'attente se poursuit dans le thread : le créneau obtenu est rendu aussitôt
+            acquiring.add_done_callback(
+                lambda done: self._slots.release() if not done.cancelled() and done.exception() is None else None
+            )
+            raise
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            with self._slots:
+                EMBEDDING_IN_FLIGHT.inc()
+                start = time.perf_counter()
+                try:
+                    vectors = self.client.embed_documents(texts)
+                except Exception as e:
+                    error = e
+                else:
+                    EMBEDDING_BATCH_TIME.observe(time.perf_counter() - start)
+                    EMBEDDING_TEXTS.inc(len(texts))
+                    return vectors
+                finally:
+                    EMBEDDING_IN_FLIGHT.dec()
+
+            if attempt == self.max_retries or not is_retryable(error):
+                raise error
+            delay = self._backoff(attempt)
+            EMBEDDING_RETRIES.inc()
+            logger.warning(f"Embedding batch of {len(texts)} failed ({error}), retry {attempt + 1} in {delay:.2f}s")
+            time.sleep(delay)
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            await self._acquire_slot()
+            EMBEDDING_IN_FLIGHT.inc()
+            start = time.perf_counter()
+            try:
+                vectors = await self.client.aembed_documents(texts)
+            except Exception as e:
+                error = e
+            else:
+                EMBEDDING_BATCH_TIME.observe(time.perf_counter() - start)
+                EMBEDDING_TEXTS.inc(len(texts))
+                return vectors
+            finally:
+                EMBEDDING_IN_FLIGHT.dec()
+                self._slots.release()
+
+            if attempt == self.max_retries or not is_retryable(error):
+                raise error
+            delay = self._backoff(attempt)
+            EMBEDDING_RETRIES.inc()
+            logger.warning(f"Embedding batch of {len(texts)} failed ({error}), retry {attempt + 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _record_throughput(self, count: int, batches: int, start: float):
+        if batches > 1:
+            elapsed = time.perf_counter() - start
+            EMBEDDING_THROUGHPUT.set(count / elapsed if elapsed > 0 else 0.0)
+            logger.info(f"Embedded {count} texts in {batches} batches: {count / max(elapsed, 1e-9):.1f} texts/s")
+
+    def _embed_all(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        batches = self._batches(texts)
+        if len(batches) == 1:
+            results = [self._embed_batch(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(batches))) as pool:
+                results = list(pool.map(self._embed_batch, batches))
+        self._record_throughput(len(texts), len(batches), start)
+        return [vector for vectors in results for vector in vectors]
+
+    async def _aembed_all(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        batches = self._batches(texts)
+        results = await asyncio.gather(*(self._aembed_batch(batch) for batch in batches))
+        self._record_throughput(len(texts), len(batches), start)
+        return [vector for vectors in results for vector in vectors]
+
+    def _cache_lookup(self, texts: List[str]):
+        """Vecteurs déjà en cache et textes distincts restant à calculer."""
+        vectors = [None if v is None else v.tolist() for v in self.cache.get_many(self.model, texts)]
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        return vectors, missing
+
+    def _cache_fill(self, texts: List[str], vectors: list, missing: List[str], computed: List[List[float]]):
+        self.cache.put_many(self.model, missing, computed)
+        by_text = dict(zip(missing, computed))
+        return [by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._embed_all(texts)
+
+        vectors, missing = self._cache_lookup(texts)
+        if not missing:
+            return vectors
+        return self._cache_fill(texts, vectors, missing, self._embed_all(missing))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+        if self.cache is None:
+            return await self._aembed_all(texts)
+
+        vectors, missing = await run_blocking(self._cache_lookup, texts)
+        if not missing:
+            return vectors
+        computed = await self._aembed_all(missing)
+        return await run_blocking(self._cache_fill, texts, vectors, missing, computed)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
 @lru_cache()
 def get_embedding_function(model_name: str = "nomic-embed-text"):
     logger.info(f"Loading embedding model: {model_name} via Ollama")
@@ -17,11 +207,20 @@ def get_embedding_function(model_name: str = "nomic-embed-text"):
     try:
         embeddings = OllamaEmbeddings(
             model=model_name,
-            base_url=settings.OLLAMA_BASE_URL
+            base_url=settings.OLLAMA_BASE_URL,
+            client_kwargs={"timeout": settings.EMBEDDING_TIMEOUT}
         )
 
         logger.info("Embedding model loaded successfully.")
-        return embeddings
+        return BatchedEmbeddings(
+            embeddings,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            max_in_flight=settings.EMBEDDING_MAX_IN_FLIGHT,
+            max_retries=settings.EMBEDDING_MAX_RETRIES,
+            retry_base_delay=settings.EMBEDDING_RETRY_BASE_DELAY,
+            retry_max_delay=settings.EMBEDDING_RETRY_MAX_DELAY,
+            cache=open_embedding_store()
+        )
 
     except Exception as e:
         logger.error(f"Failed to load embedding model: {e}")
@@ -0,0 +1,238 @@
+# index_storage.py
+
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Iterator, Optional, Tuple, TypeVar
+
+import numpy as np
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+CURRENT_FILE = "CURRENT"
+KEPT_VERSIONS = 2
+
+# Métadonnées filtrables (colonnes d'entiers mmap, une valeur par document)
+FILTER_FIELDS = ("source", "chapter", "section")
+
+
+def create_version_dir(path: str) -> Tuple[str, str]:
+    """Crée un nouveau répertoire versionné v<ns> sous `path` et retourne (version, chemin)."""
+    version = f"v{time.time_ns()}"
+    version_path = os.path.join(path, version)
+    os.makedirs(version_path)
+    return version, version_path
+
+
+def switch_current(path: str, version: str):
+    """Met à jour le pointeur CURRENT (rename atomique) et purge les anciennes versions."""
+    tmp = os.path.join(path, f"{CURRENT_FILE}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(path, CURRENT_FILE))
+
+    # Les workers qui mappent encore une ancienne version gardent leurs fichiers ouverts
+    # (unlink sans effet sur un mmap actif), on conserve tout de même la précédente.
+    versions = sorted(d for d in os.listdir(path) if d.startswith("v") and os.path.isdir(os.path.join(path, d)))
+    for old in versions[:-KEPT_VERSIONS]:
+        shutil.rmtree(os.path.join(path, old), ignore_errors=True)
+
+
+def read_current_version(path: str) -> Optional[str]:
+    try:
+        with open(os.path.join(path, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class DocumentStoreWriter:
+    """
+    Écrit les documents d'un index en construction : docs.jsonl (+ offsets) et une colonne
+    d'entiers par métadonnée filtrable (-1 si absente).
+    """
+
+    def __init__(self, version_path: str):
+        self.version_path = version_path
+        self._file = open(os.path.join(version_path, "docs.jsonl"), "wb")
+        self._doc_offsets = [0]
+        self._pages = []
+        self._codes: Dict[str, Dict[str, int]] = {field: {} for field in FILTER_FIELDS}
+        self._columns: Dict[str, list] = {field: [] for field in FILTER_FIELDS}
+
+    @property
+    def num_docs(self) -> int:
+        return len(self._pages)
+
+    def add(self, point_id, content: str, metadata: Dict) -> int:
+        """Ajoute un document et retourne son indice."""
+        for field in FILTER_FIELDS:
+            value = metadata.get(field)
+            codes = self._codes[field]
+            self._columns[field].append(-1 if value is None else codes.setdefault(str(value), len(codes)))
+        page = metadata.get("page")
+        self._pages.append(page if isinstance(page, int) else -1)
+
+        line = json.dumps(
+            {"id": str(point_id), "page_content": content, "metadata": metadata},
+            ensure_ascii=False,
+        ).encode("utf-8") + b"\n"
+        self._file.write(line)
+        self._doc_offsets.append(self._doc_offsets[-1] + len(line))
+        return len(self._pages) - 1
+
+    def close(self) -> Dict:
+        """Écrit les colonnes et retourne les valeurs de filtres à enregistrer dans meta.json."""
+        self._file.close()
+        np.save(os.path.join(self.version_path, "doc_offsets.npy"), np.asarray(self._doc_offsets, dtype=np.int64))
+        np.save(os.path.join(self.version_path, "pages.npy"), np.asarray(self._pages, dtype=np.int32))
+        for field in FILTER_FIELDS:
+            np.save(os.path.join(self.version_path, f"{field}.npy"), np.asarray(self._columns[field], dtype=np.int32))
+        return {field: list(codes) for field, codes in self._codes.items()}
+
+
+class DocumentStore:
+    """Lecture mmap des documents d'un index et filtrage sur leurs métadonnées."""
+
+    def __init__(self, path: str, num_docs: int, filter_values: Dict):
+        self.doc_offsets = np.load(os.path.join(path, "doc_offsets.npy"), mmap_mode="r")
+        self.pages = np.load(os.path.join(path, "pages.npy"), mmap_mode="r")
+        self.columns = {
+            field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode="r") for field in FILTER_FIELDS
+        }
+        self.codes = {
+            field: {value: code for code, value in enumerate(values)}
+            for field, values in filter_values.items()
+        }
+
+        self._docs_file = open(os.path.join(path, "docs.jsonl"), "rb")
+        self._docs = (
+            mmap.mmap(self._docs_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if num_docs else b""
+        )
+
+    def get_record(self, doc_idx: int) -> Dict:
+        return json.loads(self._docs[self.doc_offsets[doc_idx]:self.doc_offsets[doc_idx + 1]])
+
+    def get_document(self, doc_idx: int) -> Tuple[str, Document]:
+        """Relit un document (point_id, Document) depuis le stockage mmap."""
+        record = self.get_record(doc_idx)
+        return record["id"], Document(page_content=record["page_content"], metadata=record["metadata"])
+
+    def match_filters(self, doc_idx: np.ndarray, filters: Dict) -> np.ndarray:
+        """Masque des documents respectant les filtres (source/chapter/section, plage de pages)."""
+        keep = np.ones(len(doc_idx), dtype=bool)
+        for field in FILTER_FIELDS:
+            value = filters.get(field)
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            codes = [self.codes[field][str(v)] for v in values if str(v) in self.codes[field]]
+            keep &= np.isin(self.columns[field][doc_idx], codes)
+
+        if filters.get("page_min") is not None:
+            keep &= self.pages[doc_idx] >= filters["page_min"]
+        if filters.get("page_max") is not None:
+            keep &= self.pages[doc_idx] <= filters["page_max"]
+        return keep
+
+    def close(self):
+        if isinstance(self._docs, mmap.mmap):
+            self._docs.close()
+        self._docs_file.close()
+
+
+IndexT = TypeVar("IndexT")
+
+
+class IndexCache(Generic[IndexT]):
+    """
+    Instance courante d'un index par répertoire, mise en cache par processus et rechargée
+    dès que CURRENT change, ce qui propage une reconstruction à tous les workers.
+
+    Les lecteurs épinglent l'instance avec acquire() : une instance remplacée est fermée
+    (fichiers, mmap) dès que son dernier lecteur la rend, ce qui libère aussi sur disque
+    les versions purgées par switch_current.
+    """
+
+    def __init__(self, factory: Callable[[str], IndexT]):
+        self._factory = factory
+        self._indexes: Dict[str, IndexT] = {}
+        self._readers: Dict[int, int] = {}
+        self._retired: Dict[int, IndexT] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: str) -> Optional[IndexT]:
+        """Instance courante, non épinglée : acquire() pour la lire au-delà d'un simple test d'existence."""
+        with self._lock:
+            index, superseded = self._current(path)
+        self._close(superseded)
+        return index
+
+    @contextmanager
+    def acquire(self, path: str) -> Iterator[Optional[IndexT]]:
+        """Instance courante (None si absente), gardée ouverte jusqu'à la sortie du bloc."""
+        with self._lock:
+            index, superseded = self._current(path)
+            if index is not None:
+                self._readers[id(index)] = self._readers.get(id(index), 0) + 1
+        self._close(superseded)
+        try:
+            yield index
+        finally:
+            if index is not None:
+                self._release(index)
+
+    def _current(self, path: str) -> Tuple[Optional[IndexT], Optional[IndexT]]:
+        # Sous self._lock : retourne (instance courante, ancienne instance à fermer tout de suite)
+        version = read_current_version(path)
+        if version is None:
+            return None, None
+
+        version_path = os.path.join(path, version)
+        index = self._indexes.get(path)
+        if index is not None and index.path == version_path:
+            return index, None
+        try:
+            loaded = self._factory(version_path)
+        except (FileNotFoundError, KeyError) as e:
+            logger.warning(f"Index at {version_path} is incomplete or outdated, ignoring it: {e}")
+            return None, None
+        self._indexes[path] = loaded
+        if index is None:
+            return loaded, None
+        if self._readers.get(id(index)):
+            # Une recherche la lit encore : fermée par le dernier release
+            self._retired[id(index)] = index
+            return loaded, None
+        return loaded, index
+
+    def _release(self, index: IndexT):
+        with self._lock:
+            remaining = self._readers[id(index)] - 1
+            if remaining:
+                self._readers[id(index)] = remaining
+                return
+            del self._readers[id(index)]
+            superseded = self._retired.pop(id(index), None)
+        self._close(superseded)
+
+    @staticmethod
+    def _close(index: Optional[IndexT]):
+        if index is None:
+            return
+        try:
+            index.close()
+        except Exception as e:
+            logger.warning(f"Failed to close index at {index.path}: {e}")
@@ -0,0 +1,327 @@
+# ingestion.py
+
+import json
+import os
+import itertools
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+from app.config import settings
+from app.services.chunking import iter_split_documents
+from app.services.collection_versions import (
+    activate_collection_version, drop_collection_version, get_active_collection, get_manifest_path,
+    new_collection_version
+)
+from app.services.embeddings import get_embedding_function
+from app.services.pdf_loader import DATA_PATH, count_pdf_pages, file_sha256, iter_pdf_files, list_pdf_files
+from app.services.vector_store import count_embeddings, store_embeddings
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def _embedding_model() -> str:
+    """Modèle qui produit réellement les vecteurs (clé des caches d'embeddings et du manifeste)."""
+    embeddings = get_embedding_function()
+    return getattr(embeddings, "model", type(embeddings).__name__)
+
+
+def _page_counts(file_paths: Iterable[str]) -> Dict[str, int]:
+    """Pages de chaque fichier lisible ; un fichier illisible est absent (l'analyse le signalera)."""
+    counts = {}
+    for file_path in file_paths:
+        try:
+            counts[file_path] = count_pdf_pages(file_path)
+        except Exception:
+            pass
+    return counts
+
+
+class IngestionManifest:
+    """
+    État de la dernière ingestion : pour chaque fichier, son hash SHA-256 (avec taille et mtime
+    pour éviter de le recalculer) et les identifiants de ses chunks, eux-mêmes des hashs de contenu.
+    """
+
+    def __init__(self, path: str, files: Optional[Dict[str, Dict]] = None, embedding_model: Optional[str] = None):
+        self.path = path
+        self.files: Dict[str, Dict] = files or {}
+        self.embedding_model = embedding_model
+
+    @classmethod
+    def load(cls, path: str) -> "IngestionManifest":
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(path)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Ingestion manifest {path} is corrupted, starting from scratch: {e}")
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data.get("files"), data.get("embedding_model"))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "embedding_model": self.embedding_model,
+                "files": self.files,
+            }, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def is_unchanged(self, file_path: str, stat: os.stat_result) -> bool:
+        """Vrai si le fichier n'a pas changé ; le hash n'est recalculé que si taille ou mtime diffèrent."""
+        entry = self.files.get(file_path)
+        if entry is None:
+            return False
+        if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return True
+        if entry["size"] == stat.st_size and entry["sha256"] == file_sha256(file_path):
+            entry["mtime"] = stat.st_mtime
+            return True
+        return False
+
+
+class IngestionCancelled(Exception):
+    """Ingestion interrompue à la demande : ni le manifeste ni l'index BM25 ne sont modifiés."""
+
+
+class IngestionProgress:
+    """
+    Avancement d'une ingestion, mis à jour par les étapes du pipeline et lu par l'API d'administration.
+    L'annulation est coopérative : elle est vérifiée à chaque page lue et à chaque lot écrit.
+    """
+
+    def __init__(self):
+        self.cancel_event = threading.Event()
+        self.files_total = 0
+        self.pages_total = 0
+        self.pages_parsed = 0
+        self.chunks_embedded = 0
+        self.started_at: Optional[float] = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise IngestionCancelled()
+
+    def add_pages(self, count: int = 1):
+        self.pages_parsed += count
+        self.check_cancelled()
+
+    def add_embedded(self, count: int):
+        self.chunks_embedded += count
+        self.check_cancelled()
+
+    def snapshot(self) -> Dict:
+        """Compteurs, débits et temps restant estimé (au prorata des pages lues)."""
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        eta = None
+        if self.pages_total and self.pages_parsed and elapsed:
+            done = min(1.0, self.pages_parsed / self.pages_total)
+            eta = elapsed * (1 - done) / done
+        return {
+            "files_total": self.files_total,
+            "pages_total": self.pages_total,
+            "pages_parsed": self.pages_parsed,
+            "chunks_embedded": self.chunks_embedded,
+            "elapsed_seconds": elapsed,
+            "pages_per_second": self.pages_parsed / elapsed if elapsed else 0.0,
+            "chunks_per_second": self.chunks_embedded / elapsed if elapsed else 0.0,
+            "eta_seconds": eta,
+        }
+
+
+def _track_pages(pages: Iterable[Document], progress: Optional[IngestionProgress]) -> Iterator[Document]:
+    for page in pages:
+        if progress is not None:
+            progress.add_pages()
+        yield page
+
+
+def ingest_documents(data_path: str = DATA_PATH, force: bool = False,
+                     progress: Optional[IngestionProgress] = None,
+                     file_paths: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """
+    Ingestion incrémentale des PDF de `data_path`.
+
+    Les fichiers inchangés sont ignorés sans être relus. Pour un fichier nouveau ou modifié,
+    seuls les chunks dont le hash n'était pas déjà indexé sont vectorisés ; les chunks disparus
+    (pages modifiées, fichiers supprimés) sont retirés de l'index.
+    Pages et chunks circulent en flux jusqu'à store_embeddings : la mémoire ne dépend pas du
+    nombre de manuels.
+    force=True ignore le manifeste et revectorise tout.
+    Avec Qdrant, une ingestion complète (première ingestion, force, changement de modèle) remplit une
+    nouvelle version de la collection, servie par l'alias seulement une fois complète ; une ingestion
+    incrémentale écrit dans la version active.
+    progress reçoit l'avancement et permet l'annulation (IngestionCancelled).
+    file_paths limite l'ingestion à ces fichiers (document téléversé) : les autres entrées du
+    manifeste sont conservées telles quelles, sans même examiner leurs fichiers.
+    """
+    start = time.perf_counter()
+    if progress is not None:
+        progress.started_at = start
+    # Alias relu dans Qdrant : une autre réplique a pu le basculer depuis la dernière lecture
+    active = get_active_collection(refresh=True)
+    manifest_path = get_manifest_path(active)
+    manifest = IngestionManifest(manifest_path) if force else IngestionManifest.load(manifest_path)
+
+    embedding_model = _embedding_model()
+    if manifest.embedding_model not in (None, embedding_model):
+        logger.warning(
+            f"Embedding model changed ({manifest.embedding_model} -> {embedding_model}), "
+            f"re-embedding every chunk"
+        )
+        manifest = IngestionManifest(manifest_path)
+    elif manifest.files and count_embeddings() == 0:
+        logger.warning("Ingestion manifest present but the vector index is empty, re-embedding every chunk")
+        manifest = IngestionManifest(manifest_path)
+
+    if file_paths is not None and manifest.files:
+        targets = {os.path.abspath(path) for path in file_paths}
+    elif file_paths is not None:
+        # Manifeste vide ou réinitialisé : les autres fichiers doivent aussi être (re)vectorisés
+        logger.info("No usable ingestion manifest, ingesting the whole directory")
+        file_paths = None
+
+    stats = {
+        "files_total": 0, "files_skipped": 0, "files_updated": 0, "files_removed": 0,
+        "chunks_embedded": 0, "chunks_unchanged": 0, "chunks_deleted": 0, "files_failed": 0,
+    }
+    files: Dict[str, Dict] = {}
+    to_delete: List[str] = []
+    deleted: List[str] = []
+    # Fichiers en échec d'analyse (même partiel) : signalés avant la fin de leurs pages
+    failed = set()
+
+    if file_paths is None:
+        candidates = list_pdf_files(data_path)
+    else:
+        files.update((path, entry) for path, entry in manifest.files.items() if path not in targets)
+        candidates = sorted(path for path in targets if os.path.isfile(path))
+
+    changed = []
+    for file_path in candidates:
+        stats["files_total"] += 1
+        stat = os.stat(file_path)
+        if manifest.is_unchanged(file_path, stat):
+            stats["files_skipped"] += 1
+            files[file_path] = manifest.files[file_path]
+        else:
+            changed.append((file_path, stat))
+
+    # Chaque version de la collection a son manifeste : un retour arrière retrouve le sien
+    blue_green = settings.VECTOR_BACKEND == "qdrant" and not manifest.files and bool(changed)
+    target = new_collection_version() if blue_green else active
+    manifest.path = get_manifest_path(target)
+
+    # Comptées une seule fois : pour l'avancement, puis pour le découpage en plages de pages
+    page_counts: Dict[str, int] = {}
+    if progress is not None:
+        progress.files_total = len(changed)
+        page_counts = _page_counts(file_path for file_path, _ in changed)
+        progress.pages_total = sum(page_counts.values())
+
+    listed = set(files) | {file_path for file_path, _ in changed}
+    removed = set(manifest.files) - listed
+    stats["files_removed"] = len(removed)
+    for file_path in removed:
+        to_delete.extend(manifest.files[file_path].get("chunks", []))
+
+    def file_chunks(file_path: str, stat: os.stat_result, pages: Iterable[Document]) -> Iterator[Document]:
+        """Nouveaux chunks d'un fichier modifié ; met à jour son entrée du manifeste une fois lu."""
+        previous_ids = set(manifest.files.get(file_path, {}).get("chunks", []))
+        chunk_ids = []
+        for chunk in iter_split_documents(pages):
+            chunk_id = chunk.metadata["chunk_id"]
+            chunk_ids.append(chunk_id)
+            if chunk_id in previous_ids:
+                stats["chunks_unchanged"] += 1
+            else:
+                stats["chunks_embedded"] += 1
+                yield chunk
+
+        if file_path in failed:
+            # Index et manifeste inchangés pour ce fichier : il sera réanalysé au prochain passage.
+            # Seuls les chunks nouveaux déjà écrits (pages lues) et non référencés sont retirés
+            stats["files_failed"] += 1
+            to_delete.extend(set(chunk_ids) - previous_ids)
+            if file_path in manifest.files:
+                files[file_path] = manifest.files[file_path]
+            return
+
+        to_delete.extend(previous_ids - set(chunk_ids))
+        stats["files_updated"] += 1
+        files[file_path] = {
+            "sha256": file_sha256(file_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunks": chunk_ids,
+        }
+
+    def changed_chunks() -> Iterator[Document]:
+        """Flux analyse -> découpage des fichiers modifiés : rien n'est matérialisé au-delà d'une page."""
+        stats_by_file = dict(changed)
+        pages = _track_pages(
+            iter_pdf_files(
+                list(stats_by_file),
+                on_error=lambda file_path, error: failed.add(file_path),
+                page_counts=page_counts
+            ),
+            progress
+        )
+        for file_path, file_pages in itertools.groupby(pages, key=lambda page: page.metadata["source"]):
+            yield from file_chunks(file_path, stats_by_file.pop(file_path), file_pages)
+        # Fichiers sans aucune page : vides (anciens chunks retirés) ou illisibles (conservés)
+        for file_path, stat in stats_by_file.items():
+            yield from file_chunks(file_path, stat, [])
+
+    def stale_chunk_ids() -> List[str]:
+        # Appelée par store_embeddings une fois le flux consommé, quand tous les chunks sont connus.
+        # Un même chunk peut migrer d'un fichier à l'autre : on ne supprime pas ce qui est encore référencé
+        current_ids = {chunk_id for entry in files.values() for chunk_id in entry["chunks"]}
+        deleted.extend(sorted(set(to_delete) - current_ids))
+        return deleted
+
+    try:
+        if changed or to_delete:
+            store_embeddings(
+                changed_chunks(),
+                delete_ids=stale_chunk_ids,
+                on_stored=progress.add_embedded if progress is not None else None,
+                collection_name=target if settings.VECTOR_BACKEND == "qdrant" else None,
+                # Version active : l'index BM25 précédent reste servi pendant sa reconstruction.
+                # Une nouvelle version doit avoir le sien avant la bascule de l'alias
+                defer_keyword_index=not blue_green
+            )
+        stats["chunks_deleted"] = len(deleted)
+
+        manifest.files = files
+        manifest.embedding_model = embedding_model
+        manifest.save()
+        if blue_green:
+            activate_collection_version(target)
+    except BaseException:
+        if blue_green:
+            # Version incomplète : jamais servie, supprimée avec son index BM25 et son manifeste
+            drop_collection_version(target)
+        raise
+
+    if failed:
+        logger.error(f"Ingestion: {len(failed)} files could not be parsed and were left as is: {sorted(failed)}")
+    logger.info(f"Ingestion into '{target}' done in {time.perf_counter() - start:.2f}s: {stats}")
+    return stats
@@ -0,0 +1,150 @@
+# ingestion_jobs.py
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from app.metrics import INGESTION_JOBS_TOTAL
+from app.services.ingestion import IngestionCancelled, IngestionProgress, ingest_documents
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+# Jobs terminés conservés pour consultation
+MAX_FINISHED_JOBS = 20
+
+
+class IngestionJobConflict(Exception):
+    """Une ingestion est déjà en file ou en cours."""
+
+    def __init__(self, job: "IngestionJob"):
+        super().__init__(f"Ingestion job {job.id} is already {job.status}")
+        self.job = job
+
+
+class IngestionJob:
+    """Une ingestion demandée par l'API : statut, avancement, statistiques ou erreur finales."""
+
+    def __init__(self, force: bool = False, file_paths: Optional[Sequence[str]] = None):
+        self.id = uuid.uuid4().hex
+        self.force = force
+        self.file_paths = list(file_paths) if file_paths is not None else None
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.stats: Optional[Dict[str, int]] = None
+        self.error: Optional[str] = None
+        self.progress = IngestionProgress()
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "force": self.force,
+            "file_paths": self.file_paths,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stats": self.stats,
+            "error": self.error,
+            "progress": self.progress.snapshot(),
+        }
+
+
+class IngestionJobManager:
+    """
+    Exécute les ingestions dans un thread de fond, une à la fois, pour ne jamais bloquer un
+    worker HTTP. Pendant un job, les recherches continuent sur l'index en service : l'index BM25
+    et l'index local ne basculent (CURRENT) qu'à la fin, et le manifeste n'est écrit qu'en cas de succès.
+    Une ingestion complète est refusée si un job est actif ; une ingestion ciblée (document
+    téléversé) est mise en file derrière le job actif.
+    """
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, force: bool = False, file_paths: Optional[Sequence[str]] = None) -> IngestionJob:
+        with self._lock:
+            active = next((job for job in self._jobs.values() if job.status in ACTIVE_STATUSES), None)
+            if active is not None and file_paths is None:
+                raise IngestionJobConflict(active)
+            job = IngestionJob(force=force, file_paths=file_paths)
+            self._jobs[job.id] = job
+            self._prune()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingestion")
+            self._executor.submit(self._run, job)
+        logger.info(f"Ingestion job {job.id} queued (force={force}, files={job.file_paths or 'all'})")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestionJob]:
+        return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        """Demande l'annulation ; un job en cours s'arrête à la prochaine page ou au prochain lot."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            if job.status == "queued":
+                self._finish(job, "cancelled")
+            elif job.status == "running":
+                job.progress.cancel()
+        return job
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            if job.status in ACTIVE_STATUSES:
+                self.cancel(job.id)
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: IngestionJob):
+        with self._lock:
+            if job.status != "queued":
+                return
+            job.status = "running"
+            job.started_at = time.time()
+        logger.info(f"Ingestion job {job.id} started")
+
+        try:
+            job.stats = ingest_documents(force=job.force, progress=job.progress, file_paths=job.file_paths)
+            status = "succeeded"
+        except IngestionCancelled:
+            status = "cancelled"
+        except Exception as e:
+            logger.exception(f"Ingestion job {job.id} failed")
+            job.error = str(e)
+            status = "failed"
+        with self._lock:
+            self._finish(job, status)
+        logger.info(f"Ingestion job {job.id} {status}: {job.progress.snapshot()}")
+
+    def _finish(self, job: IngestionJob, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        INGESTION_JOBS_TOTAL.labels(status=status).inc()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+
+_manager = IngestionJobManager()
+
+
+def get_ingestion_job_manager() -> IngestionJobManager:
+    return _manager
@@ -0,0 +1,240 @@
+# local_vector_index.py
+
+import json
+import os
+import shutil
+import time
+from typing import ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+from app.services.index_storage import (
+    DocumentStore,
+    DocumentStoreWriter,
+    IndexCache,
+    create_version_dir,
+    switch_current,
+)
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+# Lignes de la matrice traitées par produit matriciel (borne la mémoire des scores intermédiaires)
+BLOCK_SIZE = 65536
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLES_PER_LIST = 256
+
+Record = Tuple[str, str, Dict, Sequence[float]]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, rows: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+    """Les top_k (row, score) par score décroissant."""
+    if len(scores) > top_k:
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return [(int(rows[i]), float(scores[i])) for i in best]
+
+
+def _train_ivf(vectors: np.ndarray, n_lists: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """k-means sphérique (cosinus) : retourne les centroïdes et l'affectation de chaque vecteur."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    sample = vectors[rng.choice(n, size=min(n, n_lists * KMEANS_SAMPLES_PER_LIST), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for list_id in range(n_lists):
+            members = sample[assignment == list_id]
+            if len(members):
+                centroids[list_id] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+
+    assignment = np.concatenate([
+        np.argmax(vectors[lo:lo + BLOCK_SIZE] @ centroids.T, axis=1)
+        for lo in range(0, n, BLOCK_SIZE)
+    ])
+    return centroids.astype(np.float32), assignment
+
+
+class LocalVectorIndex:
+    """
+    Index vectoriel embarqué, sans serveur.
+
+    Les vecteurs normalisés sont stockés dans une matrice float32 (vectors.npy) ouverte en mmap :
+    l'ouverture ne lit rien, et la recherche exacte est un produit matriciel par blocs (cosinus).
+    Pour les gros corpus, une partition IVF optionnelle (k-means) limite le calcul aux
+    listes des `nprobe` centroïdes les plus proches de la requête.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.documents = DocumentStore(path, self.meta["num_docs"], self.meta["filter_values"])
+
+        self.centroids = self.list_offsets = self.list_rows = None
+        if self.meta["ivf_lists"]:
+            self.centroids = np.load(os.path.join(path, "centroids.npy"))
+            self.list_offsets = np.load(os.path.join(path, "list_offsets.npy"), mmap_mode="r")
+            self.list_rows = np.load(os.path.join(path, "list_rows.npy"), mmap_mode="r")
+
+    @property
+    def num_docs(self) -> int:
+        return self.meta["num_docs"]
+
+    @classmethod
+    def build(cls, records: Iterable[Record], path: str, ivf_lists: int = 0) -> "LocalVectorIndex":
+        """
+        Construit l'index à partir de tuples (point_id, page_content, metadata, vecteur) dans un
+        nouveau répertoire versionné, puis bascule le pointeur CURRENT de façon atomique.
+        ivf_lists > 0 active la partition IVF (ignorée si le corpus a moins de documents que de listes).
+        """
+        start = time.perf_counter()
+        version, version_path = create_version_dir(path)
+        try:
+            cls._write_version(records, version_path, ivf_lists)
+        except BaseException:
+            # Construction interrompue (erreur, ingestion annulée) : l'index courant reste en service
+            shutil.rmtree(version_path, ignore_errors=True)
+            raise
+
+        switch_current(path, version)
+        index = cls(version_path)
+        logger.info(
+            f"Local vector index built: {index.num_docs} vectors (dim={index.meta['dim']}, "
+            f"ivf_lists={index.meta['ivf_lists']}) in {time.perf_counter() - start:.2f}s ({version_path})"
+        )
+        return index
+
+    @staticmethod
+    def _write_version(records: Iterable[Record], version_path: str, ivf_lists: int):
+        # Les vecteurs sont écrits au fil de l'eau (float32 brut) : la construction ne garde rien en mémoire
+        writer = DocumentStoreWriter(version_path)
+        raw_path = os.path.join(version_path, "vectors.f32")
+        dim = 0
+        with open(raw_path, "wb") as raw:
+            for point_id, content, metadata, vector in records:
+                writer.add(point_id, content, metadata)
+                vector = _normalize(np.asarray(vector, dtype=np.float32))
+                dim = dim or len(vector)
+                raw.write(vector.tobytes())
+        filter_values = writer.close()
+
+        num_docs = writer.num_docs
+        matrix = np.lib.format.open_memmap(
+            os.path.join(version_path, "vectors.npy"), mode="w+", dtype=np.float32, shape=(num_docs, dim)
+        )
+        if num_docs:
+            source = np.memmap(raw_path, dtype=np.float32, mode="r", shape=(num_docs, dim))
+            for lo in range(0, num_docs, BLOCK_SIZE):
+                matrix[lo:lo + BLOCK_SIZE] = source[lo:lo + BLOCK_SIZE]
+            del source
+        matrix.flush()
+        os.remove(raw_path)
+
+        if ivf_lists and num_docs >= ivf_lists:
+            centroids, assignment = _train_ivf(matrix, ivf_lists)
+            order = np.argsort(assignment, kind="stable").astype(np.int32)
+            offsets = np.zeros(ivf_lists + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(np.bincount(assignment, minlength=ivf_lists))
+            np.save(os.path.join(version_path, "centroids.npy"), centroids)
+            np.save(os.path.join(version_path, "list_offsets.npy"), offsets)
+            np.save(os.path.join(version_path, "list_rows.npy"), order)
+        else:
+            ivf_lists = 0
+        del matrix
+
+        with open(os.path.join(version_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "num_docs": num_docs,
+                "dim": dim,
+                "ivf_lists": ivf_lists,
+                "filter_values": filter_values,
+            }, f, ensure_ascii=False)
+
+    def iter_records(self) -> Iterator[Record]:
+        """Relit tous les documents avec leur vecteur (fusion lors d'une nouvelle ingestion)."""
+        for doc_idx in range(self.num_docs):
+            record = self.documents.get_record(doc_idx)
+            yield record["id"], record["page_content"], record["metadata"], self.vectors[doc_idx]
+
+    def _candidate_rows(self, query: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """Lignes des listes IVF à explorer (None = recherche exacte sur toute la matrice)."""
+        if self.centroids is None or nprobe >= len(self.centroids):
+            return None
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.list_rows[self.list_offsets[p]:self.list_offsets[p + 1]] for p in probes])
+
+    def search(self, queries, top_k: int = 10, filters: Optional[Dict] = None,
+               nprobe: int = 8) -> List[List[Tuple[int, float]]]:
+        """
+        Retourne, pour chaque requête (vecteur ou matrice de vecteurs), les (doc_idx, score cosinus)
+        des top_k documents.
+        """
+        queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if not self.num_docs or top_k <= 0:
+            return [[] for _ in queries]
+
+        allowed = self.documents.match_filters(np.arange(self.num_docs), filters) if filters else None
+
+        if self.centroids is not None and nprobe < len(self.centroids):
+            results = []
+            for query in queries:
+                rows = self._candidate_rows(query, nprobe)
+                if allowed is not None:
+                    rows = rows[allowed[rows]]
+                results.append(_top_k(self.vectors[rows] @ query, rows, top_k) if len(rows) else [])
+            return results
+
+        # Recherche exacte : toutes les requêtes en un produit matriciel par bloc de lignes
+        best: List[List[Tuple[int, float]]] = [[] for _ in queries]
+        for lo in range(0, self.num_docs, BLOCK_SIZE):
+            hi = min(lo + BLOCK_SIZE, self.num_docs)
+            rows = np.arange(lo, hi)
+            block_scores = queries @ self.vectors[lo:hi].T
+            if allowed is not None:
+                rows = rows[allowed[lo:hi]]
+                block_scores = block_scores[:, allowed[lo:hi]]
+            if not len(rows):
+                continue
+            for q, scores in enumerate(block_scores):
+                merged = _top_k(scores, rows, top_k)
+                if best[q]:
+                    merged = sorted(best[q] + merged, key=lambda hit: hit[1], reverse=True)[:top_k]
+                best[q] = merged
+        return best
+
+    def get_document(self, doc_idx: int) -> Tuple[str, Document]:
+        return self.documents.get_document(doc_idx)
+
+    def close(self):
+        self.documents.close()
+
+
+_cache: IndexCache[LocalVectorIndex] = IndexCache(LocalVectorIndex)
+
+
+def load_local_vector_index(path: str) -> Optional[LocalVectorIndex]:
+    """Retourne l'index vectoriel courant pour `path` (None s'il n'a jamais été construit)."""
+    return _cache.load(path)
+
+
+def open_local_vector_index(path: str) -> ContextManager[Optional[LocalVectorIndex]]:
+    """Comme load_local_vector_index, l'instance restant ouverte jusqu'à la sortie du bloc `with`."""
+    return _cache.acquire(path)
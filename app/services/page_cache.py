@@ -0,0 +1,160 @@
+# page_cache.py
+"""
+Cache persistant du texte des pages PDF : (hash du fichier, version de l'analyseur) -> pages.
+
+    python -m app.services.page_cache stats     # fichiers en cache, taille compressée
+    python -m app.services.page_cache clear
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+import pypdf
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+from app.config import settings
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+# À incrémenter si l'extraction (_parse_page_range) ou le format des entrées change
+PAGE_CACHE_FORMAT = 1
+ENTRY_SUFFIX = ".jsonl.gz"
+
+
+def parser_version() -> str:
+    return f"pypdf-{pypdf.__version__}-plain-{PAGE_CACHE_FORMAT}"
+
+
+class PageCacheWriter:
+    """Écrit les pages d'un fichier au fil de l'analyse ; l'entrée n'est visible qu'après commit()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = gzip.open(self._tmp, "wt", encoding="utf-8", compresslevel=6)
+
+    def add(self, pages: Iterable[Document]):
+        for page in pages:
+            metadata = {key: value for key, value in page.metadata.items() if key != "source"}
+            self._file.write(json.dumps({"page_content": page.page_content, "metadata": metadata}, ensure_ascii=False))
+            self._file.write("\n")
+
+    def commit(self):
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+
+class PageTextCache:
+    """
+    Pages extraites de chaque PDF, une entrée gzip (JSON lines) par contenu de fichier.
+
+    La clé est le hash SHA-256 du fichier : un manuel déplacé ou renommé reste en cache, un manuel
+    modifié ne l'est plus. Les entrées sont rangées sous la version de l'analyseur : une mise à jour
+    de pypdf ou de l'extraction invalide tout le cache. La source des pages (chemin) n'est pas
+    stockée, elle est celle du fichier lu.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version_path = os.path.join(path, parser_version())
+
+    def _entry_path(self, sha256: str) -> str:
+        return os.path.join(self.version_path, sha256[:2], f"{sha256}{ENTRY_SUFFIX}")
+
+    def contains(self, sha256: str) -> bool:
+        return os.path.exists(self._entry_path(sha256))
+
+    def get(self, sha256: str, source: str) -> Optional[List[Document]]:
+        """Pages en cache pour ce contenu, avec `source` pour chemin (None si absentes ou illisibles)."""
+        try:
+            with gzip.open(self._entry_path(sha256), "rt", encoding="utf-8") as f:
+                return [
+                    Document(page_content=record["page_content"], metadata={"source": source, **record["metadata"]})
+                    for record in map(json.loads, f)
+                ]
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, KeyError) as e:
+            logger.warning(f"Corrupted page cache entry for {source}, parsing again: {e}")
+            os.remove(self._entry_path(sha256))
+            return None
+
+    def writer(self, sha256: str) -> PageCacheWriter:
+        return PageCacheWriter(self._entry_path(sha256))
+
+    def purge_stale_versions(self) -> int:
+        """Supprime les entrées d'anciennes versions de l'analyseur (illisibles pour celle-ci)."""
+        if not os.path.isdir(self.path):
+            return 0
+        stale = [name for name in os.listdir(self.path) if name != parser_version()]
+        for name in stale:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        if stale:
+            logger.info(f"Page cache: removed entries of parser versions {stale}")
+        return len(stale)
+
+    def stats(self) -> Dict:
+        entries = size = 0
+        for root, _, files in os.walk(self.version_path):
+            for name in files:
+                if name.endswith(ENTRY_SUFFIX):
+                    entries += 1
+                    size += os.path.getsize(os.path.join(root, name))
+        return {"path": self.path, "parser_version": parser_version(), "entries": entries, "bytes": size}
+
+    def clear(self) -> int:
+        entries = self.stats()["entries"]
+        shutil.rmtree(self.path, ignore_errors=True)
+        return entries
+
+
+def get_page_cache_path() -> str:
+    return settings.PAGE_CACHE_PATH or os.path.join(settings.INDEX_STORAGE_PATH, "pages")
+
+
+_purged = set()
+
+
+def open_page_cache() -> Optional[PageTextCache]:
+    """Cache configuré (None si PAGE_CACHE_ENABLED=False) ; les anciennes versions sont purgées une fois par processus."""
+    if not settings.PAGE_CACHE_ENABLED:
+        return None
+    cache = PageTextCache(get_page_cache_path())
+    if cache.path not in _purged:
+        _purged.add(cache.path)
+        cache.purge_stale_versions()
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache persistant du texte des pages PDF")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="affiche le contenu du cache")
+    subparsers.add_parser("clear", help="vide le cache")
+    args = parser.parse_args()
+
+    cache = PageTextCache(get_page_cache_path())
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2, ensure_ascii=False))
+    else:
+        print(f"{cache.clear()} files removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,252 @@
 # pdf_loader.py
 
+import hashlib
+import multiprocessing
 import os
-from langchain_community.document_loaders import PyPDFDirectoryLoader
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pypdf import PdfReader
+from langchain_community.document_loaders import PyPDFLoader
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+from app.config import settings
+from app.metrics import PAGE_CACHE_HITS, PAGE_CACHE_MISSES
+from app.services.page_cache import open_page_cache
 from app.utils.logger import AppLogger
 
 logger = AppLogger.get_logger(__name__)
 
 DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data"))
 
+# (fichier, première page, page de fin exclue)
+PageRange = Tuple[str, int, int]
+# Appelé pour chaque fichier dont une partie n'a pas pu être analysée
+OnParseError = Callable[[str, Exception], None]
+# Clés dupliquées sous le nom commun aux analyseurs PDF de LangChain
+METADATA_ALIASES = {"page_count": "total_pages", "file_path": "source"}
+
+
 def load_pdf():
-    """Charge les fichiers PDF depuis le dossier DATA_PATH."""
+    """Charge les fichiers PDF depuis le dossier DATA_PATH (analyse répartie sur PDF_PARSE_WORKERS processus)."""
     logger.info(f"Loading PDF documents from {DATA_PATH}...")
-    
+
     if not os.path.exists(DATA_PATH):
         logger.error(f"Directory not found: {DATA_PATH}")
         return []
 
     try:
-        loader = PyPDFDirectoryLoader(DATA_PATH)
-        documents = loader.load()    
+        documents = load_pdf_files(list_pdf_files(DATA_PATH))
         logger.info(f"Loaded {len(documents)} pages from PDFs.")
         return documents
     except Exception as e:
         logger.error(f"Failed to load PDFs: {e}")
         return []
 
+def list_pdf_files(path: str = DATA_PATH):
+    """Fichiers PDF du dossier (mêmes fichiers que PyPDFDirectoryLoader), triés par nom."""
+    if not os.path.isdir(path):
+        return []
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+        if name.lower().endswith(".pdf") and not name.startswith(".")
+    )
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_pdf_file(file_path: str):
+    """Charge les pages d'un seul PDF (metadata source = chemin du fichier)."""
+    return PyPDFLoader(file_path).load()
+
+def _pdf_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Métadonnées du PDF normalisées comme par PyPDFLoader (clés en minuscules sans "/", dates ISO)."""
+    normalized = {}
+    for key, value in metadata.items():
+        if type(value) not in (str, int):
+            value = str(value)
+        key = key.lstrip("/").lower()
+        if key in ("creationdate", "moddate"):
+            try:
+                normalized[key] = datetime.strptime(value.replace("'", ""), "D:%Y%m%d%H%M%S%z").isoformat("T")
+            except ValueError:
+                normalized[key] = value
+        elif key in METADATA_ALIASES:
+            normalized[METADATA_ALIASES[key]] = value
+            normalized[key] = value
+        else:
+            normalized[key] = value.strip() if isinstance(value, str) else value
+    return normalized
+
+def _parse_page_range(task: PageRange) -> List[Document]:
+    """
+    Extrait les pages [start, stop) d'un PDF, avec les mêmes texte et métadonnées que PyPDFLoader
+    (source, page, page_label, total_pages, métadonnées du PDF). Exécuté dans un processus du pool ;
+    une erreur d'analyse est propagée à l'appelant.
+    """
+    file_path, start, stop = task
+    reader = PdfReader(file_path)
+    doc_metadata = _pdf_metadata(
+        {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+        | dict(reader.metadata or {})
+        | {"source": file_path, "total_pages": len(reader.pages)}
+    )
+    return [
+        Document(
+            page_content=reader.pages[page].extract_text(extraction_mode="plain").strip(),
+            metadata=doc_metadata | {"page": page, "page_label": reader.page_labels[page]}
+        )
+        for page in range(start, stop)
+    ]
+
+def _report_parse_error(file_path: str, error: Exception, on_error: Optional[OnParseError], pages: str = ""):
+    logger.error(f"Failed to parse {file_path}{pages}: {error}")
+    if on_error is not None:
+        on_error(file_path, error)
+
+def count_pdf_pages(file_path: str) -> int:
+    """Nombre de pages d'un PDF (lecture de la table des pages seulement)."""
+    return len(PdfReader(file_path).pages)
+
+def plan_page_ranges(file_paths: Sequence[str], pages_per_task: int, on_error: Optional[OnParseError] = None,
+                     page_counts: Optional[Dict[str, int]] = None) -> List[PageRange]:
+    """
+    Découpe chaque fichier en plages de pages : un gros manuel occupe plusieurs processus.
+    page_counts = nombres de pages déjà connus (les autres fichiers sont ouverts pour les compter).
+    """
+    tasks = []
+    for file_path in file_paths:
+        try:
+            total_pages = (page_counts or {}).get(file_path)
+            if total_pages is None:
+                total_pages = count_pdf_pages(file_path)
+        except Exception as e:
+            _report_parse_error(file_path, e, on_error)
+            continue
+        tasks.extend(
+            (file_path, start, min(start + pages_per_task, total_pages))
+            for start in range(0, total_pages, pages_per_task)
+        )
+    return tasks
+
+def _range_result(task: PageRange, future) -> Tuple[PageRange, List[Document], Optional[Exception]]:
+    try:
+        return task, future.result(), None
+    except Exception as e:
+        return task, [], e
+
+def _iter_parsed_ranges(tasks: Sequence[PageRange],
+                        workers: int) -> Iterator[Tuple[PageRange, List[Document], Optional[Exception]]]:
+    """(plage, pages, erreur) dans l'ordre des tâches ; seules 2 tâches par processus sont en vol."""
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            try:
+                yield task, _parse_page_range(task), None
+            except Exception as e:
+                yield task, [], e
+        return
+
+    # spawn : un fork copierait les threads (job d'ingestion, préchargement) et connexions du parent
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append((task, pool.submit(_parse_page_range, task)))
+            if len(pending) >= 2 * workers:
+                yield _range_result(*pending.popleft())
+        while pending:
+            yield _range_result(*pending.popleft())
+
+def iter_pdf_files(file_paths: Sequence[str], workers: Optional[int] = None,
+                   pages_per_task: Optional[int] = None, on_error: Optional[OnParseError] = None,
+                   page_counts: Optional[Dict[str, int]] = None) -> Iterator[Document]:
+    """
+    Produit les pages de plusieurs PDF au fil de l'analyse, réalisée en parallèle (ProcessPoolExecutor).
+    L'ordre est déterministe (fichiers dans l'ordre donné, puis pages croissantes) et la mémoire
+    ne dépend pas de la taille de la bibliothèque.
+    Les fichiers présents dans le cache de pages (même contenu, même version de l'analyseur) ne
+    sont pas analysés ; les autres y sont ajoutés une fois toutes leurs pages extraites.
+    Un fichier illisible ou une plage de pages en échec est signalé à on_error(fichier, erreur),
+    avant les pages du fichier suivant ; les pages lues des autres plages sont tout de même produites.
+    page_counts évite de rouvrir les fichiers dont l'appelant a déjà compté les pages.
+    """
+    workers = workers or settings.PDF_PARSE_WORKERS or os.cpu_count() or 1
+    cache = open_page_cache()
+
+    hashes = {}
+    to_parse = []
+    for file_path in file_paths:
+        if cache is not None:
+            try:
+                hashes[file_path] = file_sha256(file_path)
+            except OSError:
+                pass
+        if file_path in hashes and cache.contains(hashes[file_path]):
+            continue
+        to_parse.append(file_path)
+
+    parsed = _iter_parsed_ranges(
+        plan_page_ranges(to_parse, pages_per_task or settings.PDF_PAGES_PER_TASK, on_error, page_counts), workers
+    )
+    current = next(parsed, None)
+    for file_path in file_paths:
+        if file_path not in to_parse:
+            pages = cache.get(hashes[file_path], file_path)
+            if pages is not None:
+                PAGE_CACHE_HITS.inc()
+                yield from pages
+                continue
+            # Entrée illisible : analyse de ce seul fichier, hors du plan
+            try:
+                pages = _parse_page_range((file_path, 0, count_pdf_pages(file_path)))
+            except Exception as e:
+                _report_parse_error(file_path, e, on_error)
+                continue
+            yield from pages
+            continue
+
+        if cache is not None:
+            PAGE_CACHE_MISSES.inc()
+        writer = cache.writer(hashes[file_path]) if file_path in hashes else None
+        # Fichier illisible ou plage en échec : rien n'est mis en cache, il sera réessayé
+        complete = current is not None and current[0][0] == file_path
+        finished = False
+        try:
+            while current is not None and current[0][0] == file_path:
+                (_, start, stop), pages, error = current
+                if error is not None:
+                    _report_parse_error(file_path, error, on_error, f" pages {start}-{stop}")
+                complete = complete and error is None and len(pages) == stop - start
+                if writer is not None:
+                    writer.add(pages)
+                yield from pages
+                current = next(parsed, None)
+            finished = True
+        finally:
+            if writer is not None:
+                if finished and complete:
+                    writer.commit()
+                else:
+                    writer.abort()
+
+def load_pdf_files(file_paths: Sequence[str], workers: Optional[int] = None,
+                   pages_per_task: Optional[int] = None) -> List[Document]:
+    """Charge toutes les pages de plusieurs PDF en parallèle (voir iter_pdf_files)."""
+    workers = workers or settings.PDF_PARSE_WORKERS or os.cpu_count() or 1
+    start = time.perf_counter()
+    documents = list(iter_pdf_files(file_paths, workers, pages_per_task))
+    logger.info(
+        f"Parsed {len(documents)} pages from {len(file_paths)} PDFs with {workers} "
+        f"workers in {time.perf_counter() - start:.2f}s"
+    )
+    return documents
@@ -0,0 +1,154 @@
+# qdrant_manager.py
+
+import functools
+import threading
+from typing import Optional
+
+import grpc
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException
+
+from app.config import settings
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+# Erreurs de transport (connexion coupée, serveur redémarré...) qui justifient une reconnexion.
+# Seules celles du client Qdrant : il enveloppe les erreurs httpx dans ResponseHandlingException,
+# un httpx.TransportError / ConnectionError nu vient d'ailleurs (embeddings Ollama) et ne doit pas
+# faire recréer le client ni relancer la recherche.
+CONNECTION_ERRORS = (ResponseHandlingException, grpc.RpcError)
+
+
+class QdrantClientManager:
+    """
+    Client Qdrant partagé par tout le processus.
+
+    Le client garde ses connexions HTTP (pool httpx keep-alive) ou son canal gRPC ouverts entre
+    les requêtes ; il est recréé uniquement après une erreur de transport.
+    """
+
+    def __init__(self):
+        self._client: Optional[QdrantClient] = None
+        self._async_client: Optional[AsyncQdrantClient] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _client_options() -> dict:
+        return dict(
+            url=settings.QDRANT_URL,
+            api_key=settings.QDRANT_API_KEY,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            grpc_options={
+                "grpc.keepalive_time_ms": settings.QDRANT_KEEPALIVE_MS,
+                "grpc.keepalive_permit_without_calls": 1,
+            },
+            timeout=settings.QDRANT_TIMEOUT,
+            pool_size=settings.QDRANT_POOL_SIZE,
+        )
+
+    def _create_client(self) -> QdrantClient:
+        logger.info(
+            f"Connecting to Qdrant at {settings.QDRANT_URL} "
+            f"({'gRPC' if settings.QDRANT_PREFER_GRPC else 'HTTP'})"
+        )
+        return QdrantClient(**self._client_options())
+
+    def get_async_client(self) -> AsyncQdrantClient:
+        """Client asynchrone partagé, utilisé par le chemin de recherche async."""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = AsyncQdrantClient(**self._client_options())
+        return self._async_client
+
+    def get_client(self) -> QdrantClient:
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._create_client()
+                client = self._client
+        return client
+
+    def reconnect(self) -> QdrantClient:
+        """Ferme le client courant et en ouvre un nouveau."""
+        with self._lock:
+            self._close_locked()
+            self._client = self._create_client()
+            return self._client
+
+    def health_check(self) -> bool:
+        """Vérifie que Qdrant répond ; tente une reconnexion en cas d'erreur de transport."""
+        try:
+            self.get_client().get_collections()
+            return True
+        except CONNECTION_ERRORS as e:
+            logger.warning(f"Qdrant health check failed, reconnecting: {e}")
+        try:
+            self.reconnect().get_collections()
+            return True
+        except Exception as e:
+            logger.error(f"Qdrant unavailable: {e}")
+            return False
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+            self._async_client = None
+
+    async def aclose(self):
+        async_client, self._async_client = self._async_client, None
+        if async_client is not None:
+            await async_client.close()
+        self.close()
+
+    def _close_locked(self):
+        if self._client is not None:
+            try:
+                self._client.close()
+            except Exception as e:
+                logger.warning(f"Error while closing Qdrant client: {e}")
+            self._client = None
+
+
+_manager = QdrantClientManager()
+
+
+def get_qdrant_client() -> QdrantClient:
+    """Retourne le client Qdrant partagé du processus."""
+    return _manager.get_client()
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """Retourne le client Qdrant asynchrone partagé du processus."""
+    return _manager.get_async_client()
+
+
+def qdrant_health_check() -> bool:
+    return _manager.health_check()
+
+
+def close_qdrant_client():
+    _manager.close()
+
+
+async def aclose_qdrant_clients():
+    await _manager.aclose()
+
+
+def with_reconnect(func):
+    """
+    Relance une fois l'appel après reconnexion si Qdrant a coupé la connexion
+    (redémarrage du serveur, keep-alive expiré côté proxy...).
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except CONNECTION_ERRORS as e:
+            logger.warning(f"Qdrant connection error in {func.__name__}, reconnecting: {e}")
+            _manager.reconnect()
+            return func(*args, **kwargs)
+    return wrapper
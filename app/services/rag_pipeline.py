@@ -1,19 +1,35 @@
 # app/services/rag_pipeline.py - Déjà bon avec vos modifications
-from langchain_core.runnables import RunnablePassthrough, RunnableParallel
+from langchain_core.runnables import ConfigurableField, RunnablePassthrough, RunnableParallel
 from langchain_core.output_parsers import StrOutputParser
 from app.services.prompt import get_prompt
 from app.services.llm import create_llm
-from app.services.vector_store import store_embeddings
-from app.services.chunking import split_documents
-from app.services.pdf_loader import load_pdf
+from app.services.ingestion import ingest_documents
 from app.services.utils import format_docs
 from app.utils.logger import AppLogger
+from app.config import settings
 from app.services.retriever import create_retriever
 
 logger = AppLogger.get_logger(__name__)
 
+RETRIEVER_FILTERS_CONFIG_ID = "retriever_filters"
+RETRIEVER_DIVERSITY_CONFIG_ID = "retriever_diversity"
+
 def create_rag_chain(retriever, llm):
     prompt = get_prompt()
+
+    # Réglages par requête : chain.invoke(q, config={"configurable": {"retriever_filters": {...}}})
+    retriever = retriever.configurable_fields(
+        filters=ConfigurableField(
+            id=RETRIEVER_FILTERS_CONFIG_ID,
+            name="Retriever filters",
+            description="Restriction par manuel (source), chapitre, section ou plage de pages"
+        ),
+        diversity=ConfigurableField(
+            id=RETRIEVER_DIVERSITY_CONFIG_ID,
+            name="Context diversity",
+            description="Suppression des quasi-doublons : none, shingle ou mmr"
+        )
+    )
     
     rag_chain_from_docs = (
         RunnablePassthrough.assign(context=(lambda x: format_docs(x["context"])))
@@ -35,16 +51,10 @@ def initialize_rag_system(force_recreate_db=False, retriever_top_k: int = 5, ret
     logger.info("INITIALIZING RAG SYSTEM")
 
     if force_recreate_db:
-        logger.info("Loading documents...")
-        documents = load_pdf()
-        print(f"🚩==========> nb_documents_loaded : ", len(documents))
-        
-        logger.info(f"Splitting {len(documents)} documents...")
-        chunks = split_documents(documents)
-        print(f"🚩==========> nb_chunks_created : ", len(chunks))
-        
-        logger.info("Storing embeddings in Qdrant...")
-        store_embeddings(chunks)
+        # Ingestion incrémentale : seuls les fichiers et chunks nouveaux ou modifiés sont vectorisés
+        logger.info(f"Ingesting documents ({settings.VECTOR_BACKEND} backend)...")
+        stats = ingest_documents()
+        logger.info("Ingestion stats: %s", stats)
     else:
         logger.info("Skipping document loading (force_recreate_db=False). Assuming VectorDB is populated.")
 
@@ -0,0 +1,151 @@
+# reranker.py
+
+import os
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+except ImportError:
+    ort = None
+    Tokenizer = None
+
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+from app.config import settings
+from app.metrics import RAG_RERANK_TIME
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+# Gardé seulement une fois chargé : un échec (Hub injoignable...) est retenté après RERANKER_RETRY_SECONDS
+_reranker: Optional["CrossEncoderReranker"] = None
+_retry_at = 0.0
+_reranker_lock = threading.Lock()
+
+
+class CrossEncoderReranker:
+    """
+    Cross-encoder ONNX exécuté sur CPU (modèle quantifié int8), par lots.
+
+    Le modèle lit chaque paire (question, chunk) en entier, ce qui classe bien mieux que la
+    fusion hybride : on peut alors n'envoyer que 2-3 chunks au LLM au lieu de 5.
+    """
+
+    def __init__(self, session, tokenizer, batch_size: int = 16):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self._input_names = {i.name for i in session.get_inputs()}
+
+    @classmethod
+    def from_files(cls, model_path: str, tokenizer_path: str, max_length: int = 256,
+                   batch_size: int = 16, num_threads: int = 0) -> "CrossEncoderReranker":
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+        tokenizer = Tokenizer.from_file(tokenizer_path)
+        tokenizer.enable_truncation(max_length=max_length)
+        tokenizer.enable_padding()
+        return cls(session, tokenizer, batch_size=batch_size)
+
+    def score(self, query: str, passages: List[str]) -> np.ndarray:
+        """Scores de pertinence pour un lot de passages."""
+        encodings = self.tokenizer.encode_batch([(query, passage) for passage in passages])
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = self.session.run(None, {k: v for k, v in inputs.items() if k in self._input_names})[0]
+        logits = np.asarray(logits, dtype=np.float32).reshape(len(passages), -1)
+        return logits[:, -1]
+
+    def rerank(self, query: str, documents: List[Document], top_k: int,
+               budget_ms: Optional[float] = None) -> List[Document]:
+        """
+        Réordonne les documents par score du cross-encoder et garde les top_k.
+        Si le budget de latence est épuisé, les lots restants ne sont pas scorés et
+        gardent leur rang d'origine, après les documents scorés.
+        """
+        if not documents:
+            return []
+
+        start = time.perf_counter()
+        scores: List[float] = []
+        for i in range(0, len(documents), self.batch_size):
+            if budget_ms is not None and scores and (time.perf_counter() - start) * 1000 > budget_ms:
+                logger.warning(f"Rerank budget of {budget_ms}ms exhausted after {len(scores)} documents")
+                break
+            batch = documents[i:i + self.batch_size]
+            scores.extend(self.score(query, [doc.page_content for doc in batch]).tolist())
+
+        order = sorted(range(len(scores)), key=lambda idx: scores[idx], reverse=True)
+        ranked = [documents[idx] for idx in order] + documents[len(scores):]
+
+        elapsed = time.perf_counter() - start
+        RAG_RERANK_TIME.observe(elapsed)
+        logger.info(f"Reranked {len(scores)}/{len(documents)} documents in {elapsed * 1000:.1f}ms")
+        return ranked[:top_k]
+
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """
+    Cross-encoder configuré (RERANKER_MODEL), chargé au premier appel ; None si le reranking est
+    désactivé, si onnxruntime / tokenizers ne sont pas installés ou si le chargement a échoué
+    (nouvelle tentative au premier appel après RERANKER_RETRY_SECONDS).
+    """
+    global _reranker, _retry_at
+    if not settings.RETRIEVAL_RERANKING:
+        return None
+    if _reranker is not None:
+        return _reranker
+
+    with _reranker_lock:
+        if _reranker is None and time.monotonic() >= _retry_at:
+            _reranker = _load_reranker()
+            if _reranker is None:
+                _retry_at = time.monotonic() + settings.RERANKER_RETRY_SECONDS
+        return _reranker
+
+
+def reset_reranker():
+    global _reranker, _retry_at
+    with _reranker_lock:
+        _reranker, _retry_at = None, 0.0
+
+
+def _load_reranker() -> Optional[CrossEncoderReranker]:
+    if ort is None or Tokenizer is None:
+        logger.warning("Reranking enabled but onnxruntime/tokenizers are not installed, skipping rerank stage")
+        return None
+
+    try:
+        if os.path.isdir(settings.RERANKER_MODEL):
+            model_path = os.path.join(settings.RERANKER_MODEL, settings.RERANKER_ONNX_FILE)
+            tokenizer_path = os.path.join(settings.RERANKER_MODEL, "tokenizer.json")
+        else:
+            from huggingface_hub import hf_hub_download
+            model_path = hf_hub_download(settings.RERANKER_MODEL, settings.RERANKER_ONNX_FILE)
+            tokenizer_path = hf_hub_download(settings.RERANKER_MODEL, "tokenizer.json")
+
+        logger.info(f"Loading cross-encoder reranker: {settings.RERANKER_MODEL} ({settings.RERANKER_ONNX_FILE})")
+        return CrossEncoderReranker.from_files(
+            model_path,
+            tokenizer_path,
+            max_length=settings.RERANKER_MAX_LENGTH,
+            batch_size=settings.RERANKER_BATCH_SIZE,
+            num_threads=settings.RERANKER_NUM_THREADS
+        )
+    except Exception as e:
+        logger.error(f"Failed to load reranker, skipping rerank stage: {e}")
+        return None
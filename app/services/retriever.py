@@ -1,16 +1,22 @@
 # app/services/retriever.py - Déjà bon
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 try:
-    from langchain_core.callbacks import CallbackManagerForRetrieverRun
+    from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
     from langchain_core.retrievers import BaseRetriever
     from langchain_core.documents import Document
+    from langchain_core.runnables import RunnableConfig
 except ImportError:
-    from langchain.callbacks.manager import CallbackManagerForRetrieverRun
+    from langchain.schema.runnable import RunnableConfig
+    from langchain.callbacks.manager import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
     from langchain.schema.retriever import BaseRetriever
     from langchain.schema import Document
 
 import mlflow
-from app.services.vector_store import search_hybrid
+from app.config import settings
+from app.services.blocking import run_blocking
+from app.services.diversity import diversify
+from app.services.reranker import get_reranker
+from app.services.vector_store import asearch_hybrid, search_hybrid, search_hybrid_batch
 from app.utils.logger import AppLogger
 
 logger = AppLogger.get_logger(__name__)
@@ -21,6 +27,29 @@ class HybridRetriever(BaseRetriever):
     """
     top_k: int = 5
     alpha: float = 0.7
+    rerank: bool = True
+    filters: Optional[Dict] = None
+    diversity: Optional[str] = None
+
+    def _pool_size(self, top_k: int) -> int:
+        """Le MMR choisit parmi un vivier plus large ; la suppression de doublons ne fait que retirer"""
+        if (self.diversity or settings.DIVERSITY_MODE) == "mmr":
+            return top_k * settings.DIVERSITY_CANDIDATE_FACTOR
+        return top_k
+
+    def _fetch_size(self, reranker) -> int:
+        # Reranking : on récupère plus de candidats, le cross-encoder ne garde que les top_k meilleurs
+        if reranker is not None:
+            return max(settings.RERANK_CANDIDATES, self._pool_size(self.top_k))
+        return self._pool_size(self.top_k)
+
+    def _postprocess(self, query: str, candidates: List[Document], reranker) -> List[Document]:
+        """Reranking éventuel puis suppression des quasi-doublons"""
+        if reranker is not None:
+            candidates = reranker.rerank(
+                query, candidates, top_k=self._pool_size(self.top_k), budget_ms=settings.RERANK_BUDGET_MS
+            )
+        return diversify(candidates, self.top_k, self.diversity)
 
     def _get_relevant_documents(
         self, query: str, *, run_manager: CallbackManagerForRetrieverRun
@@ -28,21 +57,87 @@ class HybridRetriever(BaseRetriever):
         try:
             logger.info(f"Hybrid search for query: {query}")
 
-            results = search_hybrid(
+            reranker = get_reranker() if self.rerank else None
+            candidates = search_hybrid(
                 query=query,
-                top_k=self.top_k,
-                alpha=self.alpha
+                top_k=self._fetch_size(reranker),
+                alpha=self.alpha,
+                filters=self.filters
             )
-
-            return results
+            return self._postprocess(query, candidates, reranker)
 
         except Exception as e:
             logger.error(f"Error in hybrid retrieval: {e}")
             return []
 
-def create_retriever(top_k: int = 5, alpha: float = 0.7) -> HybridRetriever:
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        try:
+            logger.info(f"Async hybrid search for query: {query}")
+
+            # Premier appel : téléchargement du modèle et session ONNX, hors de la boucle d'événements
+            reranker = await run_blocking(get_reranker) if self.rerank else None
+            candidates = await asearch_hybrid(
+                query=query,
+                top_k=self._fetch_size(reranker),
+                alpha=self.alpha,
+                filters=self.filters
+            )
+            if reranker is None:
+                return self._postprocess(query, candidates, None)
+            # Inférence CPU : hors de la boucle d'événements
+            return await run_blocking(self._postprocess, query, candidates, reranker)
+
+        except Exception as e:
+            logger.error(f"Error in async hybrid retrieval: {e}")
+            return []
+
+    def batch(
+        self,
+        inputs: List[str],
+        config: Optional[RunnableConfig | List[RunnableConfig]] = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[List[Document]]:
+        """
+        Recherche groupée : un seul appel d'embedding et une seule requête Qdrant pour tout le lot
+        (search_hybrid_batch) au lieu d'un aller-retour par question.
+        """
+        if not inputs:
+            return []
+        try:
+            logger.info(f"Batched hybrid search for {len(inputs)} queries")
+
+            reranker = get_reranker() if self.rerank else None
+            results = search_hybrid_batch(
+                list(inputs),
+                top_k=self._fetch_size(reranker),
+                alpha=self.alpha,
+                filters=self.filters
+            )
+            return [self._postprocess(query, candidates, reranker) for query, candidates in zip(inputs, results)]
+
+        except Exception as e:
+            logger.error(f"Error in batched hybrid retrieval: {e}")
+            return [[] for _ in inputs]
+
+    async def abatch(
+        self,
+        inputs: List[str],
+        config: Optional[RunnableConfig | List[RunnableConfig]] = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[List[Document]]:
+        return await run_blocking(self.batch, inputs, config, return_exceptions=return_exceptions, **kwargs)
+
+def create_retriever(top_k: int = 5, alpha: float = 0.7, rerank: Optional[bool] = None) -> HybridRetriever:
     """
     Crée et retourne une instance de HybridRetriever.
     """
-    logger.info(f"Creating HybridRetriever with top_k={top_k}, alpha={alpha}")
-    return HybridRetriever(top_k=top_k, alpha=alpha)
\ No newline at end of file
+    if rerank is None:
+        rerank = settings.RETRIEVAL_RERANKING
+    logger.info(f"Creating HybridRetriever with top_k={top_k}, alpha={alpha}, rerank={rerank}")
+    return HybridRetriever(top_k=top_k, alpha=alpha, rerank=rerank)
\ No newline at end of file
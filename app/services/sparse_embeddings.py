@@ -0,0 +1,63 @@
+# sparse_embeddings.py
+
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import List
+
+from langchain_qdrant import SparseEmbeddings, SparseVector
+
+from app.services.text_analyzer import analyze
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+
+def term_index(term: str) -> int:
+    """Indice stable (uint32) d'un terme dans l'espace des vecteurs creux."""
+    return zlib.crc32(term.encode("utf-8"))
+
+
+class BM25SparseEmbeddings(SparseEmbeddings):
+    """
+    Vecteurs creux de type BM25 calculés avec l'analyseur français.
+
+    Côté document, chaque terme porte sa saturation TF BM25 ; l'IDF est appliqué par Qdrant
+    (modifier=IDF sur le vecteur creux), ce qui garde les poids valides quand le corpus évolue.
+    Côté requête, chaque terme distinct vaut 1.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 200.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    def _embed_document(self, text: str) -> SparseVector:
+        terms = analyze(text)
+        norm = self.k1 * (1 - self.b + self.b * len(terms) / self.avg_doc_length)
+
+        weights = {}
+        for term, tf in Counter(terms).items():
+            idx = term_index(term)
+            weights[idx] = weights.get(idx, 0.0) + tf * (self.k1 + 1) / (tf + norm)
+
+        return SparseVector(indices=list(weights), values=list(weights.values()))
+
+    def embed_documents(self, texts: List[str]) -> List[SparseVector]:
+        return [self._embed_document(text) for text in texts]
+
+    def embed_query(self, text: str) -> SparseVector:
+        indices = sorted({term_index(term) for term in analyze(text)})
+        return SparseVector(indices=indices, values=[1.0] * len(indices))
+
+
+@lru_cache()
+def get_sparse_embedding_function() -> BM25SparseEmbeddings:
+    from app.config import settings
+
+    logger.info("Loading BM25 sparse embeddings (french analyzer)")
+    return BM25SparseEmbeddings(
+        k1=settings.BM25_K1,
+        b=settings.BM25_B,
+        avg_doc_length=settings.SPARSE_AVG_DOC_LENGTH
+    )
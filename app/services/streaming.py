@@ -0,0 +1,75 @@
+# streaming.py
+
+import itertools
+import queue
+import threading
+from typing import Iterable, Iterator, List, TypeVar
+
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+T = TypeVar("T")
+
+# Délai de réveil d'un producteur bloqué sur une file pleine, pour qu'il voie l'arrêt du consommateur
+_PUT_TIMEOUT = 0.1
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Regroupe un flux en listes d'au plus `size` éléments."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def prefetch(iterable: Iterable[T], maxsize: int, name: str = "stage") -> Iterator[T]:
+    """
+    Consomme `iterable` dans un thread dédié et expose ses éléments via une file bornée.
+
+    Les étapes d'un pipeline chaîné ainsi se recouvrent (analyse, embedding, écriture) tandis que
+    la file limite l'avance du producteur à `maxsize` éléments : la mémoire reste constante quel
+    que soit le volume traité. Une exception du producteur est relancée chez le consommateur.
+    """
+    items: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+
+    thread = threading.Thread(target=produce, name=f"prefetch-{name}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        # Consommateur arrêté (fin, erreur ou abandon) : le producteur s'interrompt au prochain put
+        stopped.set()
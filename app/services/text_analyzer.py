@@ -0,0 +1,66 @@
+# text_analyzer.py
+
+import re
+import unicodedata
+from typing import List
+
+# Mots vides français (forme sans accents, en minuscules)
+FRENCH_STOPWORDS = frozenset("""
+a ai aie aient aies ait alors as au aucun aucune aupres auquel aura aurai auraient aurais aurait
+auras aurez auriez aurions aurons auront aussi autre autres aux avaient avais avait avant avec
+avez aviez avions avoir avons ayant ayez ayons c ca car ce ceci cela celle celles celui cependant
+ces cet cette ceux chaque chez ci comme comment d dans de des donc dont du elle elles en encore
+entre es est et etaient etais etait etant ete etes etiez etions etre eu eue eues eurent eus
+eusse eut eux fait faut fois furent fus fut ici il ils j je jusqu l la le les leur leurs lors
+lorsque lui m ma mais me meme memes mes moi moins mon n ne ni non nos notre nous on ont ou par
+parce pas peu peut plus pour pourquoi qu quand que quel quelle quelles quels qui quoi s sa sans
+se sera serai seraient serais serait seras serez seriez serions serons seront ses si sinon soi
+soient sois soit sommes son sont sous soyez soyons suis sur t ta te tes toi ton tous tout toute
+toutes tres tu un une unes uns vos votre vous y
+""".split())
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MIN_TOKEN_LENGTH = 2
+
+
+def fold_accents(text: str) -> str:
+    """Supprime les accents (é -> e, ç -> c) et met en minuscules."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def light_stem(token: str) -> str:
+    """
+    Racinisation légère du français (pluriels, féminins, infinitifs en -er).
+    Volontairement conservatrice pour ne pas fusionner des termes techniques distincts.
+    """
+    if token.isdigit() or len(token) <= 3:
+        return token
+
+    if len(token) > 4 and token.endswith("aux"):
+        token = token[:-3] + "al"
+    elif token.endswith(("s", "x")):
+        token = token[:-1]
+
+    if len(token) > 5 and token.endswith(("ee", "er", "ez")):
+        token = token[:-2]
+    elif len(token) > 4 and token.endswith("e"):
+        token = token[:-1]
+
+    return token
+
+
+def analyze(text: str) -> List[str]:
+    """
+    Analyseur français : minuscules, suppression des accents, mots vides et racinisation légère.
+    Utilisé à l'indexation comme à la requête pour garantir des termes comparables.
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(fold_accents(text)):
+        token = token.strip("_")
+        if len(token) < MIN_TOKEN_LENGTH and not token.isdigit():
+            continue
+        if token in FRENCH_STOPWORDS:
+            continue
+        terms.append(light_stem(token))
+    return terms
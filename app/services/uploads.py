@@ -0,0 +1,76 @@
+# uploads.py
+
+import os
+import re
+import uuid
+from typing import AsyncIterable, Optional
+
+from app.config import settings
+from app.services.pdf_loader import DATA_PATH
+from app.utils.logger import AppLogger
+
+logger = AppLogger.get_logger(__name__)
+
+PDF_MAGIC = b"%PDF-"
+
+_UNSAFE_CHARS = re.compile(r"[^\w.\- ]")
+
+
+class UploadRejected(ValueError):
+    """Téléversement refusé ; status_code est le code HTTP à renvoyer."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sanitize_pdf_filename(filename: str) -> str:
+    """Nom de fichier sûr dans DATA_PATH : sans chemin, sans caractères spéciaux, extension .pdf."""
+    name = _UNSAFE_CHARS.sub("_", os.path.basename(filename.replace("\\", "/"))).strip(" .")
+    if not name.lower().endswith(".pdf") or len(name) <= len(".pdf"):
+        raise UploadRejected(f"Invalid PDF file name: {filename!r}")
+    return name
+
+
+async def save_pdf_upload(chunks: AsyncIterable[bytes], filename: str, data_path: str = DATA_PATH,
+                          overwrite: bool = False, max_bytes: Optional[int] = None) -> str:
+    """
+    Écrit le flux reçu dans `data_path` au fil de l'eau : seul le morceau en cours est en mémoire.
+
+    Le fichier est d'abord écrit sous un nom caché (ignoré par list_pdf_files), puis renommé
+    atomiquement : l'ingestion et le cache du corpus ne voient jamais un PDF incomplet.
+    Retourne le chemin du fichier enregistré.
+    """
+    name = sanitize_pdf_filename(filename)
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    os.makedirs(data_path, exist_ok=True)
+    path = os.path.join(os.path.abspath(data_path), name)
+    if os.path.exists(path) and not overwrite:
+        raise UploadRejected(f"{name} already exists", status_code=409)
+
+    tmp = os.path.join(os.path.dirname(path), f".{name}.{uuid.uuid4().hex}.part")
+    size = 0
+    header = b""
+    try:
+        with open(tmp, "wb") as f:
+            async for chunk in chunks:
+                if len(header) < len(PDF_MAGIC):
+                    header += chunk[:len(PDF_MAGIC) - len(header)]
+                    if not PDF_MAGIC.startswith(header):
+                        raise UploadRejected("Uploaded file is not a PDF", status_code=415)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(f"File exceeds {max_bytes} bytes", status_code=413)
+                f.write(chunk)
+        if header != PDF_MAGIC:
+            raise UploadRejected("Uploaded file is not a PDF", status_code=415)
+        if os.path.exists(path) and not overwrite:
+            raise UploadRejected(f"{name} already exists", status_code=409)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    logger.info(f"Uploaded {path} ({size} bytes)")
+    return path
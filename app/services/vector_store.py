@@ -1,14 +1,32 @@
 # app/services/vector_store.py
 
 from langchain_qdrant import QdrantVectorStore
-from qdrant_client import QdrantClient
 from qdrant_client.http.models import Distance, VectorParams
 from qdrant_client.http import models
+from app.services.blocking import run_blocking
 from app.services.embeddings import get_embedding_function
+from app.services.embedding_cache import aembed_query_cached, embed_queries_cached, embed_query_cached
+from app.services.chunking import compute_chunk_id
+from app.metrics import RAG_FUSION_DUPLICATES
+from app.services.sparse_embeddings import get_sparse_embedding_function
+from app.services.bm25_index import BM25Index, load_bm25_index, open_bm25_index
+from app.services.collection_versions import (
+    activate_collection_version, drop_collection_version, get_active_collection, get_alias, get_keyword_index_path,
+    new_collection_version, resolve_alias
+)
+from app.services.local_vector_index import LocalVectorIndex, open_local_vector_index
+from app.services.streaming import batched, prefetch
+from app.services.qdrant_manager import get_qdrant_client, get_async_qdrant_client, with_reconnect
 from app.config import settings
 from app.utils.logger import AppLogger
-from typing import List, Optional, Dict, Tuple
-import uuid
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import asyncio
+import itertools
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
 try:
     from langchain_core.documents import Document
@@ -20,160 +38,774 @@ except ImportError:
 
 logger = AppLogger.get_logger(__name__)
 
-def create_qdrant_collection():
-    """Crée la collection Qdrant si elle n'existe pas"""
-    client = QdrantClient(url=settings.QDRANT_URL)
+DENSE_VECTOR_NAME = "dense"
+SPARSE_VECTOR_NAME = "sparse"
+
+# Index de payload pour le filtrage (manuel, chapitre, section, plage de pages)
+PAYLOAD_INDEXES = {
+    "metadata.source": models.PayloadSchemaType.KEYWORD,
+    "metadata.chapter": models.PayloadSchemaType.KEYWORD,
+    "metadata.section": models.PayloadSchemaType.KEYWORD,
+    "metadata.page": models.PayloadSchemaType.INTEGER,
+}
+
+_vector_store = None
+
+# Reconstructions différées de l'index BM25 : un seul thread, au plus une en attente par collection
+_keyword_rebuild_executor: Optional[ThreadPoolExecutor] = None
+_keyword_rebuilds_pending = set()
+_keyword_rebuild_lock = threading.Lock()
+# Une seule construction BM25 à la fois par processus (réentrant : rebuild_keyword_index le reprend)
+_keyword_build_lock = threading.RLock()
+
+def uses_keyword_index() -> bool:
+    """L'index BM25 local n'est lu que par la fusion côté client (HYBRID_FUSION="client" ou index local)"""
+    return settings.HYBRID_FUSION == "client" or settings.VECTOR_BACKEND == "local"
+
+def create_payload_indexes(client, collection_name: str):
+    """Crée les index de payload utilisés par les recherches filtrées (idempotent)"""
+    for field_name, field_schema in PAYLOAD_INDEXES.items():
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=field_schema
+        )
+
+def build_quantization_config(mode: Optional[str] = None) -> Optional[models.QuantizationConfig]:
+    """Quantification des vecteurs denses : "scalar" (int8, 4x moins de mémoire), "binary" (32x) ou "none" """
+    mode = (mode or settings.QDRANT_QUANTIZATION).lower()
+    if mode == "none":
+        return None
+    if mode == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=0.99,
+            always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM
+        ))
+    if mode == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(
+            always_ram=settings.QDRANT_QUANTIZATION_ALWAYS_RAM
+        ))
+    raise ValueError(f"Unknown QDRANT_QUANTIZATION mode: {mode}")
+
+def build_dense_vector_params(size: int, quantization: Optional[str] = None) -> VectorParams:
+    """Paramètres du vecteur dense : originaux éventuellement sur disque, graphe HNSW réglable"""
+    return VectorParams(
+        size=size,
+        distance=Distance.COSINE,
+        on_disk=settings.QDRANT_ON_DISK_VECTORS,
+        hnsw_config=models.HnswConfigDiff(
+            m=settings.QDRANT_HNSW_M,
+            ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+            on_disk=settings.QDRANT_HNSW_ON_DISK
+        ),
+        quantization_config=build_quantization_config(quantization)
+    )
+
+def build_search_params(hnsw_ef: Optional[int] = None, oversampling: Optional[float] = None) -> models.SearchParams:
+    """
+    Paramètres de recherche dense. Avec un vecteur quantifié, Qdrant récupère
+    oversampling * limit candidats sur les vecteurs compressés puis les rescore avec les originaux.
+    """
+    quantization = None
+    if settings.QDRANT_QUANTIZATION.lower() != "none":
+        quantization = models.QuantizationSearchParams(
+            rescore=settings.QDRANT_SEARCH_RESCORE,
+            oversampling=oversampling if oversampling is not None else settings.QDRANT_SEARCH_OVERSAMPLING
+        )
+    return models.SearchParams(
+        hnsw_ef=hnsw_ef if hnsw_ef is not None else settings.QDRANT_SEARCH_HNSW_EF,
+        quantization=quantization
+    )
+
+@with_reconnect
+def create_qdrant_collection(collection_name: Optional[str] = None):
+    """Crée la collection Qdrant si elle n'existe pas (par défaut la version active, voir collection_versions)"""
+    client = get_qdrant_client()
+    collection_name = collection_name or get_active_collection()
     
     collections = client.get_collections()
-    if settings.QDRANT_COLLECTION_NAME in [c.name for c in collections.collections]:
-        logger.info(f"Collection '{settings.QDRANT_COLLECTION_NAME}' existe déjà")
+    if collection_name in [c.name for c in collections.collections]:
+        logger.info(f"Collection '{collection_name}' existe déjà")
+        create_payload_indexes(client, collection_name)
         return True
     
     embeddings = get_embedding_function()
     test_embedding = embeddings.embed_query("test")
     
+    # Vecteurs denses et creux (BM25, IDF appliqué par Qdrant) côte à côte pour la recherche hybride.
+    # Quantification / stockage disque / HNSW ne s'appliquent qu'à la création : recréer la collection pour en changer.
     client.create_collection(
-        collection_name=settings.QDRANT_COLLECTION_NAME,
-        vectors_config=VectorParams(
-            size=len(test_embedding),
-            distance=Distance.COSINE
-        )
+        collection_name=collection_name,
+        vectors_config={
+            DENSE_VECTOR_NAME: build_dense_vector_params(len(test_embedding))
+        },
+        sparse_vectors_config={
+            SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)
+        }
     )
+    create_payload_indexes(client, collection_name)
     
-    logger.info(f"Collection '{settings.QDRANT_COLLECTION_NAME}' créée")
+    logger.info(
+        f"Collection '{collection_name}' créée "
+        f"(quantization={settings.QDRANT_QUANTIZATION}, on_disk={settings.QDRANT_ON_DISK_VECTORS})"
+    )
     return True
 
-def store_embeddings(chunks: List[Document]):
-    """Stocke les embeddings dans Qdrant"""
+def init_qdrant_collection():
+    """Au démarrage : garantit une collection servie derrière l'alias QDRANT_COLLECTION_NAME.
+    Sur une installation neuve, une première version (vide) est créée puis l'alias est posé dessus :
+    les ingestions suivantes ne basculent plus que l'alias, sans jamais supprimer la collection servie.
+    """
+    client = get_qdrant_client()
+    if resolve_alias() is not None or client.collection_exists(get_alias()):
+        # Alias existant, ou collection antérieure aux versions (remplacée à la première reconstruction)
+        return create_qdrant_collection()
+
+    version = new_collection_version()
+    create_qdrant_collection(version)
     try:
-        create_qdrant_collection()
-        
-        embeddings = get_embedding_function()
-        
-        # Stocker avec LangChain
-        QdrantVectorStore.from_documents(
-            documents=chunks,
-            embedding=embeddings,
-            url=settings.QDRANT_URL,
-            collection_name=settings.QDRANT_COLLECTION_NAME,
-            force_recreate=False
+        activate_collection_version(version)
+    except Exception:
+        if resolve_alias() is None:
+            raise
+        # Une autre réplique démarrée en même temps a posé l'alias la première
+        logger.info(f"Alias '{get_alias()}' created concurrently, dropping '{version}'")
+        drop_collection_version(version)
+    return True
+
+def get_chunk_id(doc: Document) -> str:
+    """Identifiant stable d'un chunk, calculé à l'ingestion (split_documents) ou à défaut recalculé"""
+    chunk_id = doc.metadata.get('chunk_id')
+    if chunk_id:
+        return chunk_id
+    return compute_chunk_id(doc.metadata.get('source', 'unknown'), doc.metadata.get('page', 1), doc.page_content)
+
+DeleteIds = Union[Sequence[str], Callable[[], Sequence[str]], None]
+
+def _resolve_delete_ids(delete_ids: DeleteIds) -> List[str]:
+    return list((delete_ids() if callable(delete_ids) else delete_ids) or [])
+
+def store_embeddings(chunks: Iterable[Document], delete_ids: DeleteIds = None,
+                     on_stored: Optional[Callable[[int], None]] = None,
+                     collection_name: Optional[str] = None, defer_keyword_index: bool = False):
+    """Stocke les embeddings dans le backend configuré (Qdrant ou index local)
+
+    chunks peut être un flux (générateur) : il est consommé par lots de INGESTION_BATCH_SIZE,
+    et lecture des chunks, embedding et écriture se recouvrent via des files bornées.
+    delete_ids = chunks à supprimer (pages modifiées ou fichiers retirés) ; s'il s'agit d'une
+    fonction, elle n'est appelée qu'une fois tous les chunks consommés.
+    on_stored(n) est appelé après chaque lot écrit (avancement ; une exception interrompt le stockage).
+    collection_name = version de la collection à remplir (par défaut la version active) ;
+    l'index BM25 reconstruit est celui de cette version.
+    L'index BM25 n'est reconstruit que s'il est lu (uses_keyword_index) et que la collection a changé ;
+    defer_keyword_index=True le reconstruit en arrière-plan (schedule_keyword_index_rebuild) au lieu
+    d'allonger l'ingestion d'un parcours complet de la collection, si un index précédent peut être
+    servi entre-temps ; sinon il est construit tout de suite.
+    """
+    try:
+        batches = prefetch(
+            batched(chunks, settings.INGESTION_BATCH_SIZE), settings.INGESTION_QUEUE_SIZE, name="chunks"
         )
+        if settings.VECTOR_BACKEND == "local":
+            embedded = prefetch(_embed_batches(batches, sparse=False), settings.INGESTION_QUEUE_SIZE, name="embed")
+            stored, deleted = _store_embeddings_local(embedded, delete_ids, on_stored)
+        else:
+            embedded = prefetch(_embed_batches(batches, sparse=True), settings.INGESTION_QUEUE_SIZE, name="embed")
+            collection_name = collection_name or get_active_collection()
+            stored, deleted = _store_embeddings_qdrant(embedded, delete_ids, on_stored, collection_name)
         
-        logger.info(f"{len(chunks)} documents stockés")
+        logger.info(f"{stored} documents stockés, {deleted} supprimés")
+
+        collection_name = collection_name or get_active_collection()
+        if not uses_keyword_index():
+            # Fusion serveur : index jamais lu. S'il existe, il est périmé : search_keyword le reconstruira au besoin
+            if stored or deleted:
+                shutil.rmtree(get_keyword_index_path(collection_name), ignore_errors=True)
+        else:
+            served = load_bm25_index(get_keyword_index_path(collection_name)) is not None
+            if defer_keyword_index and served and (stored or deleted):
+                schedule_keyword_index_rebuild(collection_name)
+            elif not served or stored or deleted:
+                rebuild_keyword_index(collection_name=collection_name)
         return True
         
     except Exception as e:
         logger.error(f"Erreur stockage: {e}")
         raise
 
-def get_vector_store():
-    """Récupère le vector store pour la recherche"""
+def _embed_batches(batches: Iterable[List[Document]], sparse: bool) -> Iterator[Tuple[List[Document], list, list]]:
+    """Étape d'embedding du pipeline : (chunks, vecteurs denses, vecteurs creux ou None) par lot"""
     embeddings = get_embedding_function()
-    
-    return QdrantVectorStore(
-        client=QdrantClient(url=settings.QDRANT_URL),
-        collection_name=settings.QDRANT_COLLECTION_NAME,
-        embedding=embeddings
+    sparse_embeddings = get_sparse_embedding_function() if sparse else None
+    for batch in batches:
+        texts = [chunk.page_content for chunk in batch]
+        yield (
+            batch,
+            embeddings.embed_documents(texts),
+            sparse_embeddings.embed_documents(texts) if sparse else None
+        )
+
+def _store_embeddings_qdrant(embedded, delete_ids: DeleteIds,
+                             on_stored: Optional[Callable[[int], None]] = None,
+                             collection_name: Optional[str] = None) -> Tuple[int, int]:
+    collection_name = collection_name or get_active_collection()
+    create_qdrant_collection(collection_name)
+
+    stored = 0
+    for batch, dense_vectors, sparse_vectors in embedded:
+        _upsert_points(batch, dense_vectors, sparse_vectors, collection_name)
+        stored += len(batch)
+        if on_stored:
+            on_stored(len(batch))
+
+    # Après l'ajout : un chunk ré-ingéré sous le même ID n'est jamais absent de la collection
+    ids = _resolve_delete_ids(delete_ids)
+    if ids:
+        _delete_points(ids, collection_name)
+    return stored, len(ids)
+
+@with_reconnect
+def _upsert_points(chunks: List[Document], dense_vectors, sparse_vectors, collection_name: str):
+    """Écrit un lot de points (vecteurs denses + creux), au format de payload de QdrantVectorStore"""
+    get_qdrant_client().upsert(
+        collection_name=collection_name,
+        points=[
+            models.PointStruct(
+                id=get_chunk_id(chunk),
+                vector={
+                    DENSE_VECTOR_NAME: list(dense),
+                    SPARSE_VECTOR_NAME: models.SparseVector(indices=sparse.indices, values=sparse.values)
+                },
+                payload={"page_content": chunk.page_content, "metadata": chunk.metadata}
+            )
+            for chunk, dense, sparse in zip(chunks, dense_vectors, sparse_vectors)
+        ],
+        wait=True
     )
 
-def search_semantic(query: str, top_k: int = 10, filters: Optional[Dict] = None) -> List[Tuple[Document, float]]:
-    """Recherche sémantique avec scores de similarité"""
-    vector_store = get_vector_store()
-    
-    results = vector_store.similarity_search_with_score(
-        query=query,
-        k=top_k,
-        filter=filters
+@with_reconnect
+def _delete_points(ids: List[str], collection_name: str):
+    get_qdrant_client().delete(
+        collection_name=collection_name,
+        points_selector=models.PointIdsList(points=ids)
     )
-    
-    # Les résultats sont déjà sous forme (Document, score)
-    return results
 
-def search_keyword(query: str, top_k: int = 10) -> List[Document]:
-    """Recherche par mots-clés en utilisant le payload de Qdrant"""
-    client = QdrantClient(url=settings.QDRANT_URL)
-    
-    
-    all_points = client.scroll(
+def get_local_index_path() -> str:
+    """Répertoire de l'index vectoriel local (VECTOR_BACKEND="local")"""
+    return os.path.join(settings.INDEX_STORAGE_PATH, "vectors", settings.QDRANT_COLLECTION_NAME)
+
+def _store_embeddings_local(embedded, delete_ids: DeleteIds,
+                            on_stored: Optional[Callable[[int], None]] = None) -> Tuple[int, int]:
+    """Upsert dans l'index local : les nouveaux chunks sont écrits au fil de l'eau, puis les chunks
+    existants (relus depuis le mmap) qui n'ont été ni remplacés ni supprimés
+    """
+    path = get_local_index_path()
+    os.makedirs(path, exist_ok=True)
+    with open_local_vector_index(path) as existing:
+        return _rebuild_local_index(path, existing, embedded, delete_ids, on_stored)
+
+def _rebuild_local_index(path: str, existing: Optional[LocalVectorIndex], embedded, delete_ids: DeleteIds,
+                         on_stored: Optional[Callable[[int], None]] = None) -> Tuple[int, int]:
+    new_ids = set()
+    deleted = []
+
+    def new_records():
+        for batch, vectors, _ in embedded:
+            for chunk, vector in zip(batch, vectors):
+                chunk_id = get_chunk_id(chunk)
+                if chunk_id not in new_ids:
+                    new_ids.add(chunk_id)
+                    yield chunk_id, chunk.page_content, chunk.metadata, vector
+            if on_stored:
+                on_stored(len(batch))
+
+    def previous_records():
+        deleted.extend(_resolve_delete_ids(delete_ids))
+        if existing is None:
+            return
+        removed = set(deleted)
+        for record in existing.iter_records():
+            if record[0] not in new_ids and record[0] not in removed:
+                yield record
+
+    LocalVectorIndex.build(
+        itertools.chain(new_records(), previous_records()),
+        path,
+        ivf_lists=settings.LOCAL_INDEX_IVF_LISTS
+    )
+    return len(new_ids), len(deleted)
+
+@with_reconnect
+def count_embeddings(collection_name: Optional[str] = None) -> int:
+    """Nombre de chunks stockés dans le backend (0 si la collection n'existe pas)"""
+    if settings.VECTOR_BACKEND == "local":
+        with open_local_vector_index(get_local_index_path()) as index:
+            return index.num_docs if index is not None else 0
+
+    client = get_qdrant_client()
+    collection_name = collection_name or get_active_collection()
+    if not client.collection_exists(collection_name):
+        return 0
+    return client.count(collection_name=collection_name, exact=True).count
+
+def get_vector_store():
+    """Récupère le vector store pour la recherche (réutilisé tant que le client partagé ne change pas).
+    Il interroge l'alias QDRANT_COLLECTION_NAME : une bascule de version est vue sans le recréer.
+    """
+    global _vector_store
+    client = get_qdrant_client()
+    if _vector_store is None or _vector_store.client is not client:
+        embeddings = get_embedding_function()
+        
+        _vector_store = QdrantVectorStore(
+            client=client,
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            embedding=embeddings,
+            vector_name=DENSE_VECTOR_NAME
+        )
+    return _vector_store
+
+def _point_to_document(point) -> Document:
+    """Convertit un point Qdrant en Document (même format que QdrantVectorStore)"""
+    metadata = dict(point.payload.get('metadata') or {})
+    metadata['_id'] = point.id
+    metadata['_collection_name'] = settings.QDRANT_COLLECTION_NAME
+    return Document(page_content=point.payload.get('page_content', ''), metadata=metadata)
+
+def build_qdrant_filter(filters: Optional[Dict]) -> Optional[models.Filter]:
+    """
+    Traduit les filtres de recherche en filtre Qdrant.
+    Clés acceptées : source, chapter, section (valeur ou liste de valeurs), page_min, page_max.
+    """
+    if not filters:
+        return None
+
+    must = []
+    for field in ("source", "chapter", "section"):
+        value = filters.get(field)
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            match = models.MatchAny(any=list(value))
+        else:
+            match = models.MatchValue(value=value)
+        must.append(models.FieldCondition(key=f"metadata.{field}", match=match))
+
+    if filters.get("page_min") is not None or filters.get("page_max") is not None:
+        must.append(models.FieldCondition(
+            key="metadata.page",
+            range=models.Range(gte=filters.get("page_min"), lte=filters.get("page_max"))
+        ))
+
+    return models.Filter(must=must) if must else None
+
+@with_reconnect
+def search_semantic(query: str, top_k: int = 10, filters: Optional[Dict] = None,
+                    search_params: Optional[models.SearchParams] = None) -> List[Tuple[Document, float]]:
+    """Recherche sémantique avec scores de similarité (embedding de la requête mis en cache)
+    search_params = hnsw_ef / oversampling, par défaut ceux de la configuration (build_search_params)
+    """
+    embedding = embed_query_cached(query)
+    if settings.VECTOR_BACKEND == "local":
+        return _search_semantic_local(embedding, top_k, filters)
+
+    client = get_qdrant_client()
+    response = client.query_points(
         collection_name=settings.QDRANT_COLLECTION_NAME,
-        limit=1000,
+        query=embedding,
+        using=DENSE_VECTOR_NAME,
+        query_filter=build_qdrant_filter(filters),
+        search_params=search_params or build_search_params(),
+        limit=top_k,
         with_payload=True
-    )[0]
-    
-    keywords = [word.lower() for word in query.split() if len(word) > 3]
-    
-    scored_results = []
-    for point in all_points:
-        content = point.payload.get('page_content', '').lower()
-        metadata = point.payload.get('metadata', {})
-        
-        # Calculer un score basé sur la présence des mots-clés
-        score = 0
-        for keyword in keywords:
-            if keyword in content:
-                score += content.count(keyword)
-        
-        if score > 0:
-            doc = Document(
-                page_content=point.payload.get('page_content', ''),
-                metadata=metadata
+    )
+    return [(_point_to_document(point), point.score) for point in response.points]
+
+def _search_semantic_local(embedding, top_k: int, filters: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+    """Recherche exacte (ou IVF) dans l'index vectoriel local"""
+    return _search_semantic_local_batch([embedding], top_k, filters)[0]
+
+def _search_semantic_local_batch(embeddings, top_k: int, filters: Optional[Dict] = None) -> List[List[Tuple[Document, float]]]:
+    """Toutes les requêtes du lot en un produit matriciel sur l'index vectoriel local"""
+    with open_local_vector_index(get_local_index_path()) as index:
+        if index is None:
+            logger.warning("Index vectoriel local absent : lancer l'ingestion")
+            return [[] for _ in embeddings]
+
+        batch_results = []
+        for hits in index.search(embeddings, top_k=top_k, filters=filters, nprobe=settings.LOCAL_INDEX_IVF_NPROBE):
+            results = []
+            for doc_idx, score in hits:
+                point_id, doc = index.get_document(doc_idx)
+                doc.metadata['_id'] = point_id
+                results.append((doc, score))
+            batch_results.append(results)
+        return batch_results
+
+def _search_semantic_batch(embeddings: np.ndarray, top_k: int, filters: Optional[Dict] = None,
+                           search_params: Optional[models.SearchParams] = None) -> List[List[Tuple[Document, float]]]:
+    """Jambe sémantique d'un lot de requêtes : une seule requête query_batch_points (ou un produit matriciel en local)"""
+    if settings.VECTOR_BACKEND == "local":
+        return _search_semantic_local_batch(embeddings, top_k, filters)
+
+    query_filter = build_qdrant_filter(filters)
+    params = search_params or build_search_params()
+    responses = get_qdrant_client().query_batch_points(
+        collection_name=settings.QDRANT_COLLECTION_NAME,
+        requests=[
+            models.QueryRequest(
+                query=embedding.tolist(),
+                using=DENSE_VECTOR_NAME,
+                filter=query_filter,
+                params=params,
+                limit=top_k,
+                with_payload=True
             )
-            # Normaliser le score
-            normalized_score = min(score / len(keywords), 1.0)
-            scored_results.append((doc, normalized_score))
-    
-    # Trier par score et limiter
-    scored_results.sort(key=lambda x: x[1], reverse=True)
-    return scored_results[:top_k]
+            for embedding in embeddings
+        ]
+    )
+    return [[(_point_to_document(point), point.score) for point in response.points] for response in responses]
+
+def iter_stored_documents(batch_size: int = 256, collection_name: Optional[str] = None):
+    """Parcourt tous les chunks stockés (point_id, page_content, metadata), quel que soit le backend"""
+    if settings.VECTOR_BACKEND == "local":
+        with open_local_vector_index(get_local_index_path()) as local_index:
+            if local_index is not None:
+                for point_id, content, metadata, _ in local_index.iter_records():
+                    yield point_id, content, metadata
+        return
+
+    client = get_qdrant_client()
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name or get_active_collection(),
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        for point in points:
+            yield (
+                point.id,
+                point.payload.get('page_content', ''),
+                point.payload.get('metadata') or {}
+            )
+        if offset is None:
+            break
+
+@with_reconnect
+def rebuild_keyword_index(batch_size: int = 256, collection_name: Optional[str] = None) -> BM25Index:
+    """Reconstruit l'index BM25 d'une version de la collection (par défaut l'active) par scroll paginé"""
+    collection_name = collection_name or get_active_collection()
+    path = get_keyword_index_path(collection_name)
+    os.makedirs(path, exist_ok=True)
+    with _keyword_build_lock:
+        return BM25Index.build(
+            iter_stored_documents(batch_size, collection_name), path, k1=settings.BM25_K1, b=settings.BM25_B
+        )
+
+def schedule_keyword_index_rebuild(collection_name: str) -> bool:
+    """
+    Reconstruit l'index BM25 en arrière-plan. Les demandes rapprochées (rafale de téléversements)
+    sont regroupées : tant qu'une reconstruction attend son tour, une nouvelle demande n'en ajoute
+    pas d'autre (False). Les recherches utilisent l'index précédent jusqu'à la bascule.
+    """
+    global _keyword_rebuild_executor
+    with _keyword_rebuild_lock:
+        if collection_name in _keyword_rebuilds_pending:
+            return False
+        _keyword_rebuilds_pending.add(collection_name)
+        if _keyword_rebuild_executor is None:
+            _keyword_rebuild_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bm25")
+        _keyword_rebuild_executor.submit(_run_keyword_index_rebuild, collection_name)
+    return True
+
+def _run_keyword_index_rebuild(collection_name: str):
+    # Retirée avant le parcours : une écriture pendant la reconstruction en planifie une autre
+    with _keyword_rebuild_lock:
+        _keyword_rebuilds_pending.discard(collection_name)
+    try:
+        rebuild_keyword_index(collection_name=collection_name)
+    except Exception as e:
+        logger.error(f"Deferred BM25 rebuild of '{collection_name}' failed: {e}")
+
+def wait_for_keyword_index_rebuilds():
+    """Attend la fin des reconstructions planifiées."""
+    with _keyword_rebuild_lock:
+        executor = _keyword_rebuild_executor
+    if executor is not None:
+        executor.submit(lambda: None).result()
+
+def search_keyword(query: str, top_k: int = 10, filters: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+    """Recherche par mots-clés (BM25) sur l'index inversé de la version active de la collection
+    (l'index chargé change avec l'alias : aucun résultat d'une autre version n'est servi)"""
+    collection_name = get_active_collection()
+    path = get_keyword_index_path(collection_name)
+    if load_bm25_index(path) is None:
+        # Les requêtes simultanées attendent la même construction au lieu de parcourir chacune la collection
+        with _keyword_build_lock:
+            if load_bm25_index(path) is None:
+                logger.warning("Index BM25 absent, construction à partir de la collection...")
+                rebuild_keyword_index(collection_name=collection_name)
+
+    with open_bm25_index(path) as index:
+        if index is None:
+            return []
+        hits = index.search(query, top_k=top_k, filters=filters)
+        if not hits:
+            return []
 
-def search_hybrid(query: str, top_k: int = 5, alpha: float = 0.7) -> List[Document]:
+        # Normaliser les scores BM25 dans [0, 1] pour la fusion avec les scores cosinus
+        max_score = hits[0][1]
+        results = []
+        for doc_idx, score in hits:
+            point_id, doc = index.get_document(doc_idx)
+            doc.metadata['_id'] = point_id
+            results.append((doc, score / max_score))
+
+    return results
+
+def _build_hybrid_prefetch(dense_vector, sparse_vector, top_k: int, alpha: float, query_filter=None,
+                           search_params: Optional[models.SearchParams] = None):
+    """Prépare les deux jambes (dense / creuse) en prefetch et leurs poids pour la RRF"""
+    prefetch = []
+    weights = []
+    if alpha > 0 and dense_vector is not None:
+        prefetch.append(models.Prefetch(
+            query=dense_vector,
+            using=DENSE_VECTOR_NAME,
+            filter=query_filter,
+            params=search_params or build_search_params(),
+            limit=top_k * 2
+        ))
+        weights.append(alpha)
+    if alpha < 1 and sparse_vector.indices:
+        prefetch.append(models.Prefetch(
+            query=models.SparseVector(indices=sparse_vector.indices, values=sparse_vector.values),
+            using=SPARSE_VECTOR_NAME,
+            filter=query_filter,
+            limit=top_k * 2
+        ))
+        weights.append(1 - alpha)
+    return prefetch, weights
+
+def _fuse_results(semantic_results, keyword_results, top_k: int, alpha: float) -> List[Document]:
+    """Combinaison linéaire des scores des deux recherches (fusion côté client).
+    Les chunks trouvés par les deux jambes sont fusionnés sur leur identifiant stable.
+    """
+    return _fuse_results_batch([semantic_results], [keyword_results], top_k, alpha)[0]
+
+def _fuse_results_batch(semantic_batch, keyword_batch, top_k: int, alpha: float) -> List[List[Document]]:
+    """Fusion d'un lot de requêtes en opérations NumPy vectorisées.
+    Chaque résultat est une paire (requête, chunk) ; les paires identiques sont sommées avec bincount
+    puis triées par requête et score décroissant (ordre d'arrivée en cas d'égalité).
+    """
+    n_queries = len(semantic_batch)
+    docs, query_idx, chunk_ids, scores = [], [], [], []
+    for q, (semantic_results, keyword_results) in enumerate(zip(semantic_batch, keyword_batch)):
+        for results, weight in ((semantic_results, alpha), (keyword_results, 1 - alpha)):
+            for doc, score in results:
+                docs.append(doc)
+                query_idx.append(q)
+                chunk_ids.append(get_chunk_id(doc))
+                scores.append(score * weight)
+
+    if not docs:
+        return [[] for _ in range(n_queries)]
+
+    query_idx = np.asarray(query_idx, dtype=np.int64)
+    chunk_codes = np.unique(np.asarray(chunk_ids), return_inverse=True)[1].astype(np.int64)
+    pairs = query_idx * (chunk_codes.max() + 1) + chunk_codes
+    _, first, inverse = np.unique(pairs, return_index=True, return_inverse=True)
+    fused = np.bincount(inverse, weights=np.asarray(scores, dtype=np.float64))
+
+    duplicates = len(docs) - len(first)
+    if duplicates:
+        RAG_FUSION_DUPLICATES.inc(duplicates)
+        logger.info(f"Hybrid fusion merged {duplicates} duplicate chunks")
+
+    group_query = query_idx[first]
+    order = np.lexsort((first, -fused, group_query))
+    bounds = np.searchsorted(group_query[order], np.arange(n_queries + 1))
+    return [
+        [docs[first[g]] for g in order[bounds[q]:min(bounds[q] + top_k, bounds[q + 1])]]
+        for q in range(n_queries)
+    ]
+
+@with_reconnect
+def search_hybrid(query: str, top_k: int = 5, alpha: float = 0.7, filters: Optional[Dict] = None,
+                  search_params: Optional[models.SearchParams] = None) -> List[Document]:
     """Recherche hybride: combine sémantique et mots-clés avec pondération alpha
     alpha = poids de la recherche sémantique (0-1)
+    filters = restriction optionnelle (source, chapter, section, page_min, page_max)
+    search_params = réglages de la jambe dense (hnsw_ef, oversampling)
     """
+    # L'index local n'a pas de fusion serveur : fusion des deux jambes en Python
+    if uses_keyword_index():
+        return _search_hybrid_client(query, top_k=top_k, alpha=alpha, filters=filters, search_params=search_params)
+
+    logger.info(f"Hybrid search (server fusion): query='{query}', top_k={top_k}, alpha={alpha}")
+
+    dense_vector = embed_query_cached(query)
+    sparse_vector = get_sparse_embedding_function().embed_query(query)
+
+    # Une seule requête Qdrant : les deux jambes en prefetch, fusion RRF pondérée côté serveur
+    prefetch, weights = _build_hybrid_prefetch(
+        dense_vector, sparse_vector, top_k, alpha, build_qdrant_filter(filters), search_params
+    )
+    if not prefetch:
+        return []
+
+    client = get_qdrant_client()
+    response = client.query_points(
+        collection_name=settings.QDRANT_COLLECTION_NAME,
+        prefetch=prefetch,
+        query=models.RrfQuery(rrf=models.Rrf(weights=weights)),
+        limit=top_k,
+        with_payload=True
+    )
+
+    final_docs = [_point_to_document(point) for point in response.points]
+    logger.info(f"🔎 Hybrid search returned {len(final_docs)} documents")
+    return final_docs
+
+def _search_hybrid_client(query: str, top_k: int = 5, alpha: float = 0.7, filters: Optional[Dict] = None,
+                          search_params: Optional[models.SearchParams] = None) -> List[Document]:
+    """Fusion côté client (HYBRID_FUSION="client") : deux recherches puis combinaison linéaire des scores"""
     logger.info(f"Hybrid search: query='{query}', top_k={top_k}, alpha={alpha}")
     
     # Recherche sémantique
-    semantic_results = search_semantic(query, top_k=top_k * 2)
-    
-    logger.info(f"😊😊 semantic_results : {semantic_results}")
+    semantic_results = search_semantic(query, top_k=top_k * 2, filters=filters, search_params=search_params)
     
     # Recherche par mots-clés
-    keyword_results = search_keyword(query, top_k=top_k * 2)
-    
-    logger.info(f"😊😊 keyword_results : {keyword_results}")
-    
-    # Dictionnaire pour fusionner les résultats
-    merged_results = {}
-    
-    # Ajouter les résultats sémantiques avec poids alpha
-    for doc, score in semantic_results:
-        doc_id = doc.metadata.get('_id', str(uuid.uuid4()))
-        merged_results[doc_id] = {
-            'doc': doc,
-            'score': score * alpha
-        }
-    
-    # Ajouter les résultats keywords avec poids (1-alpha)
-    for doc, score in keyword_results:
-        doc_id = doc.metadata.get('_id', str(uuid.uuid4()))
-        if doc_id in merged_results:
-            merged_results[doc_id]['score'] += score * (1 - alpha)
-        else:
-            merged_results[doc_id] = {
-                'doc': doc,
-                'score': score * (1 - alpha)
-            }
-    
-    # Trier par score décroissant
-    sorted_results = sorted(
-        merged_results.values(),
-        key=lambda x: x['score'],
-        reverse=True
-    )
-    
-    # Limiter au top_k
-    final_docs = [item['doc'] for item in sorted_results[:top_k]]
-    logger.info(f"🔎🔎🔎🔎 Hybrid search - final_docs : {final_docs}")
+    keyword_results = search_keyword(query, top_k=top_k * 2, filters=filters)
     
+    final_docs = _fuse_results(semantic_results, keyword_results, top_k, alpha)
     logger.info(f"🔎 Hybrid search returned {len(final_docs)} documents")
-    return final_docs
\ No newline at end of file
+    return final_docs
+
+@with_reconnect
+def search_hybrid_batch(queries: List[str], top_k: int = 5, alpha: float = 0.7, filters: Optional[Dict] = None,
+                        search_params: Optional[models.SearchParams] = None) -> List[List[Document]]:
+    """Recherche hybride pour un lot de requêtes (évaluation, préchauffage du cache, clients batch).
+    Un seul appel d'embedding pour tout le lot, une seule requête Qdrant (query_batch_points),
+    puis fusion RRF côté serveur ou fusion NumPy vectorisée côté client.
+    """
+    if not queries:
+        return []
+
+    logger.info(f"Batched hybrid search: {len(queries)} queries, top_k={top_k}, alpha={alpha}")
+    dense_vectors = embed_queries_cached(queries)
+
+    if uses_keyword_index():
+        semantic_batch = _search_semantic_batch(dense_vectors, top_k * 2, filters, search_params)
+        keyword_batch = [search_keyword(query, top_k=top_k * 2, filters=filters) for query in queries]
+        return _fuse_results_batch(semantic_batch, keyword_batch, top_k, alpha)
+
+    sparse_embeddings = get_sparse_embedding_function()
+    query_filter = build_qdrant_filter(filters)
+    requests, positions = [], []
+    for position, (query, dense_vector) in enumerate(zip(queries, dense_vectors)):
+        prefetch, weights = _build_hybrid_prefetch(
+            dense_vector.tolist(), sparse_embeddings.embed_query(query), top_k, alpha, query_filter, search_params
+        )
+        if prefetch:
+            requests.append(models.QueryRequest(
+                prefetch=prefetch,
+                query=models.RrfQuery(rrf=models.Rrf(weights=weights)),
+                limit=top_k,
+                with_payload=True
+            ))
+            positions.append(position)
+
+    results: List[List[Document]] = [[] for _ in queries]
+    if requests:
+        responses = get_qdrant_client().query_batch_points(
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            requests=requests
+        )
+        for position, response in zip(positions, responses):
+            results[position] = [_point_to_document(point) for point in response.points]
+    return results
+
+async def asearch_semantic(query: str, top_k: int = 10, filters: Optional[Dict] = None,
+                           search_params: Optional[models.SearchParams] = None) -> List[Tuple[Document, float]]:
+    """Version asynchrone de search_semantic (embeddings et Qdrant en HTTP asynchrone)"""
+    embedding = await aembed_query_cached(query)
+    if settings.VECTOR_BACKEND == "local":
+        return await run_blocking(_search_semantic_local, embedding, top_k, filters)
+
+    client = get_async_qdrant_client()
+    response = await client.query_points(
+        collection_name=settings.QDRANT_COLLECTION_NAME,
+        query=embedding,
+        using=DENSE_VECTOR_NAME,
+        query_filter=build_qdrant_filter(filters),
+        search_params=search_params or build_search_params(),
+        limit=top_k,
+        with_payload=True
+    )
+    return [(_point_to_document(point), point.score) for point in response.points]
+
+async def asearch_keyword(query: str, top_k: int = 10, filters: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+    """Version asynchrone de search_keyword (lecture de l'index mmap hors de la boucle d'événements)"""
+    return await run_blocking(search_keyword, query, top_k, filters)
+
+async def _run_leg(name: str, coro, timeout: float):
+    """Exécute une jambe de recherche ; un dépassement de délai ou une erreur donne un résultat vide"""
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Hybrid search: {name} leg timed out after {timeout}s")
+    except Exception as e:
+        logger.warning(f"Hybrid search: {name} leg failed: {e}")
+    return None
+
+async def asearch_hybrid(query: str, top_k: int = 5, alpha: float = 0.7, filters: Optional[Dict] = None,
+                         search_params: Optional[models.SearchParams] = None) -> List[Document]:
+    """Recherche hybride asynchrone.
+    Les deux jambes s'exécutent en parallèle, chacune avec son délai (RETRIEVAL_LEG_TIMEOUT) ;
+    si l'une échoue ou expire, on renvoie les résultats de l'autre.
+    """
+    timeout = settings.RETRIEVAL_LEG_TIMEOUT
+
+    if uses_keyword_index():
+        logger.info(f"Async hybrid search: query='{query}', top_k={top_k}, alpha={alpha}")
+        semantic_results, keyword_results = await asyncio.gather(
+            _run_leg("semantic", asearch_semantic(query, top_k=top_k * 2, filters=filters, search_params=search_params), timeout),
+            _run_leg("keyword", asearch_keyword(query, top_k=top_k * 2, filters=filters), timeout)
+        )
+        final_docs = _fuse_results(semantic_results or [], keyword_results or [], top_k, alpha)
+        logger.info(f"🔎 Async hybrid search returned {len(final_docs)} documents")
+        return final_docs
+
+    logger.info(f"Async hybrid search (server fusion): query='{query}', top_k={top_k}, alpha={alpha}")
+
+    # La jambe lente est l'embedding dense (Ollama) : sans lui, on interroge seulement le vecteur creux
+    sparse_vector = get_sparse_embedding_function().embed_query(query)
+    dense_vector = None
+    if alpha > 0:
+        dense_vector = await _run_leg("semantic", aembed_query_cached(query), timeout)
+
+    prefetch, weights = _build_hybrid_prefetch(
+        dense_vector, sparse_vector, top_k, alpha, build_qdrant_filter(filters), search_params
+    )
+    if not prefetch:
+        return []
+
+    client = get_async_qdrant_client()
+    response = await _run_leg("qdrant", client.query_points(
+        collection_name=settings.QDRANT_COLLECTION_NAME,
+        prefetch=prefetch,
+        query=models.RrfQuery(rrf=models.Rrf(weights=weights)),
+        limit=top_k,
+        with_payload=True
+    ), timeout)
+    if response is None:
+        return []
+
+    final_docs = [_point_to_document(point) for point in response.points]
+    logger.info(f"🔎 Async hybrid search returned {len(final_docs)} documents")
+    return final_docs
@@ -0,0 +1,91 @@
+# benchmarks/bench_chat_concurrency.py
+"""
+Test de charge de POST /chat/ sur un seul worker : les questions simultanées doivent se chevaucher.
+
+    uvicorn app.main:app --workers 1 &
+    python -m benchmarks.bench_chat_concurrency --username admin --password ... --concurrency 8
+
+Les mêmes questions sont envoyées une à une, puis --concurrency à la fois. Le recouvrement
+(somme des latences / durée totale) vaut ~1 si le worker sert une question à la fois, et
+approche --concurrency quand la boucle d'événements n'est jamais bloquée.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.config import settings
+
+QUESTIONS = [
+    "Comment calibrer l'analyseur avant une série de mesures ?",
+    "Que faire en cas d'alarme de pression sur la pompe ?",
+    "Quelle est la procédure de nettoyage quotidien ?",
+    "Comment remplacer le filtre du circuit hydraulique ?",
+    "Quelles sont les précautions de sécurité électrique ?",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def login(client, username, password) -> str:
+    response = await client.post(
+        f"{settings.API_V1_STR}/users/login", data={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def ask(client, token, question):
+    start = time.perf_counter()
+    response = await client.post(
+        f"{settings.API_V1_STR}/chat/", json={"question": question}, headers={"Authorization": f"Bearer {token}"}
+    )
+    response.raise_for_status()
+    return start, time.perf_counter()
+
+
+async def run(client, token, questions, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def bounded(question):
+        async with slots:
+            return await ask(client, token, question)
+
+    start = time.perf_counter()
+    spans = await asyncio.gather(*(bounded(question) for question in questions))
+    wall = time.perf_counter() - start
+
+    latencies = [end - begin for begin, end in spans]
+    print(
+        f"concurrency={concurrency:<3} requests={len(questions)}  wall={wall:.2f}s  "
+        f"p50={statistics.median(latencies):.2f}s  p95={percentile(latencies, 95):.2f}s  "
+        f"overlap={sum(latencies) / wall:.2f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=16)
+    args = parser.parse_args()
+
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.requests)]
+    async with httpx.AsyncClient(base_url=args.url, timeout=600) as client:
+        token = await login(client, args.username, args.password)
+        # Chauffe : initialisation de la chaîne, chargement des modèles
+        await ask(client, token, QUESTIONS[0])
+        await run(client, token, questions, 1)
+        await run(client, token, questions, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+# benchmarks/bench_chunking.py
+"""
+Découpage linéaire (split_by_paragraph) comparé à l'algorithme historique quadratique.
+
+    python -m benchmarks.bench_chunking                  # texte de data/data.pdf, en une seule section
+    python -m benchmarks.bench_chunking --scale 8        # texte répété 8 fois
+    python -m benchmarks.bench_chunking --tokenizer bert-base-uncased
+
+Sans titre "##", un manuel entier forme une seule section : c'est le cas où le coût
+quadratique de l'ancien découpage domine. Le mode compat doit produire exactement les mêmes chunks.
+"""
+
+import argparse
+import statistics
+import time
+
+from app.config import settings
+from app.services.chunking import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, estimate_tokens, split_by_paragraph
+from app.services.pdf_loader import DATA_PATH, list_pdf_files, load_pdf_files
+
+
+def legacy_split_by_paragraph(text, max_tokens=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_CHUNK_OVERLAP):
+    """Ancien découpage : estimate_tokens(current + p) recompte tout le tampon à chaque paragraphe."""
+    paragraphs = text.split("\n\n")
+    chunks = []
+    current = ""
+    for p in paragraphs:
+        if estimate_tokens(current + p) <= max_tokens:
+            current += "\n\n" + p if current else p
+        else:
+            if current:
+                chunks.append(current.strip())
+            words = current.split()
+            tail = " ".join(words[-overlap:]) if overlap < len(words) else current
+            current = tail + "\n\n" + p
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default=DATA_PATH)
+    parser.add_argument("--scale", type=int, default=1, help="nombre de répétitions du texte")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--tokenizer", default=None, help="tokenizer Hugging Face pour le mode budget")
+    args = parser.parse_args()
+
+    pages = load_pdf_files(list_pdf_files(args.path))
+    # Les pages PDF contiennent peu de lignes vides : chaque ligne devient un paragraphe
+    text = "\n\n".join(page.page_content.replace("\n", "\n\n") for page in pages) * args.scale
+    paragraphs = text.count("\n\n") + 1
+    print(f"pages={len(pages)} scale={args.scale} words={estimate_tokens(text)} paragraphs={paragraphs}")
+
+    legacy, legacy_time = timed(lambda: legacy_split_by_paragraph(text, args.max_tokens), args.repeat)
+    compat, compat_time = timed(lambda: split_by_paragraph(text, args.max_tokens, mode="compat"), args.repeat)
+    print(f"legacy  {legacy_time * 1000:9.1f}ms  chunks={len(legacy)}")
+    print(f"compat  {compat_time * 1000:9.1f}ms  chunks={len(compat)}  speedup x{legacy_time / compat_time:.1f}  "
+          f"identical={compat == legacy}")
+
+    settings.CHUNK_TOKENIZER = args.tokenizer
+    budget, budget_time = timed(lambda: split_by_paragraph(text, args.max_tokens, mode="budget"), args.repeat)
+    print(f"budget  {budget_time * 1000:9.1f}ms  chunks={len(budget)}  tokenizer={args.tokenizer or 'words'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_pdf_parsing.py
+"""
+Débit de l'analyse PDF selon le nombre de processus.
+
+    python -m benchmarks.bench_pdf_parsing                       # 1, 2, 4 et 8 processus sur data/
+    python -m benchmarks.bench_pdf_parsing --workers 1,4 --pages-per-task 16
+
+Le texte extrait est comparé à celui de l'exécution séquentielle : la parallélisation ne doit rien changer.
+"""
+
+import argparse
+import statistics
+import time
+
+from app.config import settings
+from app.services.pdf_loader import DATA_PATH, list_pdf_files, load_pdf_files
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4,8", help="nombres de processus, séparés par des virgules")
+    parser.add_argument("--path", default=DATA_PATH)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pages-per-task", type=int, default=settings.PDF_PAGES_PER_TASK)
+    args = parser.parse_args()
+
+    files = list_pdf_files(args.path)
+    if not files:
+        raise SystemExit(f"Aucun PDF dans {args.path}")
+
+    reference = None
+    baseline = None
+    print(f"files={len(files)} pages_per_task={args.pages_per_task}")
+    for workers in (int(w) for w in args.workers.split(",")):
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pages = load_pdf_files(files, workers=workers, pages_per_task=args.pages_per_task)
+            times.append(time.perf_counter() - start)
+
+        texts = [(p.metadata["source"], p.metadata["page"], p.page_content) for p in pages]
+        if reference is None:
+            reference = texts
+        elif texts != reference:
+            print(f"workers={workers}: extracted text differs from the first run!")
+
+        elapsed = statistics.median(times)
+        baseline = baseline or elapsed
+        print(
+            f"workers={workers:<3} pages={len(pages)}  median={elapsed:.2f}s  "
+            f"{len(pages) / elapsed:.1f} pages/s  speedup x{baseline / elapsed:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
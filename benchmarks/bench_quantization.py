@@ -0,0 +1,142 @@
+# benchmarks/bench_quantization.py
+"""
+Rappel vs mémoire des options de stockage du vecteur dense (quantification, HNSW, oversampling).
+
+    python -m benchmarks.bench_quantization
+    python -m benchmarks.bench_quantization --modes none,scalar,binary --ef 32,128 --oversampling 1,2,4 --on-disk
+
+Les vecteurs sont relus depuis la collection courante (lancer l'ingestion d'abord) et copiés dans
+des collections temporaires, une par mode. Les requêtes sont des vecteurs du corpus bruités ;
+la vérité terrain est la recherche exacte en numpy. Un serveur Qdrant est nécessaire
+(le mode local de qdrant-client ignore la quantification).
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+from qdrant_client.http import models
+
+from app.config import settings
+from app.services.qdrant_manager import get_qdrant_client
+from app.services.vector_store import DENSE_VECTOR_NAME, build_dense_vector_params, build_search_params
+
+
+def load_vectors(client, batch_size=256) -> np.ndarray:
+    vectors, offset = [], None
+    while True:
+        points, offset = client.scroll(
+            collection_name=settings.QDRANT_COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_payload=False,
+            with_vectors=[DENSE_VECTOR_NAME]
+        )
+        vectors.extend(point.vector[DENSE_VECTOR_NAME] for point in points)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+
+
+def estimate_memory_mb(n: int, dim: int, mode: str, on_disk: bool, m: int) -> float:
+    """RAM approximative : vecteurs originaux (sauf sur disque) + vecteurs quantifiés + liens HNSW"""
+    original = 0 if on_disk else n * dim * 4
+    quantized = {"none": 0, "scalar": n * dim, "binary": n * ((dim + 7) // 8)}[mode]
+    graph = n * m * 2 * 4
+    return (original + quantized + graph) / 1024 ** 2
+
+
+def wait_indexed(client, name: str, timeout: float = 300):
+    start = time.perf_counter()
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        if time.perf_counter() - start > timeout:
+            raise SystemExit(f"Indexation de {name} trop longue")
+        time.sleep(0.5)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="none,scalar,binary")
+    parser.add_argument("--ef", default="16,64,128", help="valeurs de hnsw_ef testées")
+    parser.add_argument("--oversampling", default="1,2,4")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--on-disk", action="store_true", help="vecteurs originaux sur disque (QDRANT_ON_DISK_VECTORS)")
+    parser.add_argument("--keep", action="store_true", help="ne pas supprimer les collections temporaires")
+    args = parser.parse_args()
+
+    settings.QDRANT_ON_DISK_VECTORS = args.on_disk
+    client = get_qdrant_client()
+
+    corpus = normalize(load_vectors(client))
+    if not len(corpus):
+        raise SystemExit(f"Collection '{settings.QDRANT_COLLECTION_NAME}' vide : lancer l'ingestion d'abord")
+    n, dim = corpus.shape
+
+    rng = np.random.default_rng(0)
+    queries = corpus[rng.choice(n, size=min(args.queries, n), replace=False)]
+    queries = normalize(queries + rng.normal(scale=args.noise, size=queries.shape).astype(np.float32))
+    truth = np.argsort(-(queries @ corpus.T), axis=1)[:, :args.top_k]
+
+    print(f"vectors={n} dim={dim} queries={len(queries)} top_k={args.top_k} on_disk={args.on_disk}")
+    print(f"{'mode':<8}{'ef':>6}{'overs.':>8}{'recall':>9}{'p50 ms':>9}{'RAM MB':>9}")
+
+    for mode in args.modes.split(","):
+        name = f"{settings.QDRANT_COLLECTION_NAME}_bench_{mode}"
+        if client.collection_exists(name):
+            client.delete_collection(name)
+        client.create_collection(
+            collection_name=name,
+            vectors_config={DENSE_VECTOR_NAME: build_dense_vector_params(dim, quantization=mode)},
+            # Forcer la construction du graphe HNSW même sur un petit corpus
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1)
+        )
+        for start in range(0, n, 256):
+            client.upsert(
+                collection_name=name,
+                points=[
+                    models.PointStruct(id=i, vector={DENSE_VECTOR_NAME: corpus[i].tolist()})
+                    for i in range(start, min(start + 256, n))
+                ],
+                wait=True
+            )
+        wait_indexed(client, name)
+
+        settings.QDRANT_QUANTIZATION = mode
+        memory = estimate_memory_mb(n, dim, mode, args.on_disk, settings.QDRANT_HNSW_M)
+        oversamplings = [float(o) for o in args.oversampling.split(",")] if mode != "none" else [None]
+
+        for ef in (int(e) for e in args.ef.split(",")):
+            for oversampling in oversamplings:
+                params = build_search_params(hnsw_ef=ef, oversampling=oversampling)
+                recalls, latencies = [], []
+                for query, expected in zip(queries, truth):
+                    start = time.perf_counter()
+                    response = client.query_points(
+                        collection_name=name,
+                        query=query.tolist(),
+                        using=DENSE_VECTOR_NAME,
+                        search_params=params,
+                        limit=args.top_k
+                    )
+                    latencies.append(time.perf_counter() - start)
+                    found = {point.id for point in response.points}
+                    recalls.append(len(found & set(expected.tolist())) / args.top_k)
+
+                print(
+                    f"{mode:<8}{ef:>6}{oversampling or '-':>8}{statistics.mean(recalls):>9.3f}"
+                    f"{statistics.median(latencies) * 1000:>9.2f}{memory:>9.1f}"
+                )
+
+        if not args.keep:
+            client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_rerank.py
+"""
+Coût du reranking cross-encoder comparé au temps LLM qu'il fait gagner.
+
+    python -m benchmarks.bench_rerank            # latence du rerank seul (CPU)
+    python -m benchmarks.bench_rerank --llm      # + génération Ollama avec 5 chunks vs --top-k
+
+Les candidats viennent d'un index BM25 temporaire construit sur data/ : aucun Qdrant n'est nécessaire.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+
+from app.config import settings
+from app.services.bm25_index import BM25Index
+from app.services.chunking import split_documents
+from app.services.pdf_loader import load_pdf
+from app.services.reranker import get_reranker
+from app.services.utils import format_docs
+
+QUESTIONS = [
+    "Comment calibrer l'analyseur avant une série de mesures ?",
+    "Que faire en cas d'alarme de pression sur la pompe ?",
+    "Quelle est la procédure de nettoyage quotidien ?",
+    "Comment remplacer le filtre du circuit hydraulique ?",
+    "Quelles sont les précautions de sécurité électrique ?",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def time_llm(llm, prompt, question, docs):
+    start = time.perf_counter()
+    llm.invoke(prompt.format_messages(context=format_docs(docs), question=question))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=settings.RERANK_CANDIDATES)
+    parser.add_argument("--top-k", type=int, default=3, help="chunks gardés après reranking")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--llm", action="store_true", help="mesure aussi le temps de génération Ollama")
+    args = parser.parse_args()
+
+    settings.RETRIEVAL_RERANKING = True
+    reranker = get_reranker()
+    if reranker is None:
+        raise SystemExit("Reranker indisponible (onnxruntime/tokenizers/modèle)")
+
+    chunks = split_documents(load_pdf())
+    with tempfile.TemporaryDirectory() as tmp:
+        index = BM25Index.build(
+            ((c.metadata["chunk_id"], c.page_content, c.metadata) for c in chunks), tmp
+        )
+        candidates = {
+            q: [index.get_document(i)[1] for i, _ in index.search(q, top_k=args.candidates)]
+            for q in QUESTIONS
+        }
+
+    rerank_times = []
+    reranked = {}
+    for _ in range(args.repeat):
+        for question, docs in candidates.items():
+            start = time.perf_counter()
+            reranked[question] = reranker.rerank(question, docs, top_k=args.top_k)
+            rerank_times.append(time.perf_counter() - start)
+
+    print(f"chunks={len(chunks)} candidates={args.candidates} top_k={args.top_k}")
+    print(f"rerank  p50={statistics.median(rerank_times) * 1000:.1f}ms  p95={percentile(rerank_times, 95) * 1000:.1f}ms")
+
+    if args.llm:
+        from app.services.llm import create_llm
+        from app.services.prompt import get_prompt
+
+        llm, prompt = create_llm(), get_prompt()
+        baseline = [time_llm(llm, prompt, q, docs[:5]) for q, docs in candidates.items()]
+        with_rerank = [time_llm(llm, prompt, q, reranked[q]) for q in candidates]
+        saved = statistics.mean(baseline) - statistics.mean(with_rerank)
+
+        print(f"llm (5 chunks)       mean={statistics.mean(baseline):.2f}s")
+        print(f"llm ({args.top_k} chunks rerank) mean={statistics.mean(with_rerank):.2f}s")
+        print(f"net gain per query   {saved - statistics.median(rerank_times):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -62,3 +62,82 @@ def test_get_specific_user_history():
             assert response.json()[0]["user_id"] == 2
     finally:
         app.dependency_overrides = {}
+
+def test_get_embedding_cache_stats():
+    mock_user = User(id=1, email="admin@test.com", username="admin", role="ADMIN", is_active=True)
+    app.dependency_overrides[get_current_admin_user] = lambda: mock_user
+
+    try:
+        with patch("app.api.admin.get_embedding_function") as mock_embeddings:
+            mock_embeddings.return_value.cache.stats.return_value = {"entries": 3, "bytes": 4608}
+            response = client.get("/api/v1/admin/embedding-cache")
+
+            assert response.status_code == 200
+            assert response.json() == {"enabled": True, "entries": 3, "bytes": 4608}
+    finally:
+        app.dependency_overrides = {}
+
+def test_ingestion_jobs_endpoints():
+    from app.services.ingestion_jobs import IngestionJob
+
+    mock_user = User(id=1, email="admin@test.com", username="admin", role="ADMIN", is_active=True)
+    app.dependency_overrides[get_current_admin_user] = lambda: mock_user
+    job = IngestionJob(force=True)
+
+    try:
+        with patch("app.api.admin.get_ingestion_job_manager") as mock_manager:
+            mock_manager.return_value.submit.return_value = job
+            mock_manager.return_value.get.side_effect = lambda job_id: job if job_id == job.id else None
+            mock_manager.return_value.cancel.return_value = job
+
+            response = client.post("/api/v1/admin/ingestion-jobs", json={"force": True})
+            assert response.status_code == 202
+            assert response.json()["id"] == job.id
+            assert response.json()["status"] == "queued"
+            mock_manager.return_value.submit.assert_called_once_with(force=True)
+
+            response = client.get(f"/api/v1/admin/ingestion-jobs/{job.id}")
+            assert response.status_code == 200
+            assert response.json()["progress"]["pages_parsed"] == 0
+
+            assert client.get("/api/v1/admin/ingestion-jobs/missing").status_code == 404
+            assert client.post(f"/api/v1/admin/ingestion-jobs/{job.id}/cancel").status_code == 200
+    finally:
+        app.dependency_overrides = {}
+
+def test_submit_ingestion_job_conflict():
+    from app.services.ingestion_jobs import IngestionJob, IngestionJobConflict
+
+    mock_user = User(id=1, email="admin@test.com", username="admin", role="ADMIN", is_active=True)
+    app.dependency_overrides[get_current_admin_user] = lambda: mock_user
+    running = IngestionJob()
+
+    try:
+        with patch("app.api.admin.get_ingestion_job_manager") as mock_manager:
+            mock_manager.return_value.submit.side_effect = IngestionJobConflict(running)
+            response = client.post("/api/v1/admin/ingestion-jobs")
+
+            assert response.status_code == 409
+            assert response.json()["detail"]["job_id"] == running.id
+    finally:
+        app.dependency_overrides = {}
+
+def test_collection_rollback():
+    mock_user = User(id=1, email="admin@test.com", username="admin", role="ADMIN", is_active=True)
+    app.dependency_overrides[get_current_admin_user] = lambda: mock_user
+    state = {"alias": "docs", "active": "docs_v1", "versions": ["docs_v1", "docs_v2"]}
+
+    try:
+        with patch("app.api.admin.get_ingestion_job_manager") as mock_manager, \
+             patch("app.api.admin.rollback_collection_version") as mock_rollback, \
+             patch("app.api.admin.describe_collection_versions", return_value=state):
+            mock_manager.return_value.list.return_value = []
+            response = client.post("/api/v1/admin/collections/rollback")
+            assert response.status_code == 200
+            assert response.json()["active"] == "docs_v1"
+            mock_rollback.assert_called_once()
+
+            mock_rollback.side_effect = ValueError("No previous collection version to roll back to")
+            assert client.post("/api/v1/admin/collections/rollback").status_code == 409
+    finally:
+        app.dependency_overrides = {}
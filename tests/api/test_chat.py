@@ -29,7 +29,7 @@ def test_ask_question():
             
             assert response.status_code == 200
             assert response.json() == mock_service_response
-            mock_service.assert_called_once_with("Test question")
+            mock_service.assert_called_once_with("Test question", filters=None, diversity=None)
             mock_log.assert_called_once()
     finally:
         app.dependency_overrides = {}
@@ -69,3 +69,26 @@ def test_get_my_stats():
             assert response.json() == mock_stats
     finally:
         app.dependency_overrides = {}
+
+def test_ask_question_stream():
+    mock_user = User(id=1, email="user@test.com", username="testuser", role="USER", is_active=True)
+    app.dependency_overrides[get_current_active_user] = lambda: mock_user
+
+    async def fake_stream(question, filters=None, diversity=None):
+        yield {"event": "sources", "data": {"sources": ["a.pdf"], "num_chunks": 1}}
+        yield {"event": "token", "data": {"text": "Bonjour"}}
+        yield {"event": "done", "data": {"answer": "Bonjour", "sources": ["a.pdf"]}}
+
+    try:
+        with patch("app.api.chat.stream_question", side_effect=fake_stream), \
+             patch("app.api.chat._save_query_log") as mock_log:
+            response = client.post("/api/v1/chat/stream", json={"question": "Test question"})
+
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            blocks = response.text.strip().split("\n\n")
+            assert [block.splitlines()[0] for block in blocks] == ["event: sources", "event: token", "event: done"]
+            assert blocks[1].splitlines()[1] == 'data: {"text": "Bonjour"}'
+            mock_log.assert_called_once_with("Test question", "Bonjour", 1)
+    finally:
+        app.dependency_overrides = {}
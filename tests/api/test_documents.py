@@ -0,0 +1,95 @@
+import json
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app.main import app
+from app.services.corpus import CorpusFile, CorpusSnapshot, encode_cursor
+
+client = TestClient(app)
+
+
+def make_corpus(pages=5):
+    docs = [Document(page_content=f"page {i}", metadata={"source": "a.pdf", "page": i}) for i in range(pages)]
+    return CorpusSnapshot([CorpusFile("a.pdf", 1, 0.0, "abc", docs, docs[:2])])
+
+
+def test_documents_first_page_and_cursor():
+    corpus = make_corpus()
+    with patch("app.api.documents.get_corpus", return_value=corpus):
+        response = client.get("/api/v1/documents", params={"limit": 2})
+        body = response.json()
+        assert response.status_code == 200
+        assert body["total_count"] == 5
+        assert [d["content"] for d in body["documents"]] == ["page 0", "page 1"]
+
+        response = client.get("/api/v1/documents", params={"limit": 10, "cursor": body["next_cursor"]})
+        body = response.json()
+        assert [d["content"] for d in body["documents"]] == ["page 2", "page 3", "page 4"]
+        assert body["next_cursor"] is None
+
+
+def test_chunks_default_page():
+    with patch("app.api.documents.get_corpus", return_value=make_corpus()):
+        response = client.get("/api/v1/chunks")
+
+    body = response.json()
+    assert body["status"] == "success"
+    assert body["count"] == 2
+    assert body["total_count"] == 2
+
+
+def test_documents_ndjson_stream():
+    corpus = make_corpus()
+    with patch("app.api.documents.get_corpus", return_value=corpus):
+        response = client.get("/api/v1/documents", params={"format": "ndjson", "limit": 3})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["x-total-count"] == "5"
+    assert response.headers["x-next-cursor"] == encode_cursor(corpus.version, 3)
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["content"] for line in lines] == ["page 0", "page 1", "page 2"]
+
+
+def test_ndjson_without_limit_streams_everything():
+    with patch("app.api.documents.get_corpus", return_value=make_corpus()):
+        response = client.get("/api/v1/documents", headers={"Accept": "application/x-ndjson"})
+
+    assert len(response.text.splitlines()) == 5
+    assert "x-next-cursor" not in response.headers
+
+
+def test_stale_and_invalid_cursor():
+    with patch("app.api.documents.get_corpus", return_value=make_corpus()):
+        stale = client.get("/api/v1/documents", params={"cursor": encode_cursor("old", 2)})
+        invalid = client.get("/api/v1/documents", params={"cursor": "%%%"})
+
+    assert stale.status_code == 409
+    assert invalid.status_code == 400
+
+
+def test_upload_requires_admin():
+    response = client.post("/api/v1/documents", params={"filename": "m.pdf"}, content=b"%PDF-1.7")
+    assert response.status_code == 401
+
+
+def test_upload_saves_and_submits_targeted_job(tmp_path):
+    from app.api.deps import get_current_admin_user
+    from app.models.user import User
+    from app.services.ingestion_jobs import IngestionJob
+
+    job = IngestionJob(file_paths=[str(tmp_path / "m.pdf")])
+    app.dependency_overrides[get_current_admin_user] = lambda: User(id=1, username="admin", role="ADMIN", is_active=True)
+    try:
+        with patch("app.api.documents.save_pdf_upload") as mock_save, \
+             patch("app.api.documents.get_ingestion_job_manager") as mock_manager:
+            mock_save.return_value = str(tmp_path / "m.pdf")
+            mock_manager.return_value.submit.return_value = job
+            response = client.post("/api/v1/documents", params={"filename": "m.pdf"}, content=b"%PDF-1.7")
+    finally:
+        app.dependency_overrides = {}
+
+    assert response.status_code == 202
+    assert response.json()["id"] == job.id
+    assert mock_save.call_args.args[1] == "m.pdf"
+    mock_manager.return_value.submit.assert_called_once_with(file_paths=[str(tmp_path / "m.pdf")])
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from app.config import settings
 
 @pytest.fixture
@@ -15,9 +15,22 @@ def mock_docs():
 
 @pytest.fixture
 def mock_qdrant_client():
-    """Fixture mockant le client Qdrant dans le module vector_store."""
-    with patch('app.services.vector_store.QdrantClient') as mock:
+    """Fixture mockant le client Qdrant partagé (qdrant_manager)."""
+    from app.services.qdrant_manager import close_qdrant_client
+    close_qdrant_client()
+    with patch('app.services.qdrant_manager.QdrantClient') as mock:
         yield mock
+    close_qdrant_client()
+
+@pytest.fixture
+def mock_async_qdrant_client():
+    """Fixture mockant le client Qdrant asynchrone partagé."""
+    from app.services.qdrant_manager import close_qdrant_client
+    close_qdrant_client()
+    with patch('app.services.qdrant_manager.AsyncQdrantClient') as mock:
+        mock.return_value.query_points = AsyncMock()
+        yield mock
+    close_qdrant_client()
 
 @pytest.fixture
 def mock_langchain_qdrant():
@@ -27,7 +40,31 @@ def mock_langchain_qdrant():
 
 @pytest.fixture
 def mock_vector_store_embeddings():
-    """Fixture mockant get_embedding_function pour vector_store."""
-    with patch('app.services.vector_store.get_embedding_function') as mock:
+    """Fixture mockant get_embedding_function pour vector_store (et son cache de requêtes)."""
+    from app.services.embedding_cache import query_embedding_cache
+    query_embedding_cache.clear()
+    with patch('app.services.vector_store.get_embedding_function') as mock, \
+         patch('app.services.embedding_cache.get_embedding_function', mock):
+        mock.return_value.model = "mock-embedding-model"
         mock.return_value.embed_query.return_value = [0.1] * 1536
+        mock.return_value.aembed_query = AsyncMock(return_value=[0.1] * 1536)
         yield mock
+    query_embedding_cache.clear()
+
+@pytest.fixture(autouse=True)
+def isolated_index_storage(tmp_path, monkeypatch):
+    """Fixture redirigeant les index locaux (BM25...) vers un répertoire temporaire."""
+    from app.services.collection_versions import reset_active_collection_cache
+    monkeypatch.setattr(settings, "INDEX_STORAGE_PATH", str(tmp_path / "storage"))
+    reset_active_collection_cache()
+    yield tmp_path / "storage"
+    reset_active_collection_cache()
+
+@pytest.fixture(autouse=True)
+def disable_reranker_model(monkeypatch):
+    """Fixture évitant le chargement du cross-encoder ONNX (téléchargement) pendant les tests."""
+    from app.services.reranker import reset_reranker
+    monkeypatch.setattr(settings, "RETRIEVAL_RERANKING", False)
+    reset_reranker()
+    yield
+    reset_reranker()
@@ -0,0 +1,51 @@
+import asyncio
+import contextvars
+import threading
+import time
+import pytest
+
+from app.services.blocking import BlockingPool
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@pytest.mark.asyncio
+async def test_run_is_bounded_and_keeps_context():
+    pool = BlockingPool("test", lambda: 2)
+    running = peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return request_id.get()
+
+    request_id.set("abc")
+    try:
+        results = await asyncio.gather(*(pool.run(work) for _ in range(6)))
+    finally:
+        pool.shutdown()
+
+    assert results == ["abc"] * 6
+    assert peak == 2
+
+
+def test_submit_drops_tasks_above_max_pending():
+    pool = BlockingPool("test", lambda: 1, lambda: 2)
+    release = threading.Event()
+    try:
+        futures = [pool.submit(release.wait) for _ in range(3)]
+        assert futures[0] is not None and futures[1] is not None
+        assert futures[2] is None
+        release.set()
+        pool.join(timeout=5)
+        assert all(future.done() for future in futures[:2])
+        assert pool.submit(len, "ab").result(timeout=5) == 2
+    finally:
+        release.set()
+        pool.shutdown()
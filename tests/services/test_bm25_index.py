@@ -0,0 +1,88 @@
+import os
+from unittest.mock import patch
+
+from app.services.bm25_index import BM25Index, load_bm25_index, open_bm25_index
+from app.services.index_storage import read_current_version
+from app.services.text_analyzer import analyze, fold_accents, light_stem
+
+DOCS = [
+    ("p1", "Calibration de la pompe péristaltique du module d'analyse", {"page": 1, "source": "a.pdf"}),
+    ("p2", "Remplacement du filtre et calibration des capteurs", {"page": 2, "source": "b.pdf"}),
+    ("p3", "Procédure de nettoyage quotidien de l'automate", {"page": 3, "source": "b.pdf"}),
+]
+
+def test_analyzer_french():
+    assert fold_accents("Procédure Électrique") == "procedure electrique"
+    assert light_stem("pompes") == light_stem("pompe")
+    assert light_stem("canaux") == "canal"
+    assert analyze("Les pompes de l'automate") == ["pomp", "automat"]
+
+def test_build_and_search(tmp_path):
+    index = BM25Index.build(iter(DOCS), str(tmp_path))
+
+    results = index.search("calibration des pompes", top_k=5)
+
+    assert [idx for idx, _ in results][0] == 0
+    assert {idx for idx, _ in results} == {0, 1}
+    assert results[0][1] > results[1][1]
+
+    point_id, doc = index.get_document(0)
+    assert point_id == "p1"
+    assert doc.metadata == {"page": 1, "source": "a.pdf"}
+
+def test_search_unknown_terms(tmp_path):
+    index = BM25Index.build(iter(DOCS), str(tmp_path))
+    assert index.search("le la les", top_k=5) == []
+    assert index.search("centrifugeuse", top_k=5) == []
+
+def test_load_follows_current_version(tmp_path):
+    path = str(tmp_path)
+    assert load_bm25_index(path) is None
+
+    BM25Index.build(iter(DOCS[:1]), path)
+    first = load_bm25_index(path)
+    assert first.num_docs == 1
+    assert load_bm25_index(path) is first
+
+    BM25Index.build(iter(DOCS), path)
+    second = load_bm25_index(path)
+    assert second.num_docs == 3
+    assert second.path == os.path.join(path, read_current_version(path))
+
+def test_superseded_index_closed_without_readers(tmp_path):
+    path = str(tmp_path)
+    BM25Index.build(iter(DOCS[:1]), path)
+    first = load_bm25_index(path)
+
+    BM25Index.build(iter(DOCS), path)
+    with patch.object(first, "close", wraps=first.close) as close:
+        load_bm25_index(path)
+    close.assert_called_once()
+
+def test_superseded_index_closed_by_last_reader(tmp_path):
+    path = str(tmp_path)
+    BM25Index.build(iter(DOCS[:1]), path)
+    first = load_bm25_index(path)
+
+    with patch.object(first, "close", wraps=first.close) as close:
+        with open_bm25_index(path) as reader:
+            assert reader is first
+            BM25Index.build(iter(DOCS), path)
+            assert load_bm25_index(path).num_docs == 3
+
+            # Toujours lisible par la recherche en cours
+            assert reader.get_document(0)[0] == "p1"
+            close.assert_not_called()
+        close.assert_called_once()
+
+def test_build_empty_corpus(tmp_path):
+    index = BM25Index.build(iter([]), str(tmp_path))
+    assert index.num_docs == 0
+    assert index.search("pompe") == []
+
+def test_search_with_filters(tmp_path):
+    index = BM25Index.build(iter(DOCS), str(tmp_path))
+
+    assert [idx for idx, _ in index.search("calibration", filters={"source": "b.pdf"})] == [1]
+    assert [idx for idx, _ in index.search("calibration", filters={"page_min": 2})] == [1]
+    assert index.search("calibration", filters={"source": "c.pdf"}) == []
@@ -1,10 +1,14 @@
+import asyncio
+import time
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
+from app.services.blocking import mlops_pool
 from app.services.chat import ask_question, get_qa_chain
 
+@patch("app.services.chat.log_query_run")
 @patch("app.services.chat.initialize_rag_system")
 @pytest.mark.asyncio
-async def test_ask_question_first_call(mock_init):
+async def test_ask_question_first_call(mock_init, mock_log):
     # Setup - First call should initialize the chain
     mock_chain = MagicMock()
     mock_init.return_value = mock_chain
@@ -12,10 +16,10 @@ async def test_ask_question_first_call(mock_init):
     doc = MagicMock()
     doc.metadata = {"source": "doc1.pdf"}
     
-    mock_chain.invoke.return_value = {
+    mock_chain.ainvoke = AsyncMock(return_value={
         "answer": "Test answer",
         "context": [doc]
-    }
+    })
     
     # Execute - Need to reset singleton first
     import app.services.chat
@@ -25,9 +29,11 @@ async def test_ask_question_first_call(mock_init):
     
     # Assert
     mock_init.assert_called_once()
-    mock_chain.invoke.assert_called_once_with("Hello")
+    mock_chain.ainvoke.assert_awaited_once_with("Hello", config=None)
     assert result["answer"] == "Test answer"
     assert result["sources"] == ["doc1.pdf"]
+    mlops_pool.join(timeout=5)
+    assert mock_log.call_args.args[1] == "Test answer"
 
 @patch("app.services.chat.initialize_rag_system")
 @pytest.mark.asyncio
@@ -35,7 +41,7 @@ async def test_ask_question_error(mock_init):
     # Setup
     mock_chain = MagicMock()
     mock_init.return_value = mock_chain
-    mock_chain.invoke.side_effect = Exception("RAG Error")
+    mock_chain.ainvoke = AsyncMock(side_effect=Exception("RAG Error"))
     
     # Reset singleton
     import app.services.chat
@@ -47,3 +53,84 @@ async def test_ask_question_error(mock_init):
     # Assert
     assert "Une erreur est survenue" in result["answer"]
     assert result["sources"] == []
+
+@patch("app.services.chat.log_query_run")
+@patch("app.services.chat.initialize_rag_system")
+@pytest.mark.asyncio
+async def test_concurrent_questions_overlap(mock_init, mock_log):
+    # Génération simulée (0.2 s d'attente réseau) et évaluation synchrone lente : aucune ne doit bloquer la boucle
+    async def slow_ainvoke(question, config=None):
+        await asyncio.sleep(0.2)
+        return {"answer": question, "context": []}
+
+    mock_chain = MagicMock()
+    mock_chain.ainvoke = slow_ainvoke
+    mock_init.return_value = mock_chain
+    mock_log.side_effect = lambda *args, **kwargs: time.sleep(0.2)
+    import app.services.chat
+    app.services.chat._qa_chain = None
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(ask_question(f"Question {i}") for i in range(5)))
+    elapsed = time.perf_counter() - start
+
+    assert [result["answer"] for result in results] == [f"Question {i}" for i in range(5)]
+    assert elapsed < 0.6
+    mock_init.assert_called_once()
+    mlops_pool.join(timeout=5)
+    assert mock_log.call_count == 5
+
+async def fake_astream(question, config=None):
+    doc = MagicMock()
+    doc.metadata = {"source": "doc1.pdf"}
+    yield {"question": question}
+    yield {"context": [doc]}
+    for token in ["La ", "pompe ", "fuit."]:
+        yield {"answer": token}
+
+@patch("app.services.chat.log_query_run")
+@patch("app.services.chat.initialize_rag_system")
+@pytest.mark.asyncio
+async def test_stream_question_events(mock_init, mock_log):
+    from app.services.chat import stream_question
+    from app.metrics import RAG_TIME_TO_FIRST_TOKEN
+
+    mock_chain = MagicMock()
+    mock_chain.astream = fake_astream
+    mock_init.return_value = mock_chain
+    import app.services.chat
+    app.services.chat._qa_chain = None
+    ttft_before = RAG_TIME_TO_FIRST_TOKEN._sum.get()
+
+    events = [event async for event in stream_question("Fuite ?", filters={"source": "doc1.pdf"})]
+
+    assert [event["event"] for event in events] == ["sources", "token", "token", "token", "done"]
+    assert events[0]["data"]["sources"] == ["doc1.pdf"]
+    done = events[-1]["data"]
+    assert done["answer"] == "La pompe fuit."
+    assert done["tokens"] == 3
+    assert done["time_to_first_token"] is not None
+    assert RAG_TIME_TO_FIRST_TOKEN._sum.get() > ttft_before
+    mlops_pool.join(timeout=5)
+    mock_log.assert_called_once()
+    assert mock_log.call_args.args[1] == "La pompe fuit."
+
+@patch("app.services.chat.initialize_rag_system")
+@pytest.mark.asyncio
+async def test_stream_question_error(mock_init):
+    from app.services.chat import stream_question
+
+    async def failing_astream(question, config=None):
+        raise Exception("Ollama down")
+        yield
+
+    mock_chain = MagicMock()
+    mock_chain.astream = failing_astream
+    mock_init.return_value = mock_chain
+    import app.services.chat
+    app.services.chat._qa_chain = None
+
+    events = [event async for event in stream_question("Fuite ?")]
+
+    assert [event["event"] for event in events] == ["error"]
+    assert "Ollama down" in events[0]["data"]["message"]
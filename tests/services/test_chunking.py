@@ -1,10 +1,11 @@
+import random
 import pytest
 from textwrap import dedent
 try:
     from langchain_core.documents import Document
 except ImportError:
     from langchain.schema import Document
-from app.services.chunking import split_documents, estimate_tokens, split_by_paragraph, chunk_markdown_document
+from app.services.chunking import split_documents, estimate_tokens, split_by_paragraph, chunk_markdown_document, compute_chunk_id, count_words
 
 def test_estimate_tokens():
     text = "Hello world this is a test"
@@ -60,3 +61,64 @@ def test_split_documents_success():
 def test_split_documents_empty_input():
     result = split_documents([])
     assert result == []
+
+def test_split_documents_stable_chunk_ids():
+    doc = Document(
+        page_content="# Title\n\n## Section 1\nContent.\n\n## Section 2\nContent.",
+        metadata={"source": "doc1", "page": 5}
+    )
+
+    first = split_documents([doc])
+    second = split_documents([doc])
+
+    ids = [chunk.metadata["chunk_id"] for chunk in first]
+    assert ids == [chunk.metadata["chunk_id"] for chunk in second]
+    assert len(set(ids)) == len(ids)
+    assert ids[0] == compute_chunk_id("doc1", 5, first[0].page_content)
+    assert compute_chunk_id("doc1", 6, first[0].page_content) != ids[0]
+
+def legacy_split_by_paragraph(text, max_tokens=500, overlap=80):
+    """Implémentation historique (quadratique), référence du mode compat."""
+    paragraphs = text.split("\n\n")
+    chunks = []
+    current = ""
+    for p in paragraphs:
+        if estimate_tokens(current + p) <= max_tokens:
+            current += "\n\n" + p if current else p
+        else:
+            if current:
+                chunks.append(current.strip())
+            words = current.split()
+            tail = " ".join(words[-overlap:]) if overlap < len(words) else current
+            current = tail + "\n\n" + p
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+def test_split_by_paragraph_compat_matches_legacy():
+    rng = random.Random(0)
+    atoms = ["mot", "a", "\n", "\n\n", " ", "\t", "é", "\n\n\n", " x "]
+    for _ in range(2000):
+        text = "".join(rng.choice(atoms) for _ in range(rng.randint(0, 60)))
+        max_tokens, overlap = rng.randint(0, 8), rng.randint(0, 5)
+        assert split_by_paragraph(text, max_tokens, overlap, mode="compat") == \
+            legacy_split_by_paragraph(text, max_tokens, overlap)
+
+def test_split_by_paragraph_compat_quirks():
+    # Concaténation sans séparateur : "a b" + "c d" compte 3 mots et tient dans 3
+    assert split_by_paragraph("a b\n\nc d", max_tokens=3, overlap=1, mode="compat") == ["a b\n\nc d"]
+    # overlap=0 reprend tout le chunk précédent (words[-0:])
+    assert split_by_paragraph("a b\n\nc d", max_tokens=2, overlap=0, mode="compat") == ["a b", "a b\n\nc d"]
+
+def test_split_by_paragraph_budget():
+    text = "a b c\n\nd e f\n\ng h i"
+
+    chunks = split_by_paragraph(text, max_tokens=6, overlap=1, mode="budget")
+
+    assert chunks == ["a b c\n\nd e f", "f\n\ng h i"]
+    assert all(sum(count_words([c])) <= 7 for c in chunks)
+    assert split_by_paragraph(text, max_tokens=3, overlap=0, mode="budget") == ["a b c", "d e f", "g h i"]
+
+def test_split_by_paragraph_unknown_mode():
+    with pytest.raises(ValueError):
+        split_by_paragraph("text", mode="fast")
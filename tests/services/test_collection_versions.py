@@ -0,0 +1,118 @@
+import os
+import pytest
+from unittest.mock import Mock
+
+from qdrant_client.http import models
+
+from app.config import settings
+from app.services import collection_versions
+from app.services.collection_versions import (
+    activate_collection_version, get_active_collection, get_keyword_index_path, get_manifest_path,
+    list_collection_versions, rollback_collection_version
+)
+
+ALIAS = settings.QDRANT_COLLECTION_NAME
+
+
+def set_collections(client, *names):
+    collections = []
+    for name in names:
+        collection = Mock()
+        collection.name = name
+        collections.append(collection)
+    client.get_collections.return_value.collections = collections
+
+
+def set_alias(client, target):
+    aliases = [] if target is None else [models.AliasDescription(alias_name=ALIAS, collection_name=target)]
+    client.get_aliases.return_value = models.CollectionsAliasesResponse(aliases=aliases)
+
+
+def test_versions_are_sorted_numerically(mock_qdrant_client):
+    set_collections(mock_qdrant_client.return_value, f"{ALIAS}_v10", "other", f"{ALIAS}_v9", f"{ALIAS}_vx")
+
+    assert list_collection_versions() == [f"{ALIAS}_v9", f"{ALIAS}_v10"]
+
+
+def test_active_collection_falls_back_to_configured_name(mock_qdrant_client):
+    set_alias(mock_qdrant_client.return_value, None)
+
+    assert get_active_collection() == ALIAS
+
+
+def test_active_collection_follows_alias_swapped_elsewhere(mock_qdrant_client):
+    client = mock_qdrant_client.return_value
+    set_alias(client, f"{ALIAS}_v1")
+    assert get_active_collection() == f"{ALIAS}_v1"
+
+    # Bascule par une autre réplique : servie depuis le cache jusqu'à la relecture de l'alias
+    set_alias(client, f"{ALIAS}_v2")
+    assert get_active_collection() == f"{ALIAS}_v1"
+    assert get_active_collection(refresh=True) == f"{ALIAS}_v2"
+    assert client.get_aliases.call_count == 2
+
+
+def test_active_collection_falls_back_to_local_pointer(mock_qdrant_client, monkeypatch):
+    client = mock_qdrant_client.return_value
+    set_alias(client, f"{ALIAS}_v1")
+    get_active_collection()
+
+    monkeypatch.setattr(settings, "QDRANT_ALIAS_CACHE_SECONDS", 0)
+    client.get_aliases.side_effect = ConnectionError("qdrant down")
+    assert get_active_collection() == f"{ALIAS}_v1"
+
+
+def test_activate_swaps_alias_atomically_and_prunes(mock_qdrant_client):
+    client = mock_qdrant_client.return_value
+    set_alias(client, f"{ALIAS}_v2")
+    set_collections(client, f"{ALIAS}_v1", f"{ALIAS}_v2", f"{ALIAS}_v3")
+    os.makedirs(get_keyword_index_path(f"{ALIAS}_v1"))
+
+    activate_collection_version(f"{ALIAS}_v3")
+
+    operations = client.update_collection_aliases.call_args.kwargs["change_aliases_operations"]
+    assert isinstance(operations[0], models.DeleteAliasOperation)
+    assert operations[1].create_alias.collection_name == f"{ALIAS}_v3"
+    assert get_active_collection() == f"{ALIAS}_v3"
+    # QDRANT_KEPT_VERSIONS = 2 : la version précédente reste disponible pour un retour arrière
+    client.delete_collection.assert_called_once_with(f"{ALIAS}_v1")
+    assert not os.path.exists(get_keyword_index_path(f"{ALIAS}_v1"))
+
+
+def test_activate_replaces_unversioned_collection(mock_qdrant_client):
+    client = mock_qdrant_client.return_value
+    set_alias(client, None)
+    set_collections(client, ALIAS, f"{ALIAS}_v1")
+    client.collection_exists.return_value = True
+
+    activate_collection_version(f"{ALIAS}_v1")
+
+    client.delete_collection.assert_called_once_with(ALIAS)
+    operations = client.update_collection_aliases.call_args.kwargs["change_aliases_operations"]
+    assert len(operations) == 1
+
+
+def test_rollback_to_previous_version(mock_qdrant_client):
+    client = mock_qdrant_client.return_value
+    set_alias(client, f"{ALIAS}_v2")
+    set_collections(client, f"{ALIAS}_v1", f"{ALIAS}_v2")
+
+    assert rollback_collection_version() == f"{ALIAS}_v1"
+    assert client.update_collection_aliases.call_args.kwargs[
+        "change_aliases_operations"][1].create_alias.collection_name == f"{ALIAS}_v1"
+    client.delete_collection.assert_not_called()
+
+
+def test_rollback_without_previous_version(mock_qdrant_client):
+    client = mock_qdrant_client.return_value
+    set_alias(client, f"{ALIAS}_v1")
+    set_collections(client, f"{ALIAS}_v1")
+
+    with pytest.raises(ValueError):
+        rollback_collection_version()
+
+
+def test_version_paths_are_separate():
+    assert get_manifest_path("a_v1") != get_manifest_path("a_v2")
+    assert get_keyword_index_path("a_v1") != get_keyword_index_path("a_v2")
+    assert collection_versions.new_collection_version().startswith(f"{ALIAS}_v")
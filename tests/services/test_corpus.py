@@ -0,0 +1,105 @@
+import os
+import pytest
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+
+from app.services.corpus import (
+    CorpusCache, InvalidCursor, StaleCursor, decode_cursor, encode_cursor
+)
+
+
+def fake_pages(file_paths, *args, **kwargs):
+    return [
+        Document(page_content=f"Texte {i} de {os.path.basename(path)}", metadata={"source": path, "page": i})
+        for path in file_paths for i in range(2)
+    ]
+
+
+def fake_split(pages):
+    for page in pages:
+        yield Document(page_content=page.page_content, metadata=dict(page.metadata, chunk_id=page.page_content))
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for name in ("a.pdf", "b.pdf"):
+        (tmp_path / name).write_bytes(f"%PDF {name}".encode())
+    return tmp_path
+
+
+@pytest.fixture
+def parser():
+    with patch("app.services.corpus.load_pdf_files", side_effect=fake_pages) as load, \
+         patch("app.services.corpus.iter_split_documents", side_effect=fake_split):
+        yield load
+
+
+def test_snapshot_is_cached_between_calls(data_dir, parser):
+    cache = CorpusCache(str(data_dir))
+    first = cache.snapshot()
+    second = cache.snapshot()
+
+    assert second is first
+    assert parser.call_count == 1
+    assert first.total("pages") == 4
+    assert first.total("chunks") == 4
+
+
+def test_only_modified_file_is_reparsed(data_dir, parser):
+    cache = CorpusCache(str(data_dir))
+    first = cache.snapshot()
+
+    (data_dir / "b.pdf").write_bytes(b"%PDF modified b")
+    second = cache.snapshot()
+
+    assert parser.call_args_list[-1].args[0] == [str(data_dir / "b.pdf")]
+    assert second.version != first.version
+    assert second.files[0] is first.files[0]
+
+
+def test_touched_file_with_same_content_is_not_reparsed(data_dir, parser):
+    cache = CorpusCache(str(data_dir))
+    first = cache.snapshot()
+
+    path = data_dir / "a.pdf"
+    os.utime(path, (os.stat(path).st_atime, os.stat(path).st_mtime + 10))
+
+    assert cache.snapshot() is first
+    assert parser.call_count == 1
+
+
+def test_removed_file_changes_version(data_dir, parser):
+    cache = CorpusCache(str(data_dir))
+    first = cache.snapshot()
+
+    (data_dir / "a.pdf").unlink()
+    second = cache.snapshot()
+
+    assert parser.call_count == 1
+    assert second.version != first.version
+    assert [f.path for f in second.files] == [str(data_dir / "b.pdf")]
+
+
+def test_page_crosses_file_boundaries(data_dir, parser):
+    corpus = CorpusCache(str(data_dir)).snapshot()
+
+    items, next_offset = corpus.page("pages", 1, 2)
+    assert [d.page_content for d in items] == ["Texte 1 de a.pdf", "Texte 0 de b.pdf"]
+    assert next_offset == 3
+
+    items, next_offset = corpus.page("pages", 3, 2)
+    assert [d.page_content for d in items] == ["Texte 1 de b.pdf"]
+    assert next_offset is None
+
+    assert corpus.page("pages", 10, 2) == ([], None)
+
+
+def test_cursor_round_trip_and_errors():
+    cursor = encode_cursor("v1", 42)
+    assert decode_cursor(cursor, "v1") == 42
+
+    with pytest.raises(StaleCursor):
+        decode_cursor(cursor, "v2")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor", "v1")
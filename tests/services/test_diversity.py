@@ -0,0 +1,48 @@
+import pytest
+from app.services.diversity import diversify, jaccard, shingles
+from app.metrics import RAG_DIVERSITY_DROPPED
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+BASE = "Pour calibrer la pompe péristaltique, ouvrir le menu maintenance puis lancer la procédure de calibration"
+
+def make_docs():
+    return [
+        Document(page_content=BASE),
+        # Même passage avec le recouvrement de 80 mots du chunk suivant
+        Document(page_content=BASE + " et attendre le signal sonore"),
+        Document(page_content="Le filtre du circuit hydraulique se remplace tous les six mois"),
+        Document(page_content="Nettoyer quotidiennement la sonde avec une solution désinfectante"),
+    ]
+
+def test_shingles_jaccard():
+    assert jaccard(shingles(BASE), shingles(BASE.upper())) == 1.0
+    assert jaccard(shingles(BASE), shingles("texte sans rapport avec la pompe")) == 0.0
+    assert jaccard(set(), shingles(BASE)) == 0.0
+
+def test_diversify_none_keeps_order():
+    docs = make_docs()
+    assert diversify(docs, top_k=3, mode="none") == docs[:3]
+
+def test_diversify_shingle_drops_near_duplicates():
+    docs = make_docs()
+    before = RAG_DIVERSITY_DROPPED._value.get()
+
+    result = diversify(docs, top_k=3, mode="shingle", threshold=0.5)
+
+    # Pas de remplacement : le contexte raccourcit
+    assert result == [docs[0], docs[2]]
+    assert RAG_DIVERSITY_DROPPED._value.get() - before == 1
+
+def test_diversify_mmr_backfills_from_pool():
+    docs = make_docs()
+
+    result = diversify(docs, top_k=3, mode="mmr", threshold=0.5, mmr_lambda=0.7)
+
+    assert result == [docs[0], docs[2], docs[3]]
+
+def test_diversify_unknown_mode():
+    with pytest.raises(ValueError):
+        diversify(make_docs(), top_k=3, mode="cluster")
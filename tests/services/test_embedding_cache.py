@@ -0,0 +1,85 @@
+import time
+import numpy as np
+import pytest
+from app.services.embedding_cache import (
+    QueryEmbeddingCache,
+    embed_query_cached,
+    embed_queries_cached,
+    aembed_query_cached,
+    normalize_query
+)
+from app.metrics import EMBEDDING_CACHE_HITS, EMBEDDING_CACHE_MISSES
+
+def test_normalize_query():
+    assert normalize_query("  Comment  CALIBRER\tla pompe ? ") == "comment calibrer la pompe ?"
+
+def test_cache_stores_float32():
+    cache = QueryEmbeddingCache()
+    cache.put(("model", "q"), [0.1, 0.2, 0.3])
+
+    vector = cache.get(("model", "q"))
+
+    assert vector.dtype == np.float32
+    assert cache.stats()["bytes"] == 12 + len("model") + len("q")
+
+def test_cache_lru_eviction():
+    cache = QueryEmbeddingCache(max_entries=2)
+    cache.put(("m", "a"), [1.0])
+    cache.put(("m", "b"), [2.0])
+    cache.get(("m", "a"))
+    cache.put(("m", "c"), [3.0])
+
+    assert cache.get(("m", "b")) is None
+    assert cache.get(("m", "a")) is not None
+    assert cache.get(("m", "c")) is not None
+
+def test_cache_memory_cap():
+    cache = QueryEmbeddingCache(max_entries=100, max_bytes=2 * (400 + 2))
+    for i in range(5):
+        cache.put(("m", str(i)), np.zeros(100))
+
+    assert cache.stats()["entries"] == 2
+    assert cache.get(("m", "4")) is not None
+
+def test_cache_ttl(monkeypatch):
+    cache = QueryEmbeddingCache(ttl_seconds=10)
+    now = time.monotonic()
+    monkeypatch.setattr("app.services.embedding_cache.time.monotonic", lambda: now)
+    cache.put(("m", "a"), [1.0])
+
+    monkeypatch.setattr("app.services.embedding_cache.time.monotonic", lambda: now + 11)
+    assert cache.get(("m", "a")) is None
+    assert cache.stats()["entries"] == 0
+
+def test_embed_query_cached_counts_hits(mock_vector_store_embeddings):
+    hits, misses = EMBEDDING_CACHE_HITS._value.get(), EMBEDDING_CACHE_MISSES._value.get()
+
+    embed_query_cached("Pompe")
+    embed_query_cached("pompe")
+
+    assert EMBEDDING_CACHE_MISSES._value.get() == misses + 1
+    assert EMBEDDING_CACHE_HITS._value.get() == hits + 1
+    mock_vector_store_embeddings.return_value.embed_query.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_aembed_query_cached_shares_cache(mock_vector_store_embeddings):
+    embed_query_cached("filtre")
+    vector = await aembed_query_cached("filtre")
+
+    assert len(vector) == 1536
+    mock_vector_store_embeddings.return_value.aembed_query.assert_not_called()
+
+def test_embed_queries_cached_single_call(mock_vector_store_embeddings):
+    embeddings = mock_vector_store_embeddings.return_value
+    embeddings.embed_documents.side_effect = lambda texts: [[float(len(t)), 1.0] for t in texts]
+    embeddings.embed_query.return_value = [0.0, 0.0]
+    embed_query_cached("déjà vue")
+    embeddings.embed_query.reset_mock()
+
+    vectors = embed_queries_cached(["a", "bb", "A ", "déjà vue"])
+
+    assert vectors.shape == (4, 2)
+    # "A " se normalise comme "a" et "déjà vue" vient du cache : un seul appel pour les deux restantes
+    embeddings.embed_documents.assert_called_once_with(["a", "bb"])
+    assert vectors[0].tolist() == vectors[2].tolist() == [1.0, 1.0]
+    embeddings.embed_query.assert_not_called()
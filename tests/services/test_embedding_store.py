@@ -0,0 +1,49 @@
+import numpy as np
+from app.services.embedding_store import PersistentEmbeddingCache
+
+def test_put_and_get_many(tmp_path):
+    cache = PersistentEmbeddingCache(str(tmp_path / "cache.sqlite3"))
+    cache.put_many("model-a", ["pompe", "filtre"], [[1.0, 0.0], [0.0, 1.0]])
+
+    vectors = cache.get_many("model-a", ["filtre", "inconnu", "pompe"])
+
+    assert vectors[1] is None
+    np.testing.assert_array_equal(vectors[0], [0.0, 1.0])
+    np.testing.assert_array_equal(vectors[2], [1.0, 0.0])
+    assert cache.get_many("model-b", ["pompe"]) == [None]
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = PersistentEmbeddingCache(path)
+    cache.put_many("model-a", ["pompe"], [[0.5, 0.5]])
+    cache.close()
+
+    reopened = PersistentEmbeddingCache(path)
+
+    np.testing.assert_array_equal(reopened.get_many("model-a", ["pompe"])[0], [0.5, 0.5])
+    assert reopened.stats()["entries"] == 1
+
+def test_evicts_least_recently_used(tmp_path):
+    # 3 vecteurs de 4 float32 = 48 octets au-delà de la limite de 40
+    cache = PersistentEmbeddingCache(str(tmp_path / "cache.sqlite3"), max_bytes=40)
+    cache.put_many("m", ["a", "b"], [[1.0] * 4, [2.0] * 4])
+    cache.get_many("m", ["a"])
+
+    cache.put_many("m", ["c"], [[3.0] * 4])
+
+    vectors = cache.get_many("m", ["a", "b", "c"])
+    assert vectors[1] is None
+    assert vectors[0] is not None and vectors[2] is not None
+    assert cache.stats()["bytes"] <= 40
+
+def test_stats_and_clear(tmp_path):
+    cache = PersistentEmbeddingCache(str(tmp_path / "cache.sqlite3"))
+    cache.put_many("m1", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    cache.put_many("m2", ["a"], [[1.0, 2.0]])
+
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["models"] == {"m1": {"entries": 2, "bytes": 16}, "m2": {"entries": 1, "bytes": 8}}
+
+    assert cache.clear("m1") == 2
+    assert cache.stats()["entries"] == 1
@@ -1,7 +1,12 @@
+import asyncio
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import AsyncMock, patch, Mock
 
-from app.services.embeddings import get_embedding_function
+import httpx
+from ollama import ResponseError
+
+from app.services.embedding_store import PersistentEmbeddingCache
+from app.services.embeddings import BatchedEmbeddings, get_embedding_function
 from app.config import settings
 
 
@@ -18,9 +23,11 @@ def test_get_embedding_function():
         # Vérifications
         mock_embeddings.assert_called_once_with(
             model="nomic-embed-text",
-            base_url=settings.OLLAMA_BASE_URL
+            base_url=settings.OLLAMA_BASE_URL,
+            client_kwargs={"timeout": settings.EMBEDDING_TIMEOUT}
         )
-        assert result == mock_instance
+        assert isinstance(result, BatchedEmbeddings)
+        assert result.client == mock_instance
         assert result is get_embedding_function()
 
 
@@ -35,9 +42,10 @@ def test_get_embedding_function_custom_model():
         
         mock_embeddings.assert_called_once_with(
             model="custom-model",
-            base_url=settings.OLLAMA_BASE_URL
+            base_url=settings.OLLAMA_BASE_URL,
+            client_kwargs={"timeout": settings.EMBEDDING_TIMEOUT}
         )
-        assert result == mock_instance
+        assert result.client == mock_instance
 
 
 def test_get_embedding_function_error():
@@ -67,10 +75,171 @@ def test_get_embedding_function_cache():
         result3 = get_embedding_function("model1")
         
         # Vérifications
-        assert result1 == mock_instance1
-        assert result2 == mock_instance2
-        assert result3 == mock_instance1
+        assert result1.client == mock_instance1
+        assert result2.client == mock_instance2
+        assert result3.client == mock_instance1
         assert result1 is result3 
         assert result1 is not result2
     
-        assert mock_embeddings.call_count == 2
\ No newline at end of file
+        assert mock_embeddings.call_count == 2
+
+
+def fake_client():
+    client = Mock()
+    client.embed_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+    return client
+
+
+def test_batched_embeddings_splits_and_keeps_order():
+    client = fake_client()
+    embeddings = BatchedEmbeddings(client, batch_size=2, max_in_flight=3)
+
+    vectors = embeddings.embed_documents(["a", "bb", "ccc", "dddd", "eeeee"])
+
+    assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert sorted(len(call.args[0]) for call in client.embed_documents.call_args_list) == [1, 2, 2]
+
+
+def test_batched_embeddings_retries_transient_errors():
+    client = fake_client()
+    client.embed_documents.side_effect = [httpx.ConnectError("down"), ResponseError("busy", 503), [[1.0]]]
+    embeddings = BatchedEmbeddings(client, max_retries=3, retry_base_delay=0)
+
+    assert embeddings.embed_query("a") == [1.0]
+    assert client.embed_documents.call_count == 3
+
+
+def test_batched_embeddings_does_not_retry_client_errors():
+    client = fake_client()
+    client.embed_documents.side_effect = ResponseError("model not found", 404)
+    embeddings = BatchedEmbeddings(client, max_retries=3, retry_base_delay=0)
+
+    with pytest.raises(ResponseError):
+        embeddings.embed_documents(["a"])
+    assert client.embed_documents.call_count == 1
+
+
+def test_batched_embeddings_gives_up_after_max_retries():
+    client = fake_client()
+    client.embed_documents.side_effect = httpx.ReadTimeout("slow")
+    embeddings = BatchedEmbeddings(client, max_retries=2, retry_base_delay=0)
+
+    with pytest.raises(httpx.ReadTimeout):
+        embeddings.embed_documents(["a"])
+    assert client.embed_documents.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_batched_embeddings_async():
+    client = Mock()
+    client.aembed_documents = AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+    embeddings = BatchedEmbeddings(client, batch_size=1, max_in_flight=2)
+
+    vectors = await embeddings.aembed_documents(["a", "bb", "ccc"])
+
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert client.aembed_documents.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_batched_embeddings_async_limit_is_shared_by_concurrent_calls():
+    in_flight = peak = 0
+
+    async def embed(texts):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return [[float(len(t))] for t in texts]
+
+    client = Mock()
+    client.aembed_documents = AsyncMock(side_effect=embed)
+    embeddings = BatchedEmbeddings(client, batch_size=1, max_in_flight=2)
+
+    first, second = await asyncio.gather(
+        embeddings.aembed_documents(["a", "bb", "ccc"]),
+        embeddings.aembed_documents(["dddd", "eeeee", "ffffff"])
+    )
+
+    assert first == [[1.0], [2.0], [3.0]]
+    assert second == [[4.0], [5.0], [6.0]]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_batched_embeddings_limit_is_shared_by_sync_and_async_calls():
+    import threading
+    import time
+    in_flight = peak = 0
+    lock = threading.Lock()
+
+    def enter():
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+
+    def leave():
+        nonlocal in_flight
+        with lock:
+            in_flight -= 1
+
+    def embed(texts):
+        enter()
+        time.sleep(0.02)
+        leave()
+        return [[float(len(t))] for t in texts]
+
+    async def aembed(texts):
+        enter()
+        await asyncio.sleep(0.02)
+        leave()
+        return [[float(len(t))] for t in texts]
+
+    client = Mock()
+    client.embed_documents.side_effect = embed
+    client.aembed_documents = AsyncMock(side_effect=aembed)
+    embeddings = BatchedEmbeddings(client, batch_size=1, max_in_flight=2)
+
+    sync_vectors, async_vectors = await asyncio.gather(
+        asyncio.to_thread(embeddings.embed_documents, ["a", "bb", "ccc", "dddd"]),
+        embeddings.aembed_documents(["eeeee", "ffffff", "ggggggg", "hhhhhhhh"])
+    )
+
+    assert sync_vectors == [[1.0], [2.0], [3.0], [4.0]]
+    assert async_vectors == [[5.0], [6.0], [7.0], [8.0]]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_batched_embeddings_cancelled_wait_returns_its_slot():
+    client = Mock()
+    client.aembed_documents = AsyncMock(side_effect=lambda texts: [[1.0] for _ in texts])
+    embeddings = BatchedEmbeddings(client, max_in_flight=1)
+
+    embeddings._slots.acquire()
+    task = asyncio.create_task(embeddings.aembed_documents(["a"]))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    embeddings._slots.release()
+
+    # Le créneau obtenu par l'attente annulée est rendu : un nouvel appel passe
+    assert await asyncio.wait_for(embeddings.aembed_documents(["b"]), 5) == [[1.0]]
+    client.aembed_documents.assert_awaited_once()
+
+
+def test_batched_embeddings_uses_persistent_cache(tmp_path):
+    client = fake_client()
+    client.model = "fake-model"
+    cache = PersistentEmbeddingCache(str(tmp_path / "cache.sqlite3"))
+    embeddings = BatchedEmbeddings(client, cache=cache)
+    embeddings.embed_documents(["a", "bb"])
+    client.embed_documents.reset_mock()
+
+    vectors = embeddings.embed_documents(["bb", "ccc", "ccc", "a"])
+
+    assert vectors == [[2.0], [3.0], [3.0], [1.0]]
+    client.embed_documents.assert_called_once_with(["ccc"])
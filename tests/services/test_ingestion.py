@@ -0,0 +1,244 @@
+import os
+import pytest
+from unittest.mock import Mock, patch
+from app.config import settings
+from app.services.ingestion import (
+    IngestionCancelled, IngestionManifest, IngestionProgress, file_sha256, get_manifest_path, ingest_documents
+)
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+
+MODULE_PATH = "app.services.ingestion"
+EMBEDDING_MODEL = "nomic-embed-text"
+
+def fake_pages(file_paths, on_error=None, page_counts=None):
+    """Une page par ligne de chaque fichier (à la place de PyPDF) ; une ligne "!" est une page illisible."""
+    for file_path in file_paths:
+        with open(file_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        for i, line in enumerate(lines):
+            if line.startswith("!"):
+                on_error(file_path, ValueError("broken page"))
+                continue
+            yield Document(page_content=line, metadata={"source": file_path, "page": i})
+
+def fake_store(chunks, delete_ids=None, on_stored=None, collection_name=None, defer_keyword_index=False):
+    """Consomme le flux comme store_embeddings et mémorise ce qui aurait été écrit."""
+    fake_store.chunks = list(chunks)
+    if on_stored and fake_store.chunks:
+        on_stored(len(fake_store.chunks))
+    fake_store.delete_ids = list(delete_ids() if callable(delete_ids) else delete_ids or [])
+    return True
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    # Backend sans versions de collection : la bascule blue/green est testée à part
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.pdf").write_text("Calibration de la pompe\nNettoyage du filtre", encoding="utf-8")
+    (data / "b.pdf").write_text("Sécurité électrique", encoding="utf-8")
+    with patch(f"{MODULE_PATH}.iter_pdf_files", side_effect=fake_pages) as mock_load, \
+         patch(f"{MODULE_PATH}.count_pdf_pages", side_effect=lambda path: len(open(path, encoding="utf-8").read().splitlines())), \
+         patch(f"{MODULE_PATH}.store_embeddings", side_effect=fake_store) as mock_store, \
+         patch(f"{MODULE_PATH}.count_embeddings", return_value=3), \
+         patch(f"{MODULE_PATH}.get_embedding_function", return_value=Mock(model=EMBEDDING_MODEL)):
+        yield data, mock_load, mock_store
+
+def stored_ids(mock_store):
+    return [chunk.metadata["chunk_id"] for chunk in fake_store.chunks]
+
+def test_first_ingestion_embeds_everything(library):
+    data, mock_load, mock_store = library
+
+    stats = ingest_documents(str(data))
+
+    assert stats["files_updated"] == 2
+    assert stats["chunks_embedded"] == 3
+    assert len(stored_ids(mock_store)) == 3
+    assert os.path.exists(get_manifest_path())
+
+def test_unchanged_library_is_skipped(library):
+    data, mock_load, mock_store = library
+    ingest_documents(str(data))
+    mock_load.reset_mock()
+    mock_store.reset_mock()
+
+    stats = ingest_documents(str(data))
+
+    assert stats["files_skipped"] == 2
+    mock_load.assert_not_called()
+    mock_store.assert_not_called()
+
+def test_embedding_model_change_reembeds_everything(library):
+    data, mock_load, mock_store = library
+    ingest_documents(str(data))
+    mock_store.reset_mock()
+
+    # Seul le modèle de l'embedder compte, pas EMBEDDING_MODEL_NAME
+    with patch(f"{MODULE_PATH}.get_embedding_function", return_value=Mock(model="mxbai-embed-large")):
+        stats = ingest_documents(str(data))
+
+    assert stats["chunks_embedded"] == 3
+    assert IngestionManifest.load(get_manifest_path()).embedding_model == "mxbai-embed-large"
+
+def test_parse_failure_keeps_file_indexed_and_retries_it(library):
+    data, mock_load, mock_store = library
+    ingest_documents(str(data))
+    before = IngestionManifest.load(get_manifest_path()).files[str(data / "a.pdf")]
+
+    (data / "a.pdf").write_text("Calibration de la pompe\n!\nNouvelle procédure", encoding="utf-8")
+    stats = ingest_documents(str(data))
+
+    assert stats["files_failed"] == 1
+    assert stats["files_updated"] == 0
+    # "Nettoyage du filtre" n'a pas pu être relu : il reste indexé ; le chunk écrit entre-temps est retiré
+    assert fake_store.delete_ids == [stored_ids(mock_store)[0]]
+    assert IngestionManifest.load(get_manifest_path()).files[str(data / "a.pdf")] == before
+
+    (data / "a.pdf").write_text("Calibration de la pompe\nNettoyage du filtre à air", encoding="utf-8")
+    stats = ingest_documents(str(data))
+
+    assert stats["files_updated"] == 1
+    assert stats["files_failed"] == 0
+
+def test_changed_page_only_reembeds_that_chunk(library):
+    data, mock_load, mock_store = library
+    ingest_documents(str(data))
+    mock_store.reset_mock()
+
+    (data / "a.pdf").write_text("Calibration de la pompe\nNettoyage du filtre à air", encoding="utf-8")
+    stats = ingest_documents(str(data))
+
+    assert stats["files_updated"] == 1
+    assert stats["chunks_unchanged"] == 1
+    assert stats["chunks_embedded"] == 1
+    assert stats["chunks_deleted"] == 1
+    assert [chunk.page_content for chunk in fake_store.chunks] == ["Nettoyage du filtre à air"]
+    assert len(fake_store.delete_ids) == 1
+
+def test_removed_file_chunks_are_deleted(library):
+    data, mock_load, mock_store = library
+    ingest_documents(str(data))
+    removed_ids = IngestionManifest.load(get_manifest_path()).files[str(data / "b.pdf")]["chunks"]
+
+    os.remove(data / "b.pdf")
+    stats = ingest_documents(str(data))
+
+    assert stats["files_removed"] == 1
+    assert stats["chunks_deleted"] == len(removed_ids)
+    assert fake_store.chunks == []
+    assert fake_store.delete_ids == sorted(removed_ids)
+
+def test_touched_but_identical_file_is_skipped(library):
+    data, mock_load, mock_store = library
+    ingest_documents(str(data))
+    mock_load.reset_mock()
+    os.utime(data / "a.pdf", (0, 0))
+
+    stats = ingest_documents(str(data))
+
+    assert stats["files_skipped"] == 2
+    mock_load.assert_not_called()
+
+def test_empty_index_forces_full_ingestion(library):
+    data, mock_load, mock_store = library
+    ingest_documents(str(data))
+
+    with patch(f"{MODULE_PATH}.count_embeddings", return_value=0):
+        stats = ingest_documents(str(data))
+
+    assert stats["chunks_embedded"] == 3
+
+def test_progress_is_reported(library):
+    data, mock_load, mock_store = library
+    progress = IngestionProgress()
+
+    ingest_documents(str(data), progress=progress)
+
+    snapshot = progress.snapshot()
+    assert snapshot["files_total"] == 2
+    assert snapshot["pages_total"] == snapshot["pages_parsed"] == 3
+    assert snapshot["chunks_embedded"] == 3
+    assert snapshot["eta_seconds"] == 0
+
+    # Pages comptées une seule fois, puis transmises au découpage en plages
+    assert mock_load.call_args.kwargs["page_counts"] == {str(data / "a.pdf"): 2, str(data / "b.pdf"): 1}
+
+def test_cancelled_ingestion_keeps_previous_manifest(library):
+    data, mock_load, mock_store = library
+    progress = IngestionProgress()
+    progress.cancel()
+
+    with pytest.raises(IngestionCancelled):
+        ingest_documents(str(data), progress=progress)
+
+    assert not os.path.exists(get_manifest_path())
+
+def test_file_sha256(tmp_path):
+    path = tmp_path / "f.bin"
+    path.write_bytes(b"abc")
+    assert file_sha256(str(path)) == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+
+def test_targeted_ingestion_only_touches_given_file(library):
+    data, mock_load, mock_store = library
+    ingest_documents(str(data))
+    mock_load.reset_mock()
+
+    # b.pdf change sans être ciblé : il n'est ni relu ni retiré du manifeste
+    (data / "b.pdf").write_text("Sécurité électrique modifiée", encoding="utf-8")
+    (data / "c.pdf").write_text("Maintenance du compresseur", encoding="utf-8")
+    stats = ingest_documents(str(data), file_paths=[str(data / "c.pdf")])
+
+    assert mock_load.call_args.args[0] == [str(data / "c.pdf")]
+    assert stats["files_updated"] == 1
+    assert stats["files_removed"] == 0
+    assert [chunk.page_content for chunk in fake_store.chunks] == ["Maintenance du compresseur"]
+    manifest = IngestionManifest.load(get_manifest_path())
+    assert set(manifest.files) == {str(data / name) for name in ("a.pdf", "b.pdf", "c.pdf")}
+
+@pytest.fixture
+def qdrant_versions(library, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "qdrant")
+    with patch(f"{MODULE_PATH}.get_active_collection", return_value="docs"), \
+         patch(f"{MODULE_PATH}.new_collection_version", return_value="docs_v2"), \
+         patch(f"{MODULE_PATH}.activate_collection_version") as activate, \
+         patch(f"{MODULE_PATH}.drop_collection_version") as drop:
+        yield library, activate, drop
+
+def test_full_ingestion_builds_new_version_then_swaps_alias(qdrant_versions):
+    (data, mock_load, mock_store), activate, drop = qdrant_versions
+
+    ingest_documents(str(data))
+
+    assert mock_store.call_args.kwargs["collection_name"] == "docs_v2"
+    # L'index BM25 de la nouvelle version est construit avant la bascule
+    assert mock_store.call_args.kwargs["defer_keyword_index"] is False
+    activate.assert_called_once_with("docs_v2")
+    drop.assert_not_called()
+    assert os.path.exists(get_manifest_path("docs_v2"))
+    assert not os.path.exists(get_manifest_path("docs"))
+
+def test_failed_rebuild_drops_shadow_version(qdrant_versions):
+    (data, mock_load, mock_store), activate, drop = qdrant_versions
+    mock_store.side_effect = RuntimeError("ollama down")
+
+    with pytest.raises(RuntimeError):
+        ingest_documents(str(data))
+
+    activate.assert_not_called()
+    drop.assert_called_once_with("docs_v2")
+
+def test_incremental_ingestion_writes_into_active_version(qdrant_versions):
+    (data, mock_load, mock_store), activate, drop = qdrant_versions
+    IngestionManifest(get_manifest_path("docs"), {"x.pdf": {"sha256": "", "size": 0, "mtime": 0, "chunks": ["c"]}},
+                      EMBEDDING_MODEL).save()
+
+    ingest_documents(str(data))
+
+    assert mock_store.call_args.kwargs["collection_name"] == "docs"
+    assert mock_store.call_args.kwargs["defer_keyword_index"] is True
+    activate.assert_not_called()
+    assert os.path.exists(get_manifest_path("docs"))
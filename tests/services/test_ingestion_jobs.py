@@ -0,0 +1,79 @@
+import threading
+import pytest
+from unittest.mock import patch
+from app.services.ingestion_jobs import IngestionJobConflict, IngestionJobManager
+
+MODULE_PATH = "app.services.ingestion_jobs"
+
+def wait_finished(manager):
+    """Attend la fin du job en cours (le worker est recréé au prochain submit)."""
+    manager._executor.shutdown(wait=True)
+    manager._executor = None
+
+def test_job_succeeds_with_stats():
+    manager = IngestionJobManager()
+    with patch(f"{MODULE_PATH}.ingest_documents", return_value={"chunks_embedded": 3}) as mock_ingest:
+        job = manager.submit(force=True)
+        wait_finished(manager)
+
+    assert job.status == "succeeded"
+    assert job.stats == {"chunks_embedded": 3}
+    assert mock_ingest.call_args.kwargs["force"] is True
+    assert mock_ingest.call_args.kwargs["progress"] is job.progress
+    assert manager.list() == [job]
+
+def test_job_failure_is_reported():
+    manager = IngestionJobManager()
+    with patch(f"{MODULE_PATH}.ingest_documents", side_effect=RuntimeError("qdrant down")):
+        job = manager.submit()
+        wait_finished(manager)
+
+    assert job.status == "failed"
+    assert job.error == "qdrant down"
+
+def test_running_job_can_be_cancelled_and_blocks_new_jobs():
+    manager = IngestionJobManager()
+    started = threading.Event()
+
+    def slow_ingestion(force, progress, file_paths=None):
+        started.set()
+        progress.cancel_event.wait(5)
+        progress.add_pages()
+
+    with patch(f"{MODULE_PATH}.ingest_documents", side_effect=slow_ingestion):
+        job = manager.submit()
+        assert started.wait(5)
+        assert job.status == "running"
+
+        with pytest.raises(IngestionJobConflict):
+            manager.submit()
+
+        manager.cancel(job.id)
+        wait_finished(manager)
+
+    assert job.status == "cancelled"
+    assert job.to_dict()["progress"]["pages_parsed"] == 1
+
+def test_cancel_unknown_job():
+    assert IngestionJobManager().cancel("missing") is None
+
+def test_targeted_job_is_queued_behind_active_job():
+    manager = IngestionJobManager()
+    release = threading.Event()
+    calls = []
+
+    def ingestion(force, progress, file_paths=None):
+        calls.append(file_paths)
+        release.wait(5)
+        return {}
+
+    with patch(f"{MODULE_PATH}.ingest_documents", side_effect=ingestion):
+        first = manager.submit()
+        upload = manager.submit(file_paths=["/data/new.pdf"])
+        assert upload.status == "queued"
+        release.set()
+        wait_finished(manager)
+
+    assert first.status == upload.status == "succeeded"
+    assert calls == [None, ["/data/new.pdf"]]
+    assert upload.to_dict()["file_paths"] == ["/data/new.pdf"]
@@ -0,0 +1,73 @@
+import numpy as np
+from app.services.local_vector_index import LocalVectorIndex, load_local_vector_index
+
+def make_records(n=200, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    records = [
+        (f"p{i}", f"chunk {i}", {"page": i, "source": "a.pdf" if i % 2 else "b.pdf"}, vectors[i])
+        for i in range(n)
+    ]
+    return records, vectors
+
+def exact_top_k(vectors, query, k):
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return list(np.argsort(-(normed @ (query / np.linalg.norm(query))))[:k])
+
+def test_build_and_exact_search(tmp_path):
+    records, vectors = make_records()
+    index = LocalVectorIndex.build(iter(records), str(tmp_path))
+
+    hits = index.search(vectors[7], top_k=5)[0]
+
+    assert hits[0][0] == 7
+    assert abs(hits[0][1] - 1.0) < 1e-5
+    assert [idx for idx, _ in hits] == exact_top_k(vectors, vectors[7], 5)
+    point_id, doc = index.get_document(7)
+    assert point_id == "p7"
+    assert doc.page_content == "chunk 7"
+
+def test_batch_search_matches_single(tmp_path):
+    records, vectors = make_records()
+    index = LocalVectorIndex.build(iter(records), str(tmp_path))
+
+    batch = index.search(vectors[:3], top_k=4)
+
+    for hits, vector in zip(batch, vectors[:3]):
+        single = index.search(vector, top_k=4)[0]
+        assert [idx for idx, _ in hits] == [idx for idx, _ in single]
+        assert np.allclose([s for _, s in hits], [s for _, s in single], atol=1e-5)
+
+def test_search_with_filters(tmp_path):
+    records, vectors = make_records()
+    index = LocalVectorIndex.build(iter(records), str(tmp_path))
+
+    hits = index.search(vectors[7], top_k=5, filters={"source": "b.pdf", "page_max": 100})[0]
+
+    assert len(hits) == 5
+    assert all(idx % 2 == 0 and idx <= 100 for idx, _ in hits)
+
+def test_ivf_search(tmp_path):
+    records, vectors = make_records(n=400)
+    index = LocalVectorIndex.build(iter(records), str(tmp_path), ivf_lists=8)
+
+    assert index.meta["ivf_lists"] == 8
+    # Le vecteur lui-même est toujours dans la liste de son centroïde le plus proche
+    assert index.search(vectors[42], top_k=1, nprobe=1)[0][0][0] == 42
+    # nprobe >= nombre de listes : recherche exacte
+    assert [i for i, _ in index.search(vectors[42], top_k=5, nprobe=8)[0]] == exact_top_k(vectors, vectors[42], 5)
+
+def test_load_and_iter_records(tmp_path):
+    path = str(tmp_path)
+    assert load_local_vector_index(path) is None
+
+    records, vectors = make_records(n=3)
+    LocalVectorIndex.build(iter(records), path)
+    index = load_local_vector_index(path)
+
+    assert index.num_docs == 3
+    assert [r[0] for r in index.iter_records()] == ["p0", "p1", "p2"]
+
+def test_empty_index(tmp_path):
+    index = LocalVectorIndex.build(iter([]), str(tmp_path))
+    assert index.search(np.ones(4), top_k=3) == [[]]
@@ -0,0 +1,125 @@
+import gzip
+import os
+import pytest
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+
+from app.config import settings
+from app.services.page_cache import PageTextCache, open_page_cache, parser_version
+from app.services.pdf_loader import file_sha256, iter_pdf_files
+
+MODULE_PATH = "app.services.pdf_loader"
+
+
+def fake_parse(task):
+    file_path, start, stop = task
+    text = open(file_path, encoding="utf-8").read()
+    return [
+        Document(page_content=f"{text} p{page}", metadata={"source": file_path, "page": page, "total_pages": 3})
+        for page in range(start, stop)
+    ]
+
+
+@pytest.fixture
+def library(tmp_path):
+    for name in ("a.pdf", "b.pdf"):
+        (tmp_path / name).write_text(f"manuel {name}", encoding="utf-8")
+    with patch(f"{MODULE_PATH}.count_pdf_pages", return_value=3), \
+         patch(f"{MODULE_PATH}._parse_page_range", side_effect=fake_parse) as mock_parse:
+        yield tmp_path, mock_parse
+
+
+def load(paths):
+    return list(iter_pdf_files([str(p) for p in paths], workers=1, pages_per_task=2))
+
+
+def test_unchanged_files_are_not_parsed_again(library):
+    data, mock_parse = library
+    first = load([data / "a.pdf", data / "b.pdf"])
+    mock_parse.reset_mock()
+
+    second = load([data / "a.pdf", data / "b.pdf"])
+
+    mock_parse.assert_not_called()
+    assert [(d.page_content, d.metadata) for d in second] == [(d.page_content, d.metadata) for d in first]
+
+
+def test_modified_file_is_parsed_again(library):
+    data, mock_parse = library
+    load([data / "a.pdf", data / "b.pdf"])
+    mock_parse.reset_mock()
+
+    (data / "b.pdf").write_text("manuel b révisé", encoding="utf-8")
+    pages = load([data / "a.pdf", data / "b.pdf"])
+
+    assert {call.args[0][0] for call in mock_parse.call_args_list} == {str(data / "b.pdf")}
+    assert [d.page_content for d in pages][3:] == ["manuel b révisé p0", "manuel b révisé p1", "manuel b révisé p2"]
+
+
+def test_cache_is_keyed_by_content_not_path(library):
+    data, mock_parse = library
+    load([data / "a.pdf"])
+    mock_parse.reset_mock()
+
+    os.rename(data / "a.pdf", data / "renamed.pdf")
+    pages = load([data / "renamed.pdf"])
+
+    mock_parse.assert_not_called()
+    assert {d.metadata["source"] for d in pages} == {str(data / "renamed.pdf")}
+
+
+def test_incomplete_parse_is_not_cached(library):
+    data, mock_parse = library
+    def parse(task):
+        if task[1] == 2:
+            raise ValueError("broken page")
+        return fake_parse(task)
+
+    mock_parse.side_effect = parse
+    load([data / "a.pdf"])
+
+    assert not open_page_cache().contains(file_sha256(str(data / "a.pdf")))
+
+
+def test_abandoned_iteration_leaves_no_entry(library):
+    data, _ = library
+    pages = iter_pdf_files([str(data / "a.pdf")], workers=1, pages_per_task=2)
+    next(pages)
+    pages.close()
+
+    cache = open_page_cache()
+    assert not cache.contains(file_sha256(str(data / "a.pdf")))
+    assert cache.stats()["entries"] == 0
+
+
+def test_disabled_cache(library, monkeypatch):
+    data, mock_parse = library
+    monkeypatch.setattr(settings, "PAGE_CACHE_ENABLED", False)
+    load([data / "a.pdf"])
+    load([data / "a.pdf"])
+
+    assert mock_parse.call_count == 4
+
+
+def test_corrupted_entry_is_discarded(tmp_path):
+    cache = PageTextCache(str(tmp_path))
+    writer = cache.writer("ab" * 32)
+    writer.add([Document(page_content="texte", metadata={"source": "x.pdf", "page": 0})])
+    writer.commit()
+    assert cache.get("ab" * 32, "y.pdf")[0].metadata == {"source": "y.pdf", "page": 0}
+
+    with open(cache._entry_path("ab" * 32), "wb") as f:
+        f.write(gzip.compress(b"not json"))
+
+    assert cache.get("ab" * 32, "y.pdf") is None
+    assert not cache.contains("ab" * 32)
+
+
+def test_stale_parser_versions_are_purged(tmp_path):
+    os.makedirs(tmp_path / "pypdf-0.0-plain-0")
+    os.makedirs(tmp_path / parser_version())
+    cache = PageTextCache(str(tmp_path))
+
+    assert cache.purge_stale_versions() == 1
+    assert os.listdir(tmp_path) == [parser_version()]
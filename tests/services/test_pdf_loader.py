@@ -2,18 +2,19 @@ import pytest
 from unittest.mock import patch, MagicMock
 import os
 
-from app.services.pdf_loader import load_pdf
+from app.services.pdf_loader import iter_pdf_files, list_pdf_files, load_pdf, load_pdf_files, plan_page_ranges
 
 MODULE_PATH = "app.services.pdf_loader"
 
 @patch(f"{MODULE_PATH}.os.path.exists")
-@patch(f"{MODULE_PATH}.PyPDFDirectoryLoader")
-def test_load_pdf_success(mock_loader_class, mock_exists):
+@patch(f"{MODULE_PATH}.list_pdf_files")
+@patch(f"{MODULE_PATH}.load_pdf_files")
+def test_load_pdf_success(mock_load_files, mock_list_files, mock_exists):
     
     mock_exists.return_value = True
+    mock_list_files.return_value = ["a.pdf"]
     
-    mock_loader_instance = mock_loader_class.return_value
-    mock_loader_instance.load.return_value = [
+    mock_load_files.return_value = [
         MagicMock(page_content="Contenu de la page 1"),
         MagicMock(page_content="Contenu de la page 2")
     ]
@@ -24,8 +25,7 @@ def test_load_pdf_success(mock_loader_class, mock_exists):
     assert result[0].page_content == "Contenu de la page 1"
     assert result[1].page_content == "Contenu de la page 2"
     
-    mock_loader_class.assert_called_once()
-    mock_loader_instance.load.assert_called_once()
+    mock_load_files.assert_called_once_with(["a.pdf"])
     
 
 @patch(f"{MODULE_PATH}.os.path.exists")
@@ -39,16 +39,67 @@ def test_load_pdf_directory_not_found(mock_exists):
     
 
 @patch(f"{MODULE_PATH}.os.path.exists")
-@patch(f"{MODULE_PATH}.PyPDFDirectoryLoader")
-def test_load_pdf_exception(mock_loader_class, mock_exists):
+@patch(f"{MODULE_PATH}.list_pdf_files")
+@patch(f"{MODULE_PATH}.load_pdf_files")
+def test_load_pdf_exception(mock_load_files, mock_list_files, mock_exists):
     
-    mock_exists.return_value == True
-    
-    mock_loader_instance = mock_loader_class.return_value
-    mock_loader_instance.load.side_effect = Exception("Erreur de lecture")
+    mock_exists.return_value = True
+    mock_list_files.return_value = ["a.pdf"]
+    mock_load_files.side_effect = Exception("Erreur de lecture")
     
     result = load_pdf()
     
     assert result == []
     
-    
\ No newline at end of file
+    
+
+def test_list_pdf_files(tmp_path):
+    for name in ["b.pdf", "a.PDF", ".hidden.pdf", "notes.txt"]:
+        (tmp_path / name).write_bytes(b"")
+
+    result = list_pdf_files(str(tmp_path))
+
+    assert result == [str(tmp_path / "a.PDF"), str(tmp_path / "b.pdf")]
+
+
+@patch(f"{MODULE_PATH}._parse_page_range")
+@patch(f"{MODULE_PATH}.plan_page_ranges")
+def test_load_pdf_files_keeps_order(mock_plan, mock_parse):
+    mock_plan.return_value = [("a.pdf", 0, 2), ("a.pdf", 2, 3), ("b.pdf", 0, 1)]
+    mock_parse.side_effect = lambda task: [
+        MagicMock(page_content=f"{task[0]}:{page}") for page in range(task[1], task[2])
+    ]
+
+    result = load_pdf_files(["a.pdf", "b.pdf"], workers=1, pages_per_task=2)
+
+    assert [doc.page_content for doc in result] == ["a.pdf:0", "a.pdf:1", "a.pdf:2", "b.pdf:0"]
+    assert mock_plan.call_args.args[:2] == (["a.pdf", "b.pdf"], 2)
+
+
+@patch(f"{MODULE_PATH}.open_page_cache", return_value=None)
+@patch(f"{MODULE_PATH}._parse_page_range")
+@patch(f"{MODULE_PATH}.plan_page_ranges")
+def test_failed_page_range_is_reported(mock_plan, mock_parse, mock_cache):
+    mock_plan.return_value = [("a.pdf", 0, 2), ("a.pdf", 2, 3), ("b.pdf", 0, 1)]
+
+    def parse(task):
+        if task == ("a.pdf", 2, 3):
+            raise ValueError("broken xref")
+        return [MagicMock(page_content=f"{task[0]}:{page}") for page in range(task[1], task[2])]
+
+    mock_parse.side_effect = parse
+    errors = []
+
+    result = list(iter_pdf_files(["a.pdf", "b.pdf"], workers=1, pages_per_task=2,
+                                 on_error=lambda path, error: errors.append((path, str(error)))))
+
+    assert [doc.page_content for doc in result] == ["a.pdf:0", "a.pdf:1", "b.pdf:0"]
+    assert errors == [("a.pdf", "broken xref")]
+
+
+@patch(f"{MODULE_PATH}.count_pdf_pages", return_value=3)
+def test_plan_page_ranges_reuses_known_page_counts(mock_count):
+    tasks = plan_page_ranges(["a.pdf", "b.pdf"], 2, page_counts={"a.pdf": 5})
+
+    assert tasks == [("a.pdf", 0, 2), ("a.pdf", 2, 4), ("a.pdf", 4, 5), ("b.pdf", 0, 2), ("b.pdf", 2, 3)]
+    mock_count.assert_called_once_with("b.pdf")
@@ -0,0 +1,70 @@
+from unittest.mock import Mock
+import httpx
+import pytest
+from qdrant_client.http.exceptions import ResponseHandlingException
+from app.services.qdrant_manager import (
+    get_qdrant_client,
+    qdrant_health_check,
+    with_reconnect
+)
+
+def test_client_is_shared(mock_qdrant_client):
+    assert get_qdrant_client() is get_qdrant_client()
+    mock_qdrant_client.assert_called_once()
+
+def test_health_check_ok(mock_qdrant_client):
+    assert qdrant_health_check() is True
+    mock_qdrant_client.return_value.get_collections.assert_called_once()
+
+def test_health_check_reconnects(mock_qdrant_client):
+    broken, fresh = Mock(), Mock()
+    broken.get_collections.side_effect = ResponseHandlingException(ConnectionError("reset"))
+    mock_qdrant_client.side_effect = [broken, fresh]
+
+    get_qdrant_client()
+    assert qdrant_health_check() is True
+
+    broken.close.assert_called_once()
+    assert get_qdrant_client() is fresh
+
+def test_health_check_down(mock_qdrant_client):
+    mock_qdrant_client.return_value.get_collections.side_effect = ResponseHandlingException(ConnectionError("down"))
+    assert qdrant_health_check() is False
+
+def test_with_reconnect_retries_once(mock_qdrant_client):
+    calls = []
+
+    @with_reconnect
+    def search():
+        calls.append(get_qdrant_client())
+        if len(calls) == 1:
+            raise ResponseHandlingException(ConnectionError("reset"))
+        return "ok"
+
+    mock_qdrant_client.side_effect = [Mock(), Mock()]
+
+    assert search() == "ok"
+    assert calls[0] is not calls[1]
+
+def test_with_reconnect_keeps_other_errors(mock_qdrant_client):
+    @with_reconnect
+    def search():
+        raise ValueError("bad filter")
+
+    with pytest.raises(ValueError):
+        search()
+    mock_qdrant_client.assert_not_called()
+
+def test_with_reconnect_ignores_embedding_errors(mock_qdrant_client):
+    calls = []
+
+    @with_reconnect
+    def search():
+        calls.append(get_qdrant_client())
+        # Ollama injoignable pendant l'embedding de la requête
+        raise httpx.ConnectError("ollama down")
+
+    with pytest.raises(httpx.ConnectError):
+        search()
+    assert len(calls) == 1
+    mock_qdrant_client.assert_called_once()
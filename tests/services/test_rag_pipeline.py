@@ -2,21 +2,16 @@ import pytest
 from unittest.mock import patch, MagicMock
 from app.services.rag_pipeline import initialize_rag_system, create_rag_chain
 
-@patch("app.services.rag_pipeline.load_pdf")
-@patch("app.services.rag_pipeline.split_documents")
-@patch("app.services.rag_pipeline.store_embeddings")
+@patch("app.services.rag_pipeline.ingest_documents")
 @patch("app.services.rag_pipeline.create_retriever")
 @patch("app.services.rag_pipeline.create_llm")
 def test_initialize_rag_system_force_recreate(
     mock_create_llm, 
     mock_create_retriever, 
-    mock_store_embeddings, 
-    mock_split_documents, 
-    mock_load_pdf
+    mock_ingest_documents
 ):
     # Setup Mocks
-    mock_load_pdf.return_value = ["doc1"]
-    mock_split_documents.return_value = ["chunk1"]
+    mock_ingest_documents.return_value = {"chunks_embedded": 1}
     mock_retriever = MagicMock()
     mock_create_retriever.return_value = mock_retriever
     mock_llm = MagicMock()
@@ -26,24 +21,18 @@ def test_initialize_rag_system_force_recreate(
     chain = initialize_rag_system(force_recreate_db=True)
     
     # Assert
-    mock_load_pdf.assert_called_once()
-    mock_split_documents.assert_called_once()
-    mock_store_embeddings.assert_called_once()
+    mock_ingest_documents.assert_called_once()
     mock_create_retriever.assert_called_once()
     mock_create_llm.assert_called_once()
     assert chain is not None
 
-@patch("app.services.rag_pipeline.load_pdf")
-@patch("app.services.rag_pipeline.split_documents")
-@patch("app.services.rag_pipeline.store_embeddings")
+@patch("app.services.rag_pipeline.ingest_documents")
 @patch("app.services.rag_pipeline.create_retriever")
 @patch("app.services.rag_pipeline.create_llm")
 def test_initialize_rag_system_no_recreate(
     mock_create_llm, 
     mock_create_retriever, 
-    mock_store_embeddings, 
-    mock_split_documents, 
-    mock_load_pdf
+    mock_ingest_documents
 ):
     # Setup Mocks
     mock_retriever = MagicMock()
@@ -55,8 +44,6 @@ def test_initialize_rag_system_no_recreate(
     chain = initialize_rag_system(force_recreate_db=False)
     
     # Assert
-    mock_load_pdf.assert_not_called()
-    mock_split_documents.assert_not_called()
-    mock_store_embeddings.assert_not_called()
+    mock_ingest_documents.assert_not_called()
     mock_create_retriever.assert_called_once()
     assert chain is not None
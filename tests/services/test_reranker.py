@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+import numpy as np
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
+from app.services import reranker as reranker_module
+from app.services.reranker import CrossEncoderReranker, get_reranker
+from app.config import settings
+
+class FakeTokenizer:
+    def encode_batch(self, pairs):
+        return [SimpleNamespace(ids=[1, len(p)], attention_mask=[1, 1], type_ids=[0, 1]) for _, p in pairs]
+
+def make_reranker(batch_size=2):
+    """Le faux modèle note chaque passage par sa longueur."""
+    session = Mock()
+    session.get_inputs.return_value = [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+    session.run.side_effect = lambda _, feed: [feed["input_ids"][:, 1:2].astype(np.float32)]
+    return CrossEncoderReranker(session, FakeTokenizer(), batch_size=batch_size), session
+
+def test_rerank_orders_by_score():
+    reranker, session = make_reranker()
+    docs = [Document(page_content="a" * n) for n in (1, 5, 3, 4, 2)]
+
+    result = reranker.rerank("question", docs, top_k=3)
+
+    assert [len(d.page_content) for d in result] == [5, 4, 3]
+    assert session.run.call_count == 3
+    # Seules les entrées déclarées par le modèle lui sont passées
+    assert set(session.run.call_args.args[1]) == {"input_ids", "attention_mask"}
+
+def test_rerank_budget_keeps_original_order_for_unscored(monkeypatch):
+    reranker, session = make_reranker(batch_size=2)
+    docs = [Document(page_content="a" * n) for n in (1, 2, 9, 8)]
+    clock = iter([0.0, 1.0, 1.0])
+    monkeypatch.setattr("app.services.reranker.time.perf_counter", lambda: next(clock))
+
+    result = reranker.rerank("question", docs, top_k=4, budget_ms=100)
+
+    assert session.run.call_count == 1
+    assert [len(d.page_content) for d in result] == [2, 1, 9, 8]
+
+def test_rerank_empty():
+    reranker, _ = make_reranker()
+    assert reranker.rerank("question", [], top_k=3) == []
+
+def test_get_reranker_disabled():
+    assert get_reranker() is None
+
+def test_get_reranker_load_failure(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "RETRIEVAL_RERANKING", True)
+    monkeypatch.setattr(settings, "RERANKER_MODEL", str(tmp_path))
+    assert get_reranker() is None
+
+def test_get_reranker_retries_failed_load(monkeypatch):
+    monkeypatch.setattr(settings, "RETRIEVAL_RERANKING", True)
+    monkeypatch.setattr(settings, "RERANKER_RETRY_SECONDS", 0.0)
+    loaded = Mock()
+    load = Mock(side_effect=[None, loaded])
+    monkeypatch.setattr(reranker_module, "_load_reranker", load)
+
+    # L'échec n'est pas gardé : l'appel suivant recharge, puis le modèle chargé est réutilisé
+    assert get_reranker() is None
+    assert get_reranker() is loaded
+    assert get_reranker() is loaded
+    assert load.call_count == 2
+
+def test_get_reranker_waits_before_retrying(monkeypatch):
+    monkeypatch.setattr(settings, "RETRIEVAL_RERANKING", True)
+    load = Mock(return_value=None)
+    monkeypatch.setattr(reranker_module, "_load_reranker", load)
+
+    assert get_reranker() is None
+    assert get_reranker() is None
+    load.assert_called_once()
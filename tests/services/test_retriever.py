@@ -1,5 +1,11 @@
-from unittest.mock import Mock, patch
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
 from app.services.retriever import HybridRetriever, create_retriever
+from app.config import settings
+try:
+    from langchain_core.documents import Document
+except ImportError:
+    from langchain.schema import Document
 try:
     from langchain_core.callbacks import CallbackManagerForRetrieverRun
 except ImportError:
@@ -27,7 +33,8 @@ def test_hybrid_retriever_get_relevant_documents(mock_search_hybrid):
     mock_search_hybrid.assert_called_once_with(
         query="test query",
         top_k=5,
-        alpha=0.7
+        alpha=0.7,
+        filters=None
     )
 
 @patch("app.services.retriever.search_hybrid")
@@ -48,3 +55,87 @@ def test_create_retriever():
     assert isinstance(retriever, HybridRetriever)
     assert retriever.top_k == 10
     assert retriever.alpha == 0.5
+
+@patch("app.services.retriever.asearch_hybrid", new_callable=AsyncMock)
+@patch("app.services.retriever.search_hybrid")
+@pytest.mark.asyncio
+async def test_hybrid_retriever_ainvoke_uses_async_search(mock_search_hybrid, mock_asearch_hybrid):
+    mock_doc = Document(page_content="doc1")
+    mock_asearch_hybrid.return_value = [mock_doc]
+
+    retriever = HybridRetriever(top_k=3, alpha=0.5)
+    results = await retriever.ainvoke("test query")
+
+    assert results == [mock_doc]
+    mock_asearch_hybrid.assert_awaited_once_with(query="test query", top_k=3, alpha=0.5, filters=None)
+    mock_search_hybrid.assert_not_called()
+
+@patch("app.services.retriever.asearch_hybrid", new_callable=AsyncMock)
+@pytest.mark.asyncio
+async def test_hybrid_retriever_ainvoke_loads_reranker_off_the_event_loop(mock_asearch_hybrid):
+    import threading
+    loaded_in = []
+
+    def load_reranker():
+        loaded_in.append(threading.current_thread().name)
+        return None
+
+    mock_asearch_hybrid.return_value = [Document(page_content="doc1")]
+    with patch("app.services.retriever.get_reranker", side_effect=load_reranker):
+        await HybridRetriever(top_k=3, rerank=True).ainvoke("test query")
+
+    assert loaded_in and loaded_in[0].startswith("blocking")
+
+@patch("app.services.retriever.get_reranker")
+@patch("app.services.retriever.search_hybrid")
+def test_hybrid_retriever_reranks_candidates(mock_search_hybrid, mock_get_reranker):
+    candidates = [Mock(page_content=f"doc{i}") for i in range(20)]
+    mock_search_hybrid.return_value = candidates
+    reranker = mock_get_reranker.return_value
+    reranker.rerank.return_value = candidates[:5]
+
+    retriever = HybridRetriever(top_k=5, alpha=0.7, rerank=True)
+    results = retriever._get_relevant_documents("test query", run_manager=Mock(spec=CallbackManagerForRetrieverRun))
+
+    assert results == candidates[:5]
+    mock_search_hybrid.assert_called_once_with(query="test query", top_k=settings.RERANK_CANDIDATES, alpha=0.7, filters=None)
+    reranker.rerank.assert_called_once_with(
+        "test query", candidates, top_k=5, budget_ms=settings.RERANK_BUDGET_MS
+    )
+
+@patch("app.services.retriever.get_reranker")
+@patch("app.services.retriever.search_hybrid")
+def test_hybrid_retriever_rerank_pool_covers_top_k(mock_search_hybrid, mock_get_reranker):
+    mock_search_hybrid.return_value = []
+    mock_get_reranker.return_value.rerank.return_value = []
+
+    top_k = settings.RERANK_CANDIDATES + 10
+    HybridRetriever(top_k=top_k, rerank=True)._get_relevant_documents(
+        "test query", run_manager=Mock(spec=CallbackManagerForRetrieverRun)
+    )
+
+    assert mock_search_hybrid.call_args.kwargs["top_k"] == top_k
+
+@patch("app.services.retriever.search_hybrid")
+@patch("app.services.retriever.search_hybrid_batch")
+def test_hybrid_retriever_batch_uses_batched_search(mock_search_hybrid_batch, mock_search_hybrid):
+    docs = [[Document(page_content="a")], [Document(page_content="b")]]
+    mock_search_hybrid_batch.return_value = docs
+
+    retriever = HybridRetriever(top_k=4, alpha=0.6, rerank=False)
+    results = retriever.batch(["q1", "q2"])
+
+    assert results == docs
+    mock_search_hybrid_batch.assert_called_once_with(["q1", "q2"], top_k=4, alpha=0.6, filters=None)
+    mock_search_hybrid.assert_not_called()
+
+@patch("app.services.retriever.search_hybrid")
+def test_hybrid_retriever_mmr_fetches_larger_pool(mock_search_hybrid, monkeypatch):
+    monkeypatch.setattr(settings, "DIVERSITY_CANDIDATE_FACTOR", 3)
+    mock_search_hybrid.return_value = [Document(page_content=f"chunk numéro {i} du manuel") for i in range(6)]
+
+    retriever = HybridRetriever(top_k=2, alpha=0.7, rerank=False, diversity="mmr")
+    results = retriever.invoke("test query")
+
+    assert len(results) == 2
+    assert mock_search_hybrid.call_args.kwargs["top_k"] == 6
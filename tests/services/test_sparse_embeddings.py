@@ -0,0 +1,30 @@
+from app.services.sparse_embeddings import BM25SparseEmbeddings, term_index
+
+def test_embed_query_unique_terms():
+    sparse = BM25SparseEmbeddings()
+
+    vector = sparse.embed_query("Les pompes et la pompe")
+
+    assert vector.indices == [term_index("pomp")]
+    assert vector.values == [1.0]
+
+def test_embed_documents_tf_saturation():
+    sparse = BM25SparseEmbeddings(k1=1.2, b=0.0)
+
+    once, many = sparse.embed_documents(["pompe filtre", "pompe pompe pompe pompe filtre"])
+
+    weights_once = dict(zip(once.indices, once.values))
+    weights_many = dict(zip(many.indices, many.values))
+    pump = term_index("pomp")
+
+    assert weights_once[pump] == 1.0
+    assert 1.0 < weights_many[pump] < 2.2
+    assert len(set(many.indices)) == len(many.indices)
+
+def test_query_matches_document_terms():
+    sparse = BM25SparseEmbeddings()
+
+    query = sparse.embed_query("Calibration des capteurs")
+    doc = sparse.embed_documents(["La calibration du capteur est annuelle"])[0]
+
+    assert set(query.indices) <= set(doc.indices)
@@ -0,0 +1,34 @@
+import time
+import pytest
+from app.services.streaming import batched, prefetch
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 3)) == []
+
+def test_prefetch_preserves_order():
+    assert list(prefetch(iter(range(100)), maxsize=3)) == list(range(100))
+
+def test_prefetch_propagates_errors():
+    def failing():
+        yield 1
+        raise ValueError("boom")
+
+    stream = prefetch(failing(), maxsize=2)
+    assert next(stream) == 1
+    with pytest.raises(ValueError, match="boom"):
+        next(stream)
+
+def test_prefetch_is_bounded():
+    produced = []
+    def producer():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    stream = prefetch(producer(), maxsize=2)
+    assert next(stream) == 0
+    # Le producteur ne peut avancer que de la taille de la file (+ l'élément en attente de put)
+    time.sleep(0.3)
+    assert len(produced) <= 4
+    stream.close()
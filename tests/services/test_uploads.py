@@ -0,0 +1,58 @@
+import asyncio
+import os
+import pytest
+
+from app.services.uploads import UploadRejected, sanitize_pdf_filename, save_pdf_upload
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def save(*chunks, **kwargs):
+    return asyncio.run(save_pdf_upload(stream(*chunks), **kwargs))
+
+
+def test_upload_is_written_in_chunks(tmp_path):
+    path = save(b"%P", b"DF-1.7 ", b"contenu", filename="manuel.pdf", data_path=str(tmp_path))
+
+    assert path == str(tmp_path / "manuel.pdf")
+    assert open(path, "rb").read() == b"%PDF-1.7 contenu"
+    assert os.listdir(tmp_path) == ["manuel.pdf"]
+
+
+def test_non_pdf_is_rejected_and_cleaned_up(tmp_path):
+    with pytest.raises(UploadRejected) as exc:
+        save(b"GIF89a", filename="manuel.pdf", data_path=str(tmp_path))
+
+    assert exc.value.status_code == 415
+    assert os.listdir(tmp_path) == []
+
+
+def test_too_large_upload_is_rejected(tmp_path):
+    with pytest.raises(UploadRejected) as exc:
+        save(b"%PDF-", b"x" * 100, filename="manuel.pdf", data_path=str(tmp_path), max_bytes=50)
+
+    assert exc.value.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+
+def test_existing_file_requires_overwrite(tmp_path):
+    (tmp_path / "manuel.pdf").write_bytes(b"%PDF-old")
+
+    with pytest.raises(UploadRejected) as exc:
+        save(b"%PDF-new", filename="manuel.pdf", data_path=str(tmp_path))
+    assert exc.value.status_code == 409
+
+    save(b"%PDF-new", filename="manuel.pdf", data_path=str(tmp_path), overwrite=True)
+    assert (tmp_path / "manuel.pdf").read_bytes() == b"%PDF-new"
+
+
+def test_filename_is_sanitized():
+    assert sanitize_pdf_filename("../../etc/Manuel pompe.PDF") == "Manuel pompe.PDF"
+    assert sanitize_pdf_filename("a;b.pdf") == "a_b.pdf"
+    with pytest.raises(UploadRejected):
+        sanitize_pdf_filename("notes.txt")
+    with pytest.raises(UploadRejected):
+        sanitize_pdf_filename(".pdf")
@@ -1,15 +1,22 @@
 from unittest.mock import Mock, patch, MagicMock
+import asyncio
+import time
 import pytest
+from app.services import vector_store
 from app.services.vector_store import (
+    asearch_hybrid,
     create_qdrant_collection,
     store_embeddings,
     get_vector_store,
     search_semantic,
     search_keyword,
-    search_hybrid
+    search_hybrid,
+    search_hybrid_batch
 )
 from app.config import settings
+from app.metrics import RAG_FUSION_DUPLICATES
 from qdrant_client.http import models
+from langchain_core.documents import Document
 
 def test_create_qdrant_collection_exists(mock_qdrant_client, mock_vector_store_embeddings):
     client_instance = mock_qdrant_client.return_value
@@ -22,6 +29,8 @@ def test_create_qdrant_collection_exists(mock_qdrant_client, mock_vector_store_e
     
     assert result is True
     client_instance.create_collection.assert_not_called()
+    indexed = {c.kwargs["field_name"] for c in client_instance.create_payload_index.call_args_list}
+    assert indexed == set(vector_store.PAYLOAD_INDEXES)
 
 def test_create_qdrant_collection_new(mock_qdrant_client, mock_vector_store_embeddings):
     client_instance = mock_qdrant_client.return_value
@@ -33,6 +42,39 @@ def test_create_qdrant_collection_new(mock_qdrant_client, mock_vector_store_embe
     assert result is True
     client_instance.create_collection.assert_called_once()
     mock_vector_store_embeddings.return_value.embed_query.assert_called_with("test")
+    kwargs = client_instance.create_collection.call_args.kwargs
+    assert "dense" in kwargs["vectors_config"]
+    assert kwargs["sparse_vectors_config"]["sparse"].modifier == models.Modifier.IDF
+
+def test_init_qdrant_collection_fresh_install(mock_qdrant_client, mock_vector_store_embeddings):
+    client_instance = mock_qdrant_client.return_value
+    client_instance.get_aliases.return_value.aliases = []
+    client_instance.collection_exists.return_value = False
+    client_instance.get_collections.return_value.collections = []
+
+    vector_store.init_qdrant_collection()
+
+    # Une version est créée et l'alias posé dessus en une seule opération, sans suppression
+    version = client_instance.create_collection.call_args.kwargs["collection_name"]
+    assert version.startswith(f"{settings.QDRANT_COLLECTION_NAME}_v")
+    client_instance.delete_collection.assert_not_called()
+    operations = client_instance.update_collection_aliases.call_args.kwargs["change_aliases_operations"]
+    assert len(operations) == 1
+    assert operations[0].create_alias.collection_name == version
+    assert operations[0].create_alias.alias_name == settings.QDRANT_COLLECTION_NAME
+
+def test_init_qdrant_collection_keeps_existing_alias(mock_qdrant_client, mock_vector_store_embeddings):
+    client_instance = mock_qdrant_client.return_value
+    alias = Mock(alias_name=settings.QDRANT_COLLECTION_NAME, collection_name=f"{settings.QDRANT_COLLECTION_NAME}_v1")
+    client_instance.get_aliases.return_value.aliases = [alias]
+    active = Mock()
+    active.name = alias.collection_name
+    client_instance.get_collections.return_value.collections = [active]
+
+    vector_store.init_qdrant_collection()
+
+    client_instance.create_collection.assert_not_called()
+    client_instance.update_collection_aliases.assert_not_called()
 
 def test_store_embeddings(mock_qdrant_client, mock_vector_store_embeddings, mock_langchain_qdrant):
     
@@ -41,70 +83,518 @@ def test_store_embeddings(mock_qdrant_client, mock_vector_store_embeddings, mock
     mock_collection = Mock()
     mock_collection.name = settings.QDRANT_COLLECTION_NAME
     client_instance.get_collections.return_value.collections = [mock_collection]
+    client_instance.scroll.return_value = ([], None)
+    
+    mock_vector_store_embeddings.return_value.embed_documents.side_effect = lambda texts: [[0.1] * 4] * len(texts)
     
-    chunks = [Mock(page_content="test", metadata={})]
+    chunks = [Mock(page_content="test", metadata={"chunk_id": "chunk-1"})]
     
     # Execute
     result = store_embeddings(chunks)
     
     assert result is True
-    mock_langchain_qdrant.from_documents.assert_called_once()
+    points = client_instance.upsert.call_args.kwargs["points"]
+    assert [point.id for point in points] == ["chunk-1"]
+    assert points[0].payload == {"page_content": "test", "metadata": {"chunk_id": "chunk-1"}}
+    assert set(points[0].vector) == {"dense", "sparse"}
 
 def test_get_vector_store(mock_qdrant_client, mock_vector_store_embeddings, mock_langchain_qdrant):
+    mock_langchain_qdrant.return_value.client = mock_qdrant_client.return_value
+
     # Execute
     result = get_vector_store()
     
     mock_langchain_qdrant.assert_called_once()
     assert result == mock_langchain_qdrant.return_value
 
+    # Le vector store et le client sont réutilisés d'un appel à l'autre
+    assert get_vector_store() is result
+    mock_langchain_qdrant.assert_called_once()
+    mock_qdrant_client.assert_called_once()
+
 def test_search_semantic(mock_qdrant_client, mock_vector_store_embeddings, mock_langchain_qdrant):
     
-    mock_store = mock_langchain_qdrant.return_value
-    mock_doc = Mock(page_content="result")
-    mock_store.similarity_search_with_score.return_value = [(mock_doc, 0.9)]
+    client_instance = mock_qdrant_client.return_value
+    mock_point = Mock(score=0.9)
+    mock_point.id = "point-1"
+    mock_point.payload = {'page_content': 'result', 'metadata': {}}
+    client_instance.query_points.return_value.points = [mock_point]
     
     # Execute
     results = search_semantic("query")
+    search_semantic("  Query ")
     
     assert len(results) == 1
-    assert results[0][0] == mock_doc
-    mock_store.similarity_search_with_score.assert_called_with(
-        query="query",
-        k=10,
-        filter=None
-    )
+    assert results[0][0].page_content == "result"
+    assert results[0][1] == 0.9
+    kwargs = client_instance.query_points.call_args.kwargs
+    assert kwargs["using"] == "dense"
+    assert kwargs["limit"] == 10
+    assert kwargs["query_filter"] is None
+
+    # La même question (à la casse et aux espaces près) n'est embeddée qu'une fois
+    mock_vector_store_embeddings.return_value.embed_query.assert_called_once_with("query")
 
 def test_search_keyword(mock_qdrant_client):
     
     client_instance = mock_qdrant_client.return_value
     mock_point = Mock()
+    mock_point.id = "point-1"
     mock_point.payload = {'page_content': 'this is a test keyword result', 'metadata': {}}
-    client_instance.scroll.return_value = ([mock_point], None)
+    other_point = Mock()
+    other_point.id = "point-2"
+    other_point.payload = {'page_content': 'unrelated content', 'metadata': {}}
+    client_instance.scroll.return_value = ([mock_point, other_point], None)
     
-    # Execute
+    # Execute: l'index BM25 est construit une fois puis réutilisé
     results = search_keyword("test keyword")
+    results_again = search_keyword("keyword")
     
     assert len(results) == 1
     assert results[0][0].page_content == 'this is a test keyword result'
+    assert results[0][0].metadata['_id'] == "point-1"
+    assert results[0][1] == 1.0
+    assert len(results_again) == 1
+    client_instance.scroll.assert_called_once()
+
+def test_store_embeddings_rebuilds_keyword_index(mock_qdrant_client, mock_vector_store_embeddings, mock_langchain_qdrant, monkeypatch):
+    monkeypatch.setattr(settings, "HYBRID_FUSION", "client")
+    client_instance = mock_qdrant_client.return_value
+    mock_collection = Mock()
+    mock_collection.name = settings.QDRANT_COLLECTION_NAME
+    client_instance.get_collections.return_value.collections = [mock_collection]
+
+    mock_point = Mock()
+    mock_point.id = "point-1"
+    mock_point.payload = {'page_content': 'calibration de la pompe', 'metadata': {'page': 1}}
+    client_instance.scroll.return_value = ([mock_point], None)
+
+    mock_vector_store_embeddings.return_value.embed_documents.side_effect = lambda texts: [[0.1] * 4] * len(texts)
+
+    store_embeddings([Mock(page_content="calibration de la pompe", metadata={})])
+
     client_instance.scroll.assert_called_once()
+    results = search_keyword("Calibrations des pompes")
+    assert len(results) == 1
+    assert results[0][0].metadata['page'] == 1
+    client_instance.scroll.assert_called_once()
+
+def test_store_embeddings_skips_keyword_index_with_server_fusion(mock_qdrant_client, mock_vector_store_embeddings, mock_langchain_qdrant, monkeypatch):
+    monkeypatch.setattr(settings, "HYBRID_FUSION", "server")
+    client_instance = mock_qdrant_client.return_value
+    mock_vector_store_embeddings.return_value.embed_documents.side_effect = lambda texts: [[0.1] * 4] * len(texts)
+
+    store_embeddings([Mock(page_content="calibration de la pompe", metadata={"chunk_id": "c1"})])
+
+    # Les requêtes passent par les vecteurs creux de Qdrant : aucun parcours de la collection
+    client_instance.scroll.assert_not_called()
+
+def test_deferred_keyword_rebuilds_are_coalesced(monkeypatch):
+    import threading
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_rebuild(collection_name=None):
+        calls.append(collection_name)
+        started.set()
+        release.wait(5)
+
+    monkeypatch.setattr(vector_store, "rebuild_keyword_index", slow_rebuild)
+
+    assert vector_store.schedule_keyword_index_rebuild("docs")
+    started.wait(5)
+    # Reconstruction en cours : la suivante attend son tour, les autres demandes s'y ajoutent
+    assert vector_store.schedule_keyword_index_rebuild("docs")
+    assert not vector_store.schedule_keyword_index_rebuild("docs")
+    release.set()
+    vector_store.wait_for_keyword_index_rebuilds()
+
+    assert calls == ["docs", "docs"]
+
+def test_deferred_keyword_rebuild_needs_a_served_index(mock_vector_store_embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    mock_vector_store_embeddings.return_value.embed_documents.side_effect = lambda texts: [[1.0, 0.0]] * len(texts)
+    schedule = Mock()
+    monkeypatch.setattr(vector_store, "schedule_keyword_index_rebuild", schedule)
+
+    # Aucun index à servir en attendant : construit tout de suite
+    store_embeddings([Document(page_content="a", metadata={"chunk_id": "c1"})], defer_keyword_index=True)
+    schedule.assert_not_called()
+    assert vector_store.load_bm25_index(vector_store.get_keyword_index_path()).num_docs == 1
+
+    store_embeddings([Document(page_content="b", metadata={"chunk_id": "c2"})], defer_keyword_index=True)
+    schedule.assert_called_once_with(settings.QDRANT_COLLECTION_NAME)
+
+def test_concurrent_searches_build_keyword_index_once(monkeypatch):
+    import threading
+    import time
+    from app.services.bm25_index import BM25Index
+
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    calls = []
+
+    def slow_rebuild(collection_name=None):
+        calls.append(collection_name)
+        time.sleep(0.05)
+        path = vector_store.get_keyword_index_path(collection_name)
+        return BM25Index.build(iter([("p1", "calibration de la pompe", {})]), path)
+
+    monkeypatch.setattr(vector_store, "rebuild_keyword_index", slow_rebuild)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(search_keyword("pompe"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [settings.QDRANT_COLLECTION_NAME]
+    assert [len(hits) for hits in results] == [1, 1, 1, 1]
 
 def test_search_hybrid(mock_qdrant_client, mock_vector_store_embeddings, mock_langchain_qdrant):
     
-    mock_store = mock_langchain_qdrant.return_value
-    mock_doc_sem = {'page_content': 'semantic'} 
+    client_instance = mock_qdrant_client.return_value
+    mock_point = Mock()
+    mock_point.id = "point-1"
+    mock_point.payload = {'page_content': 'keyword_doc', 'metadata': {'page': 3}}
+    client_instance.query_points.return_value.points = [mock_point]
+    
+    # Execute
+    results = search_hybrid("keyword_doc query", top_k=2, alpha=0.7)
+    
+    assert len(results) == 1
+    assert results[0].page_content == 'keyword_doc'
+    assert results[0].metadata == {'page': 3, '_id': 'point-1', '_collection_name': settings.QDRANT_COLLECTION_NAME}
+
+    # Une seule requête Qdrant avec les deux jambes en prefetch et une RRF pondérée
+    client_instance.query_points.assert_called_once()
+    kwargs = client_instance.query_points.call_args.kwargs
+    assert [p.using for p in kwargs["prefetch"]] == ["dense", "sparse"]
+    assert kwargs["query"].rrf.weights == pytest.approx([0.7, 0.3])
+    client_instance.scroll.assert_not_called()
+    mock_langchain_qdrant.return_value.similarity_search_with_score.assert_not_called()
+
+def test_search_hybrid_pure_semantic(mock_qdrant_client, mock_vector_store_embeddings):
+    client_instance = mock_qdrant_client.return_value
+    client_instance.query_points.return_value.points = []
 
-    mock_doc_obj = Mock()
-    mock_doc_obj.page_content = "semantic_doc"
-    mock_store.similarity_search_with_score.return_value = [(mock_doc_obj, 0.8)]
+    search_hybrid("pompe", top_k=2, alpha=1.0)
+
+    kwargs = client_instance.query_points.call_args.kwargs
+    assert [p.using for p in kwargs["prefetch"]] == ["dense"]
+
+def test_search_hybrid_client_fusion(mock_qdrant_client, mock_vector_store_embeddings, mock_langchain_qdrant, monkeypatch):
+    monkeypatch.setattr(settings, "HYBRID_FUSION", "client")
     
-    # Mock keyword search
     client_instance = mock_qdrant_client.return_value
+    semantic_point = Mock(score=0.8)
+    semantic_point.id = "point-0"
+    semantic_point.payload = {'page_content': 'semantic_doc', 'metadata': {}}
+    client_instance.query_points.return_value.points = [semantic_point]
+    
+    # Mock keyword search
     mock_point = Mock()
+    mock_point.id = "point-1"
     mock_point.payload = {'page_content': 'keyword_doc', 'metadata': {}}
     client_instance.scroll.return_value = ([mock_point], None)
     
     # Execute
-    results = search_hybrid("test query", top_k=2)
+    results = search_hybrid("keyword_doc query", top_k=2)
     
-    assert len(results) <= 2
-    assert len(results) > 0
+    assert len(results) == 2
+    # Jambe sémantique seule : pas de prefetch ni de fusion côté serveur
+    assert "prefetch" not in client_instance.query_points.call_args.kwargs
+
+@pytest.mark.asyncio
+async def test_asearch_hybrid_server(mock_async_qdrant_client, mock_vector_store_embeddings):
+    client_instance = mock_async_qdrant_client.return_value
+    mock_point = Mock()
+    mock_point.id = "point-1"
+    mock_point.payload = {'page_content': 'pompe', 'metadata': {}}
+    client_instance.query_points.return_value.points = [mock_point]
+
+    results = await asearch_hybrid("calibration pompe", top_k=2, alpha=0.7)
+
+    assert [doc.page_content for doc in results] == ['pompe']
+    kwargs = client_instance.query_points.call_args.kwargs
+    assert [p.using for p in kwargs["prefetch"]] == ["dense", "sparse"]
+
+@pytest.mark.asyncio
+async def test_asearch_hybrid_server_embedding_timeout(mock_async_qdrant_client, mock_vector_store_embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "RETRIEVAL_LEG_TIMEOUT", 0.01)
+
+    async def slow_embedding(query):
+        await asyncio.sleep(1)
+
+    mock_vector_store_embeddings.return_value.aembed_query = slow_embedding
+    client_instance = mock_async_qdrant_client.return_value
+    client_instance.query_points.return_value.points = []
+
+    await asearch_hybrid("calibration pompe", top_k=2, alpha=0.7)
+
+    # L'embedding dense a expiré : seule la jambe creuse est interrogée
+    kwargs = client_instance.query_points.call_args.kwargs
+    assert [p.using for p in kwargs["prefetch"]] == ["sparse"]
+
+@pytest.mark.asyncio
+async def test_asearch_hybrid_client_concurrent_legs(monkeypatch):
+    monkeypatch.setattr(settings, "HYBRID_FUSION", "client")
+    monkeypatch.setattr(settings, "RETRIEVAL_LEG_TIMEOUT", 0.2)
+
+    semantic_doc = Mock(page_content="semantic", metadata={'_id': 'a'})
+    keyword_doc = Mock(page_content="keyword", metadata={'_id': 'b'})
+
+    async def semantic(query, top_k, **kwargs):
+        await asyncio.sleep(0.1)
+        return [(semantic_doc, 0.9)]
+
+    async def keyword(query, top_k, **kwargs):
+        await asyncio.sleep(0.1)
+        return [(keyword_doc, 1.0)]
+
+    monkeypatch.setattr(vector_store, "asearch_semantic", semantic)
+    monkeypatch.setattr(vector_store, "asearch_keyword", keyword)
+
+    start = time.perf_counter()
+    results = await asearch_hybrid("query", top_k=2, alpha=0.7)
+    elapsed = time.perf_counter() - start
+
+    assert results == [semantic_doc, keyword_doc]
+    assert elapsed < 0.19
+
+@pytest.mark.asyncio
+async def test_asearch_hybrid_client_partial_results(monkeypatch):
+    monkeypatch.setattr(settings, "HYBRID_FUSION", "client")
+    monkeypatch.setattr(settings, "RETRIEVAL_LEG_TIMEOUT", 0.05)
+
+    keyword_doc = Mock(page_content="keyword", metadata={'_id': 'b'})
+
+    async def slow_semantic(query, top_k, **kwargs):
+        await asyncio.sleep(1)
+
+    async def keyword(query, top_k, **kwargs):
+        return [(keyword_doc, 1.0)]
+
+    monkeypatch.setattr(vector_store, "asearch_semantic", slow_semantic)
+    monkeypatch.setattr(vector_store, "asearch_keyword", keyword)
+
+    results = await asearch_hybrid("query", top_k=2)
+
+    assert results == [keyword_doc]
+
+def test_search_hybrid_client_fusion_deduplicates(mock_qdrant_client, mock_vector_store_embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "HYBRID_FUSION", "client")
+    duplicates_before = RAG_FUSION_DUPLICATES._value.get()
+
+    shared = {'page_content': 'calibration de la pompe', 'metadata': {'chunk_id': 'chunk-1'}}
+    client_instance = mock_qdrant_client.return_value
+    semantic_point = Mock(score=0.5)
+    semantic_point.id = "chunk-1"
+    semantic_point.payload = shared
+    other_point = Mock(score=0.6)
+    other_point.id = "chunk-2"
+    other_point.payload = {'page_content': 'nettoyage', 'metadata': {'chunk_id': 'chunk-2'}}
+    client_instance.query_points.return_value.points = [other_point, semantic_point]
+
+    keyword_point = Mock()
+    keyword_point.id = "chunk-1"
+    keyword_point.payload = shared
+    client_instance.scroll.return_value = ([keyword_point], None)
+
+    results = search_hybrid("calibration pompe", top_k=5, alpha=0.5)
+
+    assert [doc.metadata['chunk_id'] for doc in results] == ['chunk-1', 'chunk-2']
+    assert RAG_FUSION_DUPLICATES._value.get() == duplicates_before + 1
+
+def test_build_qdrant_filter():
+    assert vector_store.build_qdrant_filter(None) is None
+    assert vector_store.build_qdrant_filter({}) is None
+
+    qdrant_filter = vector_store.build_qdrant_filter(
+        {"source": ["a.pdf", "b.pdf"], "chapter": "3", "page_min": 10, "page_max": 20}
+    )
+    conditions = {c.key: c for c in qdrant_filter.must}
+    assert conditions["metadata.source"].match.any == ["a.pdf", "b.pdf"]
+    assert conditions["metadata.chapter"].match.value == "3"
+    assert conditions["metadata.page"].range.gte == 10
+    assert conditions["metadata.page"].range.lte == 20
+
+def test_search_hybrid_forwards_filters(mock_qdrant_client, mock_vector_store_embeddings):
+    client_instance = mock_qdrant_client.return_value
+    client_instance.query_points.return_value.points = []
+
+    search_hybrid("query", top_k=2, alpha=0.5, filters={"source": "manual.pdf"})
+
+    kwargs = client_instance.query_points.call_args.kwargs
+    assert all(p.filter.must[0].key == "metadata.source" for p in kwargs["prefetch"])
+
+def test_create_qdrant_collection_quantized(mock_qdrant_client, mock_vector_store_embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_QUANTIZATION", "scalar")
+    monkeypatch.setattr(settings, "QDRANT_ON_DISK_VECTORS", True)
+    monkeypatch.setattr(settings, "QDRANT_HNSW_M", 32)
+    client_instance = mock_qdrant_client.return_value
+    client_instance.get_collections.return_value.collections = []
+
+    create_qdrant_collection()
+
+    dense = client_instance.create_collection.call_args.kwargs["vectors_config"]["dense"]
+    assert dense.on_disk is True
+    assert dense.hnsw_config.m == 32
+    assert dense.quantization_config.scalar.type == models.ScalarType.INT8
+
+def test_build_quantization_config(monkeypatch):
+    assert vector_store.build_quantization_config("none") is None
+    assert isinstance(vector_store.build_quantization_config("binary"), models.BinaryQuantization)
+    with pytest.raises(ValueError):
+        vector_store.build_quantization_config("pq")
+
+def test_build_search_params(monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_QUANTIZATION", "none")
+    assert vector_store.build_search_params(hnsw_ef=64).hnsw_ef == 64
+    assert vector_store.build_search_params().quantization is None
+
+    monkeypatch.setattr(settings, "QDRANT_QUANTIZATION", "binary")
+    params = vector_store.build_search_params(oversampling=3.0)
+    assert params.quantization.oversampling == 3.0
+    assert params.quantization.rescore is True
+
+def test_search_semantic_forwards_search_params(mock_qdrant_client, mock_vector_store_embeddings):
+    client_instance = mock_qdrant_client.return_value
+    client_instance.query_points.return_value.points = []
+
+    search_semantic("query", top_k=3, search_params=models.SearchParams(hnsw_ef=256))
+
+    assert client_instance.query_points.call_args.kwargs["search_params"].hnsw_ef == 256
+
+def test_local_backend_store_and_search(mock_vector_store_embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    embeddings = mock_vector_store_embeddings.return_value
+    embeddings.embed_documents.side_effect = lambda texts: [
+        [1.0, 0.0] if "pompe" in text else [0.0, 1.0] for text in texts
+    ]
+    embeddings.embed_query.return_value = [0.9, 0.1]
+    chunks = [
+        Document(page_content="Calibration de la pompe", metadata={"source": "a.pdf", "page": 1, "chunk_id": "c1"}),
+        Document(page_content="Nettoyage du filtre", metadata={"source": "a.pdf", "page": 2, "chunk_id": "c2"}),
+    ]
+
+    with patch("app.services.vector_store.get_qdrant_client") as mock_client:
+        store_embeddings(chunks)
+        # Ré-ingestion d'un chunk existant : remplacé, pas dupliqué
+        store_embeddings(chunks[:1])
+
+        semantic = search_semantic("pompe", top_k=5)
+        hybrid = search_hybrid("calibration pompe", top_k=1)
+
+    mock_client.assert_not_called()
+    assert [doc.metadata["_id"] for doc, _ in semantic] == ["c1", "c2"]
+    assert hybrid[0].page_content == "Calibration de la pompe"
+
+def test_search_hybrid_batch_server(mock_qdrant_client, mock_vector_store_embeddings):
+    embeddings = mock_vector_store_embeddings.return_value
+    embeddings.embed_documents.return_value = [[0.1] * 4, [0.2] * 4]
+    point = Mock(id="c1", payload={"page_content": "doc", "metadata": {"chunk_id": "c1"}})
+    client_instance = mock_qdrant_client.return_value
+    client_instance.query_batch_points.return_value = [Mock(points=[point]), Mock(points=[])]
+
+    results = search_hybrid_batch(["pompe", "filtre"], top_k=3, alpha=0.5)
+
+    embeddings.embed_documents.assert_called_once_with(["pompe", "filtre"])
+    client_instance.query_batch_points.assert_called_once()
+    requests = client_instance.query_batch_points.call_args.kwargs["requests"]
+    assert len(requests) == 2
+    assert requests[0].limit == 3
+    assert [[d.page_content for d in docs] for docs in results] == [["doc"], []]
+
+def test_search_hybrid_batch_client_fusion(mock_vector_store_embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "HYBRID_FUSION", "client")
+    embeddings = mock_vector_store_embeddings.return_value
+    embeddings.embed_documents.return_value = [[0.1] * 4, [0.2] * 4]
+    doc = lambda chunk_id: Document(page_content=chunk_id, metadata={"chunk_id": chunk_id})
+    semantic = [[(doc("a"), 0.9), (doc("b"), 0.5)], [(doc("c"), 0.8)]]
+    keyword = {"q1": [(doc("b"), 1.0)], "q2": [(doc("d"), 1.0), (doc("c"), 0.2)]}
+    monkeypatch.setattr(vector_store, "_search_semantic_batch", lambda *args, **kwargs: semantic)
+    monkeypatch.setattr(vector_store, "search_keyword", lambda query, top_k, filters=None: keyword[query])
+
+    results = search_hybrid_batch(["q1", "q2"], top_k=2, alpha=0.5)
+
+    # q1 : b = 0.25 + 0.5, a = 0.45 ; q2 : c = 0.4 + 0.1, d = 0.5 (égalité : ordre d'arrivée)
+    assert [[d.page_content for d in docs] for docs in results] == [["b", "a"], ["c", "d"]]
+    assert results == [
+        vector_store._fuse_results(semantic[i], keyword[q], 2, 0.5) for i, q in enumerate(["q1", "q2"])
+    ]
+
+def test_local_backend_search_hybrid_batch(mock_vector_store_embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    embeddings = mock_vector_store_embeddings.return_value
+    embeddings.embed_documents.side_effect = lambda texts: [
+        [1.0, 0.0] if "pompe" in text else [0.0, 1.0] for text in texts
+    ]
+    store_embeddings([
+        Document(page_content="Calibration de la pompe", metadata={"chunk_id": "c1"}),
+        Document(page_content="Nettoyage du filtre", metadata={"chunk_id": "c2"}),
+    ])
+
+    results = search_hybrid_batch(["pompe", "filtre"], top_k=1)
+
+    assert [docs[0].metadata["chunk_id"] for docs in results] == ["c1", "c2"]
+
+def test_store_embeddings_deletes_removed_chunks(mock_qdrant_client, mock_vector_store_embeddings, mock_langchain_qdrant, monkeypatch):
+    monkeypatch.setattr(vector_store, "rebuild_keyword_index", Mock())
+    client_instance = mock_qdrant_client.return_value
+
+    store_embeddings([], delete_ids=["c1", "c2"])
+
+    selector = client_instance.delete.call_args.kwargs["points_selector"]
+    assert selector.points == ["c1", "c2"]
+    client_instance.upsert.assert_not_called()
+
+def test_local_backend_delete(mock_vector_store_embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    mock_vector_store_embeddings.return_value.embed_documents.side_effect = lambda texts: [[1.0, 0.0]] * len(texts)
+    store_embeddings([
+        Document(page_content="a", metadata={"chunk_id": "c1"}),
+        Document(page_content="b", metadata={"chunk_id": "c2"}),
+    ])
+
+    store_embeddings([], delete_ids=["c1"])
+
+    assert vector_store.count_embeddings() == 1
+    assert [doc_id for doc_id, _, _ in vector_store.iter_stored_documents()] == ["c2"]
+
+def test_store_embeddings_streams_batches(mock_qdrant_client, mock_vector_store_embeddings, monkeypatch):
+    monkeypatch.setattr(vector_store, "rebuild_keyword_index", Mock())
+    monkeypatch.setattr(settings, "INGESTION_BATCH_SIZE", 2)
+    client_instance = mock_qdrant_client.return_value
+    embeddings = mock_vector_store_embeddings.return_value
+    embeddings.embed_documents.side_effect = lambda texts: [[0.1] * 4] * len(texts)
+    consumed = []
+
+    def chunks():
+        for i in range(5):
+            consumed.append(i)
+            yield Document(page_content=f"chunk {i}", metadata={"chunk_id": f"c{i}"})
+
+    def delete_ids():
+        # Résolu seulement une fois le flux entièrement consommé
+        assert consumed == list(range(5))
+        return ["old"]
+
+    store_embeddings(chunks(), delete_ids=delete_ids)
+
+    assert [len(call.args[0]) for call in embeddings.embed_documents.call_args_list] == [2, 2, 1]
+    upserted = [point.id for call in client_instance.upsert.call_args_list for point in call.kwargs["points"]]
+    assert upserted == ["c0", "c1", "c2", "c3", "c4"]
+    assert client_instance.delete.call_args.kwargs["points_selector"].points == ["old"]
+
+def test_local_backend_store_stream(mock_vector_store_embeddings, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(settings, "INGESTION_BATCH_SIZE", 1)
+    mock_vector_store_embeddings.return_value.embed_documents.side_effect = lambda texts: [[1.0, 0.0]] * len(texts)
+    store_embeddings(Document(page_content=t, metadata={"chunk_id": t}) for t in ["a", "b"])
+
+    store_embeddings(
+        (Document(page_content=t, metadata={"chunk_id": t}) for t in ["c"]),
+        delete_ids=lambda: ["a"]
+    )
+
+    assert sorted(doc_id for doc_id, _, _ in vector_store.iter_stored_documents()) == ["b", "c"]